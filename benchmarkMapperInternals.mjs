@@ -0,0 +1,197 @@
+/**
+ * Copyright 2023 Google LLC.
+ * Copyright (c) Microsoft Corporation.
+ *
+ * Licensed under the Apache License, Version 2.0 (the "License");
+ * you may not use this file except in compliance with the License.
+ * You may obtain a copy of the License at
+ *
+ *     http://www.apache.org/licenses/LICENSE-2.0
+ *
+ * Unless required by applicable law or agreed to in writing, software
+ * distributed under the License is distributed on an "AS IS" BASIS,
+ * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ * See the License for the specific language governing permissions and
+ * limitations under the License.
+ */
+
+/**
+ * Microbenchmarks of the mapper data structures. They run the built mapper
+ * modules in Node without a browser, and only print their numbers, as
+ * wall-clock timings are too noisy to assert on.
+ *
+ * Usage:
+ *   npm run build
+ *   node benchmarkMapperInternals.mjs [benchmark...]
+ *
+ * Without arguments, all the benchmarks are run. Run Node with `--expose-gc`
+ * for more stable heap numbers.
+ */
+
+import {createRequire} from 'module';
+
+const require = createRequire(import.meta.url);
+const {BrowsingContextStorage} = require(
+  './lib/cjs/bidiMapper/domains/context/browsingContextStorage.js'
+);
+const {EventManager} = require(
+  './lib/cjs/bidiMapper/domains/events/EventManager.js'
+);
+const {RealmStorage} = require(
+  './lib/cjs/bidiMapper/domains/script/realmStorage.js'
+);
+const {SubscriptionManager} = require(
+  './lib/cjs/bidiMapper/domains/events/SubscriptionManager.js'
+);
+
+const SOME_EVENT = 'log.entryAdded';
+
+function createContext(contextId, parentId) {
+  return {contextId, parentId, addChild: () => {}};
+}
+
+function measure(iterations, fn) {
+  const start = performance.now();
+  for (let i = 0; i < iterations; i++) {
+    fn(i);
+  }
+  return performance.now() - start;
+}
+
+/**
+ * Compares channel lookups served from the subscription index with lookups
+ * which recompute the channels, in a context tree of `depth` levels with
+ * `channels` subscribed channels. The index is invalidated by adding and
+ * removing a context, and the time of that alone is subtracted.
+ */
+function benchmarkSubscriptionIndex() {
+  const depth = 10;
+  const channels = 100;
+  const iterations = 10000;
+  const browsingContextStorage = new BrowsingContextStorage();
+  const subscriptionManager = new SubscriptionManager(browsingContextStorage);
+  let contextId = null;
+  for (let i = 0; i < depth; i++) {
+    browsingContextStorage.addContext(createContext(`CONTEXT_${i}`, contextId));
+    contextId = `CONTEXT_${i}`;
+  }
+  for (let i = 0; i < channels; i++) {
+    subscriptionManager.subscribe(
+      SOME_EVENT,
+      i % 2 === 0 ? null : `CONTEXT_${i % depth}`,
+      `CHANNEL_${i}`
+    );
+  }
+  const dummyContext = createContext('DUMMY_CONTEXT', null);
+  const invalidate = () => {
+    browsingContextStorage.addContext(dummyContext);
+    browsingContextStorage.removeContext(dummyContext.contextId);
+  };
+  const lookup = () =>
+    subscriptionManager.getChannelsSubscribedToEvent(SOME_EVENT, contextId);
+
+  const invalidationTime = measure(iterations, invalidate);
+  const uncachedTime =
+    measure(iterations, () => {
+      invalidate();
+      lookup();
+    }) - invalidationTime;
+  const cachedTime = measure(iterations, lookup);
+
+  console.log(
+    `Subscription index: ${iterations} lookups with ${channels} channels ` +
+      `at depth ${depth}: ${uncachedTime.toFixed(2)}ms without index, ` +
+      `${cachedTime.toFixed(2)}ms with index`
+  );
+}
+
+/**
+ * Measures the time and heap used to register events sent to a global
+ * subscription and buffered per context, which covers the bookkeeping of the
+ * event buffers and of the last sent events.
+ */
+async function benchmarkEventBuffering() {
+  const iterations = 10000;
+  const contexts = 10;
+  let sentCount = 0;
+  const eventManager = new EventManager({
+    getBrowsingContextStorage: () => new BrowsingContextStorage(),
+    emitOutgoingEvent: () => sentCount++,
+  });
+  await eventManager.subscribe([SOME_EVENT], [null], 'SOME_CHANNEL');
+  const event = {method: SOME_EVENT, params: {text: 'text'}};
+
+  globalThis.gc?.();
+  const heapUsedBefore = process.memoryUsage().heapUsed;
+  const start = performance.now();
+  for (let i = 0; i < iterations; i++) {
+    await eventManager.registerEvent(event, `CONTEXT_${i % contexts}`);
+  }
+  const time = performance.now() - start;
+  const heapUsedAfter = process.memoryUsage().heapUsed;
+
+  console.log(
+    `Event buffering: ${sentCount} events in ${contexts} contexts: ` +
+      `${time.toFixed(2)}ms, ` +
+      `~${Math.round((heapUsedAfter - heapUsedBefore) / iterations)} ` +
+      `heap bytes per event`
+  );
+}
+
+/**
+ * Measures deleting realms which own many known handles, one browsing context
+ * at a time.
+ */
+function benchmarkRealmDeletion() {
+  const realms = 100;
+  const handlesPerRealm = 500;
+  const realmStorage = new RealmStorage();
+  for (let i = 0; i < realms; i++) {
+    realmStorage.addRealm({
+      realmId: `REALM_${i}`,
+      browsingContextId: `CONTEXT_${i}`,
+      navigableId: `CONTEXT_${i}_NAVIGABLE`,
+      executionContextId: 1,
+      origin: 'SOME_ORIGIN',
+      type: 'window',
+      cdpSessionId: `CONTEXT_${i}_SESSION`,
+    });
+    for (let j = 0; j < handlesPerRealm; j++) {
+      realmStorage.addKnownHandle(`HANDLE_${i}_${j}`, `REALM_${i}`);
+    }
+  }
+
+  const time = measure(realms, (i) =>
+    realmStorage.deleteRealms({browsingContextId: `CONTEXT_${i}`})
+  );
+
+  console.log(
+    `Realm deletion: ${realms} realms with ${handlesPerRealm} handles ` +
+      `each: ${time.toFixed(2)}ms, ` +
+      `${realmStorage.knownHandlesToRealm.size} handles left`
+  );
+}
+
+const BENCHMARKS = {
+  'event-buffering': benchmarkEventBuffering,
+  'realm-deletion': benchmarkRealmDeletion,
+  'subscription-index': benchmarkSubscriptionIndex,
+};
+
+async function main() {
+  const names = process.argv.slice(2);
+  for (const name of names) {
+    if (!(name in BENCHMARKS)) {
+      throw new Error(
+        `Unknown benchmark ${name}. Known: ${Object.keys(BENCHMARKS).join(
+          ', '
+        )}`
+      );
+    }
+  }
+  for (const name of names.length > 0 ? names : Object.keys(BENCHMARKS)) {
+    await BENCHMARKS[name]();
+  }
+}
+
+main();
@@ -0,0 +1,91 @@
+/**
+ * Copyright 2023 Google LLC.
+ * Copyright (c) Microsoft Corporation.
+ *
+ * Licensed under the Apache License, Version 2.0 (the "License");
+ * you may not use this file except in compliance with the License.
+ * You may obtain a copy of the License at
+ *
+ *     http://www.apache.org/licenses/LICENSE-2.0
+ *
+ * Unless required by applicable law or agreed to in writing, software
+ * distributed under the License is distributed on an "AS IS" BASIS,
+ * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ * See the License for the specific language governing permissions and
+ * limitations under the License.
+ */
+
+/**
+ * Measures the BiDi session startup latency: the time from opening a WebSocket
+ * connection to the first `session.status` response, which includes launching
+ * the browser and the mapper. Sessions are started sequentially against one
+ * BiDi server, so the sessions after the first one show the effect of the
+ * server-side caches.
+ *
+ * Usage:
+ *   node benchmarkMapperStartup.mjs [--sessions=N] [--headless=false]
+ *
+ * The server is started on `PORT` (default 8080). Run it with
+ * `DEBUG=bidiServer:internal` to also see the per-session mapper launch time.
+ */
+
+import {
+  getBasePort,
+  parseArguments,
+  startServer,
+  waitForServer,
+} from './scriptUtils.mjs';
+import WebSocket from 'ws';
+
+/** Returns the milliseconds until the first command of a new session. */
+function measureSession(port) {
+  return new Promise((resolve, reject) => {
+    const start = performance.now();
+    const ws = new WebSocket(`ws://localhost:${port}/session`);
+    ws.on('open', () => {
+      ws.send(JSON.stringify({id: 1, method: 'session.status', params: {}}));
+    });
+    ws.on('message', (data) => {
+      const message = JSON.parse(data.toString());
+      if (message.id !== 1) {
+        return;
+      }
+      const duration = performance.now() - start;
+      ws.on('close', () => resolve(duration));
+      ws.close();
+    });
+    ws.on('error', reject);
+  });
+}
+
+async function main() {
+  const options = parseArguments(process.argv.slice(2), {
+    sessions: 10,
+    headless: 'true',
+  });
+  const port = getBasePort();
+  const server = startServer(port, [`--headless=${options.headless}`]);
+  try {
+    await waitForServer(server, port);
+
+    const durations = [];
+    for (let i = 0; i < options.sessions; i++) {
+      const duration = await measureSession(port);
+      console.log(`Session ${i + 1}: ${duration.toFixed(1)}ms`);
+      durations.push(duration);
+    }
+
+    const sorted = [...durations].sort((a, b) => a - b);
+    const median = sorted[Math.floor(sorted.length / 2)];
+    console.log(
+      `First session: ${durations[0].toFixed(1)}ms, ` +
+        `min: ${sorted[0].toFixed(1)}ms, ` +
+        `median: ${median.toFixed(1)}ms, ` +
+        `max: ${sorted[sorted.length - 1].toFixed(1)}ms`
+    );
+  } finally {
+    server.kill();
+  }
+}
+
+main();
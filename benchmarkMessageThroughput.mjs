@@ -0,0 +1,114 @@
+/**
+ * Copyright 2023 Google LLC.
+ * Copyright (c) Microsoft Corporation.
+ *
+ * Licensed under the Apache License, Version 2.0 (the "License");
+ * you may not use this file except in compliance with the License.
+ * You may obtain a copy of the License at
+ *
+ *     http://www.apache.org/licenses/LICENSE-2.0
+ *
+ * Unless required by applicable law or agreed to in writing, software
+ * distributed under the License is distributed on an "AS IS" BASIS,
+ * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ * See the License for the specific language governing permissions and
+ * limitations under the License.
+ */
+
+/**
+ * Measures the BiDi message throughput through the server and the mapper tab.
+ * Each round sends a number of pipelined `session.status` commands, which are
+ * handled without any CDP command, and waits for all the responses, so the
+ * transport dominates the time.
+ *
+ * Usage:
+ *   node benchmarkMessageThroughput.mjs [--messages=N] [--rounds=N]
+ *     [--headless=false]
+ *
+ * The server is started on `PORT` (default 8080).
+ */
+
+import {
+  getBasePort,
+  parseArguments,
+  startServer,
+  waitForServer,
+} from './scriptUtils.mjs';
+import WebSocket from 'ws';
+
+function connect(port) {
+  return new Promise((resolve, reject) => {
+    const ws = new WebSocket(`ws://localhost:${port}/session`);
+    ws.on('open', () => resolve(ws));
+    ws.on('error', reject);
+  });
+}
+
+let lastCommandId = 0;
+
+/** Returns the milliseconds until all the responses are received. */
+function measureRound(ws, messageCount) {
+  return new Promise((resolve, reject) => {
+    const pending = new Set();
+    const start = performance.now();
+    const onMessage = (data) => {
+      const message = JSON.parse(data.toString());
+      if (!pending.delete(message.id)) {
+        return;
+      }
+      if (message.error !== undefined) {
+        ws.off('message', onMessage);
+        reject(new Error(`Command failed: ${JSON.stringify(message)}`));
+        return;
+      }
+      if (pending.size === 0) {
+        ws.off('message', onMessage);
+        resolve(performance.now() - start);
+      }
+    };
+    ws.on('message', onMessage);
+    for (let i = 0; i < messageCount; i++) {
+      const id = ++lastCommandId;
+      pending.add(id);
+      ws.send(JSON.stringify({id, method: 'session.status', params: {}}));
+    }
+  });
+}
+
+async function main() {
+  const options = parseArguments(process.argv.slice(2), {
+    messages: 500,
+    rounds: 5,
+    headless: 'true',
+  });
+  const port = getBasePort();
+  const server = startServer(port, [`--headless=${options.headless}`]);
+  try {
+    await waitForServer(server, port);
+    const ws = await connect(port);
+
+    const rates = [];
+    for (let i = 0; i < options.rounds; i++) {
+      const duration = await measureRound(ws, options.messages);
+      const rate = (options.messages * 1000) / duration;
+      console.log(
+        `Round ${i + 1}: ${options.messages} messages in ` +
+          `${duration.toFixed(1)}ms, ${rate.toFixed(0)} messages/sec`
+      );
+      rates.push(rate);
+    }
+    ws.close();
+
+    const sorted = [...rates].sort((a, b) => a - b);
+    const median = sorted[Math.floor(sorted.length / 2)];
+    console.log(
+      `Messages/sec min: ${sorted[0].toFixed(0)}, ` +
+        `median: ${median.toFixed(0)}, ` +
+        `max: ${sorted[sorted.length - 1].toFixed(0)}`
+    );
+  } finally {
+    server.kill();
+  }
+}
+
+main();
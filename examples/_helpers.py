@@ -19,6 +19,8 @@ import os
 import requests
 import websockets
 
+from bidi_client import BidiClient
+
 
 async def get_websocket():
     port = os.getenv('PORT', 8080)
@@ -62,6 +64,10 @@ async def read_JSON_message(websocket):
 
 
 async def run_and_wait_command(command, websocket):
+    if isinstance(websocket, BidiClient):
+        command_id = await websocket.send_command(command)
+        return await websocket.wait_for_response(command_id)
+
     command_id = command["id"]
     await send_JSON_command(command, websocket)
 
@@ -0,0 +1,148 @@
+# Copyright 2023 Google LLC.
+# Copyright (c) Microsoft Corporation.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Multiplexed BiDi client shared by the E2E tests and the examples. Depends
+# only on the standard library, so that the examples don't need pytest.
+
+import asyncio
+import json
+import logging
+
+_command_counter = 1
+
+
+def get_next_command_id():
+    global _command_counter
+    _command_counter += 1
+    return _command_counter
+
+
+# Multiplexes BiDi commands and events over a single WebSocket connection.
+# A background reader task routes each command response to the future
+# registered for its id and each event to a per-method queue, so any number of
+# commands can be in flight at once and no event is dropped.
+#
+# Usage:
+#     client = BidiClient(websocket)
+#     results = await asyncio.gather(
+#         client.execute_command(command_1),
+#         client.execute_command(command_2))
+#     event = await client.wait_for_event("log.entryAdded")
+#     await client.close()
+class BidiClient:
+
+    def __init__(self, websocket):
+        self.websocket = websocket
+        # Maps the id of each command sent and not yet waited for to the future
+        # resolved with the command response.
+        self._responses = {}
+        # Maps event method to the queue of received events.
+        self._events = {}
+        # Error responses which can't be matched to a command, e.g. when the
+        # message could not be parsed by the server.
+        self.errors = asyncio.Queue()
+        # Set once the reader has finished, e.g. when the connection is closed.
+        self._reader_error = None
+        self._reader = asyncio.create_task(self._read_messages())
+
+    def _event_queue(self, event_method):
+        if event_method not in self._events:
+            self._events[event_method] = asyncio.Queue()
+        return self._events[event_method]
+
+    async def _read_messages(self):
+        error = ConnectionError("BiDi connection closed")
+        try:
+            async for message_str in self.websocket:
+                self._dispatch(json.loads(message_str))
+        except Exception as e:
+            error = e
+        finally:
+            self._reader_error = error
+            # Fail the commands which will never get a response.
+            for future in self._responses.values():
+                if not future.done():
+                    future.set_exception(error)
+
+    def _dispatch(self, message):
+        if message.get("id") is not None:
+            future = self._responses.get(message["id"])
+            if future is None:
+                # Not sent by this client, so nobody would wait for it.
+                logging.warning("Unexpected BiDi response: %s", message)
+            elif not future.done():
+                future.set_result(message)
+        elif "method" in message:
+            self._event_queue(message["method"]).put_nowait(message)
+        else:
+            self.errors.put_nowait(message)
+
+    # Sends the command without waiting for the response. Keeps the command id
+    # if set, and assigns a new one otherwise. Returns the command id, which
+    # should be passed to `wait_for_response`.
+    async def send_command(self, command):
+        if self._reader.done():
+            raise ConnectionError("BiDi client is closed")
+        if "id" not in command:
+            command["id"] = get_next_command_id()
+        self._responses[command["id"]] = \
+            asyncio.get_running_loop().create_future()
+        await self.websocket.send(json.dumps(command))
+        return command["id"]
+
+    # Waits for the raw response message of the command with the given id,
+    # sent by `send_command`.
+    async def wait_for_response(self, command_id):
+        try:
+            return await self._responses[command_id]
+        finally:
+            self._responses.pop(command_id, None)
+
+    # Sends the command with a new id and returns its result. Raises if the
+    # command failed.
+    async def execute_command(self, command):
+        command["id"] = get_next_command_id()
+        command_id = await self.send_command(command)
+        resp = await self.wait_for_response(command_id)
+        if "result" in resp:
+            return resp["result"]
+        raise Exception({"error": resp["error"], "message": resp["message"]})
+
+    # Returns the oldest not yet consumed event with the given method. Raises
+    # if there is no such event and no more messages will be read.
+    async def wait_for_event(self, event_method):
+        queue = self._event_queue(event_method)
+        if not queue.empty():
+            return queue.get_nowait()
+        if self._reader.done():
+            raise self._reader_error
+        get_event = asyncio.ensure_future(queue.get())
+        try:
+            await asyncio.wait({get_event, self._reader},
+                               return_when=asyncio.FIRST_COMPLETED)
+            if get_event.done():
+                return get_event.result()
+            raise self._reader_error
+        finally:
+            get_event.cancel()
+
+    # Stops reading messages. The websocket is owned by the caller and stays
+    # open.
+    async def close(self):
+        self._reader.cancel()
+        try:
+            await self._reader
+        except asyncio.CancelledError:
+            pass
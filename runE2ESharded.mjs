@@ -0,0 +1,263 @@
+/**
+ * Copyright 2023 Google LLC.
+ * Copyright (c) Microsoft Corporation.
+ *
+ * Licensed under the Apache License, Version 2.0 (the "License");
+ * you may not use this file except in compliance with the License.
+ * You may obtain a copy of the License at
+ *
+ *     http://www.apache.org/licenses/LICENSE-2.0
+ *
+ * Unless required by applicable law or agreed to in writing, software
+ * distributed under the License is distributed on an "AS IS" BASIS,
+ * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ * See the License for the specific language governing permissions and
+ * limitations under the License.
+ */
+
+/**
+ * Runs the E2E tests in parallel shards. Each shard gets its own BiDi server
+ * on a distinct port and its own pytest process, which finds the server via
+ * the `PORT` environment variable. The pytest-md-report outputs of all the
+ * shards are merged into one report.
+ *
+ * Usage:
+ *   node runE2ESharded.mjs [--shards=N] [--headless=false] [-- pytest args]
+ *
+ * By default, the number of shards is the number of CPU cores, and the ports
+ * start from `PORT` (default 8080). The pytest args are passed to every shard,
+ * except the test paths, which only select the tests to split.
+ */
+
+import {execFileSync, spawn} from 'child_process';
+import {
+  getBasePort,
+  parseArguments,
+  startServer,
+  waitForServer,
+} from './scriptUtils.mjs';
+import fs from 'fs';
+import os from 'os';
+import path from 'path';
+
+const MARKDOWN_REPORT_COLUMNS = [
+  'passed',
+  'failed',
+  'error',
+  'skipped',
+  'xfailed',
+  'xpassed',
+];
+
+function parseScriptArguments() {
+  const args = process.argv.slice(2);
+  const separatorIndex = args.indexOf('--');
+  const ownArgs = separatorIndex === -1 ? args : args.slice(0, separatorIndex);
+  const pytestArgs =
+    separatorIndex === -1 ? [] : args.slice(separatorIndex + 1);
+
+  return {
+    ...parseArguments(ownArgs, {shards: os.cpus().length, headless: 'true'}),
+    basePort: getBasePort(),
+    pytestArgs,
+  };
+}
+
+/** Returns pytest node IDs of all the tests selected by `pytestArgs`. */
+function collectTests(pytestArgs) {
+  const output = execFileSync(
+    'python3',
+    ['-m', 'pytest', '--collect-only', '-q', ...pytestArgs],
+    {encoding: 'utf8'}
+  );
+  return output.split('\n').filter((line) => line.includes('::'));
+}
+
+/**
+ * Returns the pytest args without test paths. The shards get the selected
+ * tests by node IDs instead, so the paths would add all of their tests to
+ * every shard.
+ */
+function getShardPytestArgs(pytestArgs) {
+  return pytestArgs.filter(
+    (arg) => arg.startsWith('-') || !fs.existsSync(arg.split('::')[0])
+  );
+}
+
+/** Splits tests round-robin, so that each shard gets tests of all files. */
+function splitTests(tests, shards) {
+  const result = Array.from({length: shards}, () => []);
+  tests.forEach((test, i) => result[i % shards].push(test));
+  return result;
+}
+
+function runShard(shardIndex, port, pytestArgs, tests, reportPath) {
+  return new Promise((resolve) => {
+    const pytest = spawn(
+      'python3',
+      [
+        '-m',
+        'pytest',
+        `--md-report-output=${reportPath}`,
+        ...pytestArgs,
+        ...tests,
+      ],
+      {
+        stdio: 'inherit',
+        env: {
+          ...process.env,
+          PORT: String(port),
+          E2E_SHARD_INDEX: String(shardIndex),
+        },
+      }
+    );
+    pytest.on('exit', (code) => resolve(code ?? 1));
+  });
+}
+
+/**
+ * Parses a pytest-md-report table into a map from file path to a map from
+ * outcome to the number of tests.
+ */
+function parseMarkdownReport(report) {
+  const rows = report
+    .split('\n')
+    .filter((line) => line.startsWith('|'))
+    .map((line) =>
+      line
+        .split('|')
+        .slice(1, -1)
+        .map((cell) => cell.trim())
+    );
+  const [header, , ...body] = rows;
+  const result = new Map();
+  if (header === undefined) {
+    return result;
+  }
+  for (const row of body) {
+    const filePath = row[0];
+    if (['TOTAL', 'SUBTOTAL'].includes(filePath)) {
+      continue;
+    }
+    const counts = new Map();
+    header.forEach((column, i) => {
+      if (MARKDOWN_REPORT_COLUMNS.includes(column)) {
+        counts.set(column, parseInt(row[i]) || 0);
+      }
+    });
+    result.set(filePath, counts);
+  }
+  return result;
+}
+
+function mergeMarkdownReports(reports) {
+  const merged = new Map();
+  for (const report of reports) {
+    for (const [filePath, counts] of parseMarkdownReport(report)) {
+      if (!merged.has(filePath)) {
+        merged.set(filePath, new Map());
+      }
+      const mergedCounts = merged.get(filePath);
+      for (const [column, count] of counts) {
+        mergedCounts.set(column, (mergedCounts.get(column) ?? 0) + count);
+      }
+    }
+  }
+
+  const columns = MARKDOWN_REPORT_COLUMNS.filter((column) =>
+    Array.from(merged.values()).some((counts) => counts.get(column))
+  );
+  const sum = (counts) =>
+    columns.reduce((acc, column) => acc + (counts.get(column) ?? 0), 0);
+  const total = new Map(
+    columns.map((column) => [
+      column,
+      Array.from(merged.values()).reduce(
+        (acc, counts) => acc + (counts.get(column) ?? 0),
+        0
+      ),
+    ])
+  );
+
+  const rows = [
+    ['filepath', ...columns, 'SUBTOTAL'],
+    ...Array.from(merged.keys())
+      .sort()
+      .map((filePath) => {
+        const counts = merged.get(filePath);
+        return [
+          filePath,
+          ...columns.map((column) => String(counts.get(column) ?? 0)),
+          String(sum(counts)),
+        ];
+      }),
+    [
+      'TOTAL',
+      ...columns.map((column) => String(total.get(column))),
+      String(sum(total)),
+    ],
+  ];
+
+  const widths = rows[0].map((_, i) =>
+    Math.max(...rows.map((row) => row[i].length))
+  );
+  const formatRow = (row) =>
+    `| ${row
+      .map((cell, i) =>
+        i === 0 ? cell.padEnd(widths[i]) : cell.padStart(widths[i])
+      )
+      .join(' | ')} |`;
+  return [
+    formatRow(rows[0]),
+    `| ${widths
+      .map((width, i) =>
+        i === 0 ? '-'.repeat(width) : `${'-'.repeat(width - 1)}:`
+      )
+      .join(' | ')} |`,
+    ...rows.slice(1).map(formatRow),
+  ].join('\n');
+}
+
+async function main() {
+  const options = parseScriptArguments();
+  const tests = collectTests(options.pytestArgs);
+  const shards = Math.max(1, Math.min(options.shards, tests.length));
+  const reportDir = fs.mkdtempSync(path.join(os.tmpdir(), 'bidi-e2e-'));
+
+  console.log(`Running ${tests.length} tests in ${shards} shards.`);
+
+  const ports = Array.from({length: shards}, (_, i) => options.basePort + i);
+  const servers = ports.map((port) =>
+    startServer(port, [
+      `--headless=${options.headless}`,
+      '--reuse-browser=true',
+    ])
+  );
+  try {
+    await Promise.all(
+      servers.map((server, i) => waitForServer(server, ports[i]))
+    );
+
+    const reportPaths = ports.map((_, i) =>
+      path.join(reportDir, `shard-${i}.md`)
+    );
+    const shardPytestArgs = getShardPytestArgs(options.pytestArgs);
+    const exitCodes = await Promise.all(
+      splitTests(tests, shards).map((shardTests, i) =>
+        runShard(i, ports[i], shardPytestArgs, shardTests, reportPaths[i])
+      )
+    );
+
+    const reports = reportPaths
+      .filter((reportPath) => fs.existsSync(reportPath))
+      .map((reportPath) => fs.readFileSync(reportPath, 'utf8'));
+    console.log(mergeMarkdownReports(reports));
+
+    process.exitCode = exitCodes.find((code) => code !== 0) ?? 0;
+  } finally {
+    servers.forEach((server) => server.kill());
+    fs.rmSync(reportDir, {recursive: true, force: true});
+  }
+}
+
+main();
@@ -0,0 +1,103 @@
+/**
+ * Copyright 2023 Google LLC.
+ * Copyright (c) Microsoft Corporation.
+ *
+ * Licensed under the Apache License, Version 2.0 (the "License");
+ * you may not use this file except in compliance with the License.
+ * You may obtain a copy of the License at
+ *
+ *     http://www.apache.org/licenses/LICENSE-2.0
+ *
+ * Unless required by applicable law or agreed to in writing, software
+ * distributed under the License is distributed on an "AS IS" BASIS,
+ * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ * See the License for the specific language governing permissions and
+ * limitations under the License.
+ */
+
+/**
+ * Helpers shared by the scripts which start a BiDi server: the E2E shard
+ * runner and the benchmarks.
+ */
+
+import {spawn} from 'child_process';
+import http from 'http';
+
+/** Milliseconds to wait for a BiDi server to start. */
+const SERVER_START_TIMEOUT = 60000;
+
+/** Returns the port of the first BiDi server, `PORT` or 8080 by default. */
+export function getBasePort() {
+  return parseInt(process.env['PORT'] ?? '8080');
+}
+
+/**
+ * Parses `--name=value` arguments into a copy of `defaults`. The names must be
+ * keys of `defaults`, and the values of numeric options must be positive
+ * integers.
+ */
+export function parseArguments(args, defaults) {
+  const options = {...defaults};
+  for (const arg of args) {
+    const [name, value] = arg.replace(/^--/, '').split('=');
+    if (!Object.hasOwn(defaults, name)) {
+      throw new Error(`Unknown argument ${arg}`);
+    }
+    if (typeof defaults[name] === 'number') {
+      const number = Number(value);
+      if (!Number.isInteger(number) || number < 1) {
+        throw new Error(`Invalid ${name}: ${value}`);
+      }
+      options[name] = number;
+    } else {
+      options[name] = value;
+    }
+  }
+  return options;
+}
+
+/** Starts a BiDi server from the built sources on the given port. */
+export function startServer(port, serverArgs = []) {
+  return spawn(
+    'node',
+    ['lib/cjs/bidiServer/index.js', `--port=${port}`, ...serverArgs],
+    {stdio: 'inherit'}
+  );
+}
+
+/**
+ * Resolves once the server accepts connections. Rejects if the server exits or
+ * does not start in `SERVER_START_TIMEOUT` milliseconds.
+ */
+export function waitForServer(server, port) {
+  return new Promise((resolve, reject) => {
+    let retryTimer;
+    const fail = (error) => {
+      clearTimeout(retryTimer);
+      clearTimeout(startTimer);
+      server.off('exit', onExit);
+      reject(error);
+    };
+    const onExit = (code) => {
+      fail(new Error(`BiDi server on port ${port} exited with code ${code}`));
+    };
+    const startTimer = setTimeout(() => {
+      fail(new Error(`BiDi server on port ${port} did not start in time`));
+    }, SERVER_START_TIMEOUT);
+    server.on('exit', onExit);
+
+    const tryConnect = () => {
+      http
+        .get(`http://localhost:${port}/session`, (response) => {
+          response.resume();
+          clearTimeout(startTimer);
+          server.off('exit', onExit);
+          resolve();
+        })
+        .on('error', () => {
+          retryTimer = setTimeout(tryConnect, 100);
+        });
+    };
+    tryConnect();
+  });
+}
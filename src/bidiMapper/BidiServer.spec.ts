@@ -0,0 +1,273 @@
+/**
+ * Copyright 2023 Google LLC.
+ * Copyright (c) Microsoft Corporation.
+ *
+ * Licensed under the Apache License, Version 2.0 (the "License");
+ * you may not use this file except in compliance with the License.
+ * You may obtain a copy of the License at
+ *
+ *     http://www.apache.org/licenses/LICENSE-2.0
+ *
+ * Unless required by applicable law or agreed to in writing, software
+ * distributed under the License is distributed on an "AS IS" BASIS,
+ * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ * See the License for the specific language governing permissions and
+ * limitations under the License.
+ */
+
+import * as chai from 'chai';
+import * as sinon from 'sinon';
+import {BidiServer, BidiServerOptions} from './BidiServer.js';
+import {BidiTransport} from './BidiTransport.js';
+import {CdpConnection} from './CdpConnection.js';
+import {Deferred} from '../utils/deferred.js';
+import {Message} from '../protocol/protocol.js';
+import {OutgoingBidiMessage} from './OutgoingBidiMessage.js';
+
+const expect = chai.expect;
+
+const SOME_CONTEXT = 'SOME_CONTEXT';
+const ANOTHER_CONTEXT = 'ANOTHER_CONTEXT';
+
+type TestEvent = Deferred<Message.OutgoingMessage> & {text: string};
+
+describe('test BidiServer', () => {
+  let sendMessage: sinon.SinonStub;
+  let sendCdpCommand: sinon.SinonStub;
+  let onMessage: (message: Message.RawCommandRequest) => Promise<void>;
+
+  beforeEach(() => {
+    sendMessage = sinon.stub().resolves();
+    sendCdpCommand = sinon.stub().resolves({});
+  });
+
+  async function createServer(options?: BidiServerOptions) {
+    const transport: BidiTransport = {
+      setOnMessage: (handler) => {
+        onMessage = handler;
+      },
+      sendMessage,
+      close: sinon.spy(),
+    };
+    const browserClient = {sendCommand: sendCdpCommand, on: sinon.spy()};
+    return await BidiServer.createAndStart(
+      transport,
+      {browserClient: () => browserClient} as unknown as CdpConnection,
+      'SELF_TARGET_ID',
+      undefined,
+      undefined,
+      options
+    );
+  }
+
+  function createEvent(text: string): TestEvent {
+    return Object.assign(new Deferred<Message.OutgoingMessage>(), {text});
+  }
+
+  function emitEvent(
+    server: BidiServer,
+    event: TestEvent,
+    contextId: string,
+    channel: string | null = null
+  ) {
+    server.emitOutgoingEvent(
+      OutgoingBidiMessage.createFromPromise(event, channel),
+      contextId,
+      channel
+    );
+  }
+
+  function resolveEvent(event: TestEvent) {
+    event.resolve({
+      method: 'log.entryAdded',
+      params: {text: event.text},
+    } as unknown as Message.OutgoingMessage);
+  }
+
+  /**
+   * Starts the reset without waiting for it, as it needs a new tab which is
+   * never created here. The messages of the previous session are dropped as
+   * soon as the reset is started.
+   */
+  function startReset(server: BidiServer) {
+    sendCdpCommand
+      .withArgs('Target.createTarget')
+      .returns(new Deferred<object>());
+    server.reset();
+  }
+
+  function sentMessages(): string[] {
+    return sendMessage
+      .getCalls()
+      .map(
+        (call) => call.firstArg.params?.text ?? `response ${call.firstArg.id}`
+      );
+  }
+
+  describe('in order', () => {
+    it('should send messages in the order they are emitted', async () => {
+      const server = await createServer();
+      const event1 = createEvent('event 1');
+      const event2 = createEvent('event 2');
+      emitEvent(server, event1, SOME_CONTEXT);
+      emitEvent(server, event2, ANOTHER_CONTEXT);
+      await onMessage({id: 1, method: 'session.status', params: {}});
+
+      resolveEvent(event2);
+      await wait(1);
+      expect(sentMessages()).to.deep.equal([]);
+
+      resolveEvent(event1);
+      await wait(1);
+      expect(sentMessages()).to.deep.equal([
+        'event 1',
+        'event 2',
+        'response 1',
+      ]);
+    });
+
+    it('should drop messages of the previous session on reset', async () => {
+      const server = await createServer();
+      const cdpResponse = new Deferred<object>();
+      sendCdpCommand.withArgs('Some.method').returns(cdpResponse);
+      const event = createEvent('event');
+      emitEvent(server, event, SOME_CONTEXT);
+      await onMessage({
+        id: 1,
+        method: 'cdp.sendCommand',
+        params: {cdpMethod: 'Some.method', cdpParams: {}},
+      });
+
+      startReset(server);
+      resolveEvent(event);
+      cdpResponse.resolve({});
+      await wait(1);
+      expect(sentMessages()).to.deep.equal([]);
+
+      await onMessage({id: 2, method: 'session.status', params: {}});
+      await wait(1);
+      expect(sentMessages()).to.deep.equal(['response 2']);
+    });
+  });
+
+  describe('out of order responses', () => {
+    it('should send responses as soon as they are ready', async () => {
+      const server = await createServer({outOfOrderResponses: true});
+      const cdpResponse = new Deferred<object>();
+      sendCdpCommand.withArgs('Some.method').returns(cdpResponse);
+
+      await onMessage({
+        id: 1,
+        method: 'cdp.sendCommand',
+        params: {cdpMethod: 'Some.method', cdpParams: {}},
+      });
+      await onMessage({id: 2, method: 'session.status', params: {}});
+      await wait(1);
+      expect(sentMessages()).to.deep.equal(['response 2']);
+
+      cdpResponse.resolve({});
+      await wait(1);
+      expect(sentMessages()).to.deep.equal(['response 2', 'response 1']);
+    });
+
+    it('should keep the order of events per context', async () => {
+      const server = await createServer({outOfOrderResponses: true});
+      const event1 = createEvent('event 1');
+      const event2 = createEvent('event 2');
+      const event3 = createEvent('event 3');
+      emitEvent(server, event1, SOME_CONTEXT);
+      emitEvent(server, event2, SOME_CONTEXT);
+      emitEvent(server, event3, ANOTHER_CONTEXT);
+
+      resolveEvent(event3);
+      resolveEvent(event2);
+      await wait(1);
+      expect(sentMessages()).to.deep.equal(['event 3']);
+
+      resolveEvent(event1);
+      await wait(1);
+      expect(sentMessages()).to.deep.equal(['event 3', 'event 1', 'event 2']);
+    });
+
+    it('should send events of a command before its response', async () => {
+      const server = await createServer({outOfOrderResponses: true});
+      const cdpResponse = new Deferred<object>();
+      sendCdpCommand.withArgs('Some.method').returns(cdpResponse);
+      const eventBefore = createEvent('event before');
+      const eventDuring = createEvent('event during');
+
+      emitEvent(server, eventBefore, SOME_CONTEXT);
+      await onMessage({
+        id: 1,
+        method: 'cdp.sendCommand',
+        params: {cdpMethod: 'Some.method', cdpParams: {}},
+      });
+      emitEvent(server, eventDuring, ANOTHER_CONTEXT);
+
+      cdpResponse.resolve({});
+      await wait(1);
+      // Waits for the event emitted during the command only.
+      expect(sentMessages()).to.deep.equal([]);
+
+      resolveEvent(eventDuring);
+      await wait(1);
+      expect(sentMessages()).to.deep.equal(['event during', 'response 1']);
+
+      resolveEvent(eventBefore);
+      await wait(1);
+      expect(sentMessages()).to.deep.equal([
+        'event during',
+        'response 1',
+        'event before',
+      ]);
+    });
+
+    it('should not wait for events of other channels', async () => {
+      const server = await createServer({outOfOrderResponses: true});
+      const cdpResponse = new Deferred<object>();
+      sendCdpCommand.withArgs('Some.method').returns(cdpResponse);
+      const event = createEvent('event');
+
+      await onMessage({
+        id: 1,
+        method: 'cdp.sendCommand',
+        params: {cdpMethod: 'Some.method', cdpParams: {}},
+      });
+      emitEvent(server, event, SOME_CONTEXT, 'SOME_CHANNEL');
+
+      cdpResponse.resolve({});
+      await wait(1);
+      expect(sentMessages()).to.deep.equal(['response 1']);
+    });
+
+    it('should drop messages of the previous session on reset', async () => {
+      const server = await createServer({outOfOrderResponses: true});
+      const cdpResponse = new Deferred<object>();
+      sendCdpCommand.withArgs('Some.method').returns(cdpResponse);
+      const event = createEvent('event');
+      await onMessage({
+        id: 1,
+        method: 'cdp.sendCommand',
+        params: {cdpMethod: 'Some.method', cdpParams: {}},
+      });
+      emitEvent(server, event, SOME_CONTEXT);
+
+      startReset(server);
+      // The new session can reuse the command id.
+      await onMessage({id: 1, method: 'session.status', params: {}});
+      await wait(1);
+      expect(sentMessages()).to.deep.equal(['response 1']);
+
+      resolveEvent(event);
+      cdpResponse.resolve({});
+      await wait(1);
+      expect(sentMessages()).to.deep.equal(['response 1']);
+    });
+  });
+});
+
+function wait(timeout: number): Promise<void> {
+  return new Promise((resolve) => {
+    setTimeout(resolve, timeout);
+  });
+}
@@ -16,13 +16,13 @@
  */
 
 import {BidiParser, CommandProcessor} from './CommandProcessor.js';
+import type {CommonDataTypes, Message} from '../protocol/protocol.js';
+import {LogType, LoggerFn} from '../utils/log.js';
 import {BidiTransport} from './BidiTransport.js';
 import {BrowsingContextStorage} from './domains/context/browsingContextStorage.js';
 import {CdpConnection} from './CdpConnection.js';
 import {EventEmitter} from '../utils/EventEmitter.js';
 import {EventManager} from './domains/events/EventManager.js';
-import {LoggerFn} from '../utils/log.js';
-import type {Message} from '../protocol/protocol.js';
 import {OutgoingBidiMessage} from './OutgoingBidiMessage.js';
 import {ProcessingQueue} from '../utils/processingQueue.js';
 import {RealmStorage} from './domains/script/realmStorage.js';
@@ -31,6 +31,33 @@ type BidiServerEvents = {
   message: Message.RawCommandRequest;
 };
 
+export type BidiServerOptions = {
+  /**
+   * If provided, only the targets of this CDP browser context are exposed to
+   * the session, and new browsing contexts are created in it. Allows several
+   * sessions to share one browser.
+   */
+  browserContextId?: string;
+  /**
+   * If true, command responses are sent as soon as they are ready instead of
+   * in the order of the commands. Events are still sent in order per browsing
+   * context and channel, and events emitted while a command was processed are
+   * sent before its response.
+   */
+  outOfOrderResponses?: boolean;
+  /**
+   * Maximum number of events waiting to be sent. When it is reached, new
+   * events are dropped until the queued ones are sent. Command responses are
+   * never dropped. Unbounded if not set.
+   */
+  maxQueuedEvents?: number;
+};
+
+type PendingEvent = {
+  channel: string | null;
+  sent: Promise<void>;
+};
+
 export class BidiServer extends EventEmitter<BidiServerEvents> {
   #messageQueue: ProcessingQueue<OutgoingBidiMessage>;
   #transport: BidiTransport;
@@ -38,23 +65,40 @@ export class BidiServer extends EventEmitter<BidiServerEvents> {
   #browsingContextStorage: BrowsingContextStorage;
   #realmStorage: RealmStorage;
   #logger?: LoggerFn;
+  readonly #outOfOrderResponses: boolean;
+  readonly #maxQueuedEvents: number;
+  #droppedEventCount = 0;
+  /** Incremented on reset. Messages of the previous sessions are dropped. */
+  #session = 0;
+  /**
+   * Used only if `outOfOrderResponses` is set. Maps browsing context ->
+   * channel to the promise of the last event queued for them.
+   */
+  #lastEventSent = new Map<
+    CommonDataTypes.BrowsingContext | null,
+    Map<string | null, Promise<void>>
+  >();
+  /** Events not sent yet, by their sequence number. */
+  #pendingEvents = new Map<number, PendingEvent>();
+  #lastEventNumber = 0;
+  /** Maps command id to the last event number when the command was received. */
+  #commandStartEventNumbers = new Map<number, number>();
 
   private constructor(
     bidiTransport: BidiTransport,
     cdpConnection: CdpConnection,
     selfTargetId: string,
     parser?: BidiParser,
-    logger?: LoggerFn
+    logger?: LoggerFn,
+    options: BidiServerOptions = {}
   ) {
     super();
     this.#logger = logger;
+    this.#outOfOrderResponses = options.outOfOrderResponses ?? false;
+    this.#maxQueuedEvents = options.maxQueuedEvents ?? Infinity;
     this.#browsingContextStorage = new BrowsingContextStorage();
     this.#realmStorage = new RealmStorage();
-    this.#messageQueue = new ProcessingQueue<OutgoingBidiMessage>(
-      this.#processOutgoingMessage,
-      undefined,
-      this.#logger
-    );
+    this.#messageQueue = this.#createMessageQueue();
     this.#transport = bidiTransport;
     this.#transport.setOnMessage(this.#handleIncomingMessage);
     this.#commandProcessor = new CommandProcessor(
@@ -64,7 +108,8 @@ export class BidiServer extends EventEmitter<BidiServerEvents> {
       selfTargetId,
       parser,
       this.#browsingContextStorage,
-      this.#logger
+      this.#logger,
+      options.browserContextId
     );
     this.#commandProcessor.on(
       'response',
@@ -79,14 +124,16 @@ export class BidiServer extends EventEmitter<BidiServerEvents> {
     cdpConnection: CdpConnection,
     selfTargetId: string,
     parser?: BidiParser,
-    logger?: LoggerFn
+    logger?: LoggerFn,
+    options?: BidiServerOptions
   ): Promise<BidiServer> {
     const server = new BidiServer(
       bidiTransport,
       cdpConnection,
       selfTargetId,
       parser,
-      logger
+      logger,
+      options
     );
     const cdpClient = cdpConnection.browserClient();
 
@@ -112,7 +159,24 @@ export class BidiServer extends EventEmitter<BidiServerEvents> {
     );
   }
 
-  #processOutgoingMessage = async (messageEntry: OutgoingBidiMessage) => {
+  #createMessageQueue(): ProcessingQueue<OutgoingBidiMessage> {
+    const session = this.#session;
+    return new ProcessingQueue<OutgoingBidiMessage>(
+      (messageEntry) => this.#processOutgoingMessage(messageEntry, session),
+      undefined,
+      this.#logger,
+      {maxSize: this.#maxQueuedEvents, overflowPolicy: 'reject'}
+    );
+  }
+
+  #processOutgoingMessage = async (
+    messageEntry: OutgoingBidiMessage,
+    session: number
+  ) => {
+    if (session !== this.#session) {
+      // The client of that session is gone.
+      return;
+    }
     const message = messageEntry.message as any;
 
     if (messageEntry.channel !== null) {
@@ -126,15 +190,152 @@ export class BidiServer extends EventEmitter<BidiServerEvents> {
    * Sends BiDi message.
    */
   emitOutgoingMessage(messageEntry: Promise<OutgoingBidiMessage>): void {
-    this.#messageQueue.add(messageEntry);
+    if (!this.#outOfOrderResponses) {
+      // Responses are bounded by the number of the client's commands.
+      this.#messageQueue.add(messageEntry, {bounded: false});
+      return;
+    }
+
+    const session = this.#session;
+    messageEntry
+      .then(async (outgoingMessage) => {
+        if (session !== this.#session) {
+          return;
+        }
+        // Events emitted while the command was processed can be caused by it,
+        // and should be sent before the response.
+        const commandId = (outgoingMessage.message as {id?: number}).id;
+        const startEventNumber =
+          commandId === undefined
+            ? undefined
+            : this.#commandStartEventNumbers.get(commandId);
+        if (commandId !== undefined) {
+          this.#commandStartEventNumbers.delete(commandId);
+        }
+        await this.#eventsSent(outgoingMessage.channel, startEventNumber ?? 0);
+        await this.#processOutgoingMessage(outgoingMessage, session);
+      })
+      .catch((e) => {
+        this.#logger?.(LogType.system, 'Response was not sent:', e);
+      });
+  }
+
+  /**
+   * Sends BiDi event. Events of the same browsing context and channel are sent
+   * in the order they are emitted.
+   */
+  emitOutgoingEvent(
+    messageEntry: Promise<OutgoingBidiMessage>,
+    contextId: CommonDataTypes.BrowsingContext | null,
+    channel: string | null
+  ): void {
+    if (!this.#outOfOrderResponses) {
+      this.#messageQueue
+        .add(messageEntry)
+        .catch(() => this.#onEventDropped(this.#messageQueue.depth));
+      return;
+    }
+    if (this.#pendingEvents.size >= this.#maxQueuedEvents) {
+      // The dropped event is not awaited.
+      messageEntry.catch(() => {});
+      this.#onEventDropped(this.#pendingEvents.size);
+      return;
+    }
+
+    const session = this.#session;
+    let channelToLastEventSent = this.#lastEventSent.get(contextId);
+    if (channelToLastEventSent === undefined) {
+      channelToLastEventSent = new Map();
+      this.#lastEventSent.set(contextId, channelToLastEventSent);
+    }
+    const sent = (channelToLastEventSent.get(channel) ?? Promise.resolve())
+      .then(() => messageEntry)
+      .then((outgoingMessage) =>
+        this.#processOutgoingMessage(outgoingMessage, session)
+      )
+      .catch((e) => {
+        this.#logger?.(LogType.system, 'Event was not sent:', e);
+      });
+    const eventNumber = ++this.#lastEventNumber;
+    channelToLastEventSent.set(channel, sent);
+    this.#pendingEvents.set(eventNumber, {channel, sent});
+
+    sent.then(() => {
+      this.#pendingEvents.delete(eventNumber);
+      const lastEventSent = this.#lastEventSent.get(contextId);
+      if (lastEventSent?.get(channel) === sent) {
+        lastEventSent.delete(channel);
+        if (lastEventSent.size === 0) {
+          this.#lastEventSent.delete(contextId);
+        }
+      }
+    });
+  }
+
+  #onEventDropped(queuedCount: number) {
+    // Log the first dropped event of each 1000, so that it does not flood the
+    // log.
+    if (this.#droppedEventCount++ % 1000 === 0) {
+      this.#logger?.(
+        LogType.system,
+        `Event dropped: ${queuedCount} messages are waiting to be sent. ` +
+          `${this.#droppedEventCount} events dropped so far.`
+      );
+    }
+  }
+
+  /**
+   * Resolves when all the events to the channel emitted after the given event
+   * number and before now are sent.
+   */
+  async #eventsSent(channel: string | null, afterEventNumber: number) {
+    const pending: Promise<void>[] = [];
+    for (const [eventNumber, event] of this.#pendingEvents) {
+      if (eventNumber > afterEventNumber && event.channel === channel) {
+        pending.push(event.sent);
+      }
+    }
+    await Promise.all(pending);
   }
 
   close(): void {
     this.#transport.close();
   }
 
+  /**
+   * Resets the session state, so that the same browser and mapper can be
+   * reused by a new client.
+   */
+  async reset(): Promise<void> {
+    // Drop the messages of the previous session which are not sent yet.
+    this.#session++;
+    this.#messageQueue = this.#createMessageQueue();
+    this.#lastEventSent.clear();
+    this.#pendingEvents.clear();
+    this.#commandStartEventNumbers.clear();
+    await this.#commandProcessor.reset();
+  }
+
   #handleIncomingMessage = async (message: Message.RawCommandRequest) => {
-    this.#commandProcessor.processCommand(message);
+    if (
+      !this.#outOfOrderResponses ||
+      this.#commandStartEventNumbers.has(message.id)
+    ) {
+      this.#commandProcessor.processCommand(message);
+      return;
+    }
+    const session = this.#session;
+    this.#commandStartEventNumbers.set(message.id, this.#lastEventNumber);
+    // The response normally takes the entry. Drop it anyway in case the
+    // response does not have the command id.
+    this.#commandProcessor
+      .processCommand(message)
+      .finally(() => {
+        // After a reset, the id can belong to a command of the new session.
+        if (session === this.#session) {
+          this.#commandStartEventNumbers.delete(message.id);
+        }
+      });
   };
 
   getBrowsingContextStorage(): BrowsingContextStorage {
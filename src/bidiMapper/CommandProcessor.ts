@@ -89,6 +89,8 @@ export class CommandProcessor extends EventEmitter<CommandProcessorEvents> {
   #contextProcessor: BrowsingContextProcessor;
   #eventManager: IEventManager;
   #parser: BidiParser;
+  /** Incremented on reset. Responses of the previous sessions are dropped. */
+  #session = 0;
 
   constructor(
     realmStorage: RealmStorage,
@@ -97,7 +99,8 @@ export class CommandProcessor extends EventEmitter<CommandProcessorEvents> {
     selfTargetId: string,
     parser: BidiParser = new BidiNoOpParser(),
     browsingContextStorage: BrowsingContextStorage,
-    logger?: LoggerFn
+    logger?: LoggerFn,
+    browserContextId?: string
   ) {
     super();
     this.#eventManager = eventManager;
@@ -107,7 +110,8 @@ export class CommandProcessor extends EventEmitter<CommandProcessorEvents> {
       selfTargetId,
       eventManager,
       browsingContextStorage,
-      logger
+      logger,
+      browserContextId
     );
     this.#parser = parser;
   }
@@ -208,9 +212,23 @@ export class CommandProcessor extends EventEmitter<CommandProcessorEvents> {
     }
   }
 
+  /**
+   * Drops all the session state: subscriptions, buffered events, extra
+   * browsing contexts and handles.
+   */
+  async reset(): Promise<void> {
+    this.#session++;
+    // Unsubscribe first, so that no events are emitted during the reset.
+    this.#eventManager.reset();
+    await this.#contextProcessor.reset();
+    // Drop events buffered during the reset.
+    this.#eventManager.reset();
+  }
+
   processCommand = async (
     command: Message.RawCommandRequest
   ): Promise<void> => {
+    const session = this.#session;
     try {
       const result = await this.#processCommand(command);
 
@@ -219,15 +237,15 @@ export class CommandProcessor extends EventEmitter<CommandProcessorEvents> {
         ...result,
       };
 
-      this.emit(
-        'response',
+      this.#emitResponse(
+        session,
         OutgoingBidiMessage.createResolved(response, command.channel ?? null)
       );
     } catch (e) {
       if (e instanceof Message.ErrorResponseClass) {
         const errorResponse = e as Message.ErrorResponseClass;
-        this.emit(
-          'response',
+        this.#emitResponse(
+          session,
           OutgoingBidiMessage.createResolved(
             errorResponse.toErrorResponse(command.id),
             command.channel ?? null
@@ -236,8 +254,8 @@ export class CommandProcessor extends EventEmitter<CommandProcessorEvents> {
       } else {
         const error = e as Error;
         console.error(error);
-        this.emit(
-          'response',
+        this.#emitResponse(
+          session,
           OutgoingBidiMessage.createResolved(
             new Message.UnknownException(error.message).toErrorResponse(
               command.id
@@ -248,4 +266,12 @@ export class CommandProcessor extends EventEmitter<CommandProcessorEvents> {
       }
     }
   };
+
+  #emitResponse(session: number, response: Promise<OutgoingBidiMessage>) {
+    // The client of a previous session is gone, and the new one does not know
+    // the command.
+    if (session === this.#session) {
+      this.emit('response', response);
+    }
+  }
 }
@@ -217,18 +217,21 @@ export class BrowsingContextImpl {
       this.#cdpSessionId,
       this.#eventManager
     );
-    await this.#cdpClient.sendCommand('Runtime.enable');
-    await this.#cdpClient.sendCommand('Page.enable');
-    await this.#cdpClient.sendCommand('Page.setLifecycleEventsEnabled', {
-      enabled: true,
-    });
-    await this.#cdpClient.sendCommand('Target.setAutoAttach', {
-      autoAttach: true,
-      waitForDebuggerOnStart: true,
-      flatten: true,
-    });
-
-    await this.#cdpClient.sendCommand('Runtime.runIfWaitingForDebugger');
+    // CDP handles the commands of a session in order, so they are sent at once
+    // and the target is still resumed only after it is set up.
+    await Promise.all([
+      this.#cdpClient.sendCommand('Runtime.enable'),
+      this.#cdpClient.sendCommand('Page.enable'),
+      this.#cdpClient.sendCommand('Page.setLifecycleEventsEnabled', {
+        enabled: true,
+      }),
+      this.#cdpClient.sendCommand('Target.setAutoAttach', {
+        autoAttach: true,
+        waitForDebuggerOnStart: true,
+        flatten: true,
+      }),
+      this.#cdpClient.sendCommand('Runtime.runIfWaitingForDebugger'),
+    ]);
     this.#targetDefers.targetUnblocked.resolve();
   }
 
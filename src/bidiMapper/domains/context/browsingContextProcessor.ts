@@ -24,11 +24,15 @@ import {CdpClient, CdpConnection} from '../../CdpConnection.js';
 import {LogType, LoggerFn} from '../../../utils/log.js';
 import {BrowsingContextImpl} from './browsingContextImpl.js';
 import {BrowsingContextStorage} from './browsingContextStorage.js';
+import {Histogram} from '../../../utils/histogram.js';
 import {IEventManager} from '../events/EventManager.js';
 import Protocol from 'devtools-protocol';
 import {Realm} from '../script/realm.js';
 import {RealmStorage} from '../script/realmStorage.js';
 
+/** Live object ids are logged once per this number of script commands. */
+const LIVE_OBJECT_IDS_LOG_INTERVAL = 100;
+
 export class BrowsingContextProcessor {
   readonly #browsingContextStorage: BrowsingContextStorage;
   readonly #cdpConnection: CdpConnection;
@@ -37,6 +41,16 @@ export class BrowsingContextProcessor {
   readonly #realmStorage: RealmStorage;
   readonly #selfTargetId: string;
   readonly #sessions: Set<string>;
+  /**
+   * If set, the session is isolated in this CDP browser context, and targets
+   * of other browser contexts are ignored.
+   */
+  readonly #browserContextId?: string;
+  /** Milliseconds from a target attached until it is unblocked. */
+  readonly #targetUnblockLatency = new Histogram([
+    10, 20, 50, 100, 200, 500, 1000,
+  ]);
+  #scriptCommandCount = 0;
 
   constructor(
     realmStorage: RealmStorage,
@@ -44,7 +58,8 @@ export class BrowsingContextProcessor {
     selfTargetId: string,
     eventManager: IEventManager,
     browsingContextStorage: BrowsingContextStorage,
-    logger?: LoggerFn
+    logger?: LoggerFn,
+    browserContextId?: string
   ) {
     this.#browsingContextStorage = browsingContextStorage;
     this.#cdpConnection = cdpConnection;
@@ -53,6 +68,7 @@ export class BrowsingContextProcessor {
     this.#realmStorage = realmStorage;
     this.#selfTargetId = selfTargetId;
     this.#sessions = new Set();
+    this.#browserContextId = browserContextId;
 
     this.#setBrowserClientEventListeners(this.#cdpConnection.browserClient());
   }
@@ -81,6 +97,15 @@ export class BrowsingContextProcessor {
     this.#setTargetEventListeners(sessionCdpClient);
 
     sessionCdpClient.on('*', async (method, params) => {
+      if (
+        !this.#eventManager.hasSubscribersOrBuffer(
+          CDP.EventNames.EventReceivedEvent,
+          null
+        )
+      ) {
+        // Nobody would receive the event. Do not build it.
+        return;
+      }
       await this.#eventManager.registerEvent(
         {
           method: CDP.EventNames.EventReceivedEvent,
@@ -118,6 +143,16 @@ export class BrowsingContextProcessor {
 
     const targetSessionCdpClient = this.#cdpConnection.getCdpClient(sessionId);
 
+    if (!this.#isOwnTarget(targetInfo)) {
+      // Belongs to another session sharing the browser, which resumes it once
+      // it is set up. Detaching does not resume the target.
+      await parentSessionCdpClient.sendCommand(
+        'Target.detachFromTarget',
+        params
+      );
+      return;
+    }
+
     if (!this.#isValidTarget(targetInfo)) {
       // DevTools or some other not supported by BiDi target.
       await targetSessionCdpClient.sendCommand(
@@ -138,6 +173,7 @@ export class BrowsingContextProcessor {
 
     this.#setSessionEventListeners(sessionId);
 
+    const attachedTime = performance.now();
     if (this.#browsingContextStorage.hasKnownContext(targetInfo.targetId)) {
       // OOPiF.
       this.#browsingContextStorage
@@ -155,6 +191,23 @@ export class BrowsingContextProcessor {
         this.#browsingContextStorage
       );
     }
+
+    this.#browsingContextStorage
+      .getKnownContext(targetInfo.targetId)
+      .awaitUnblocked()
+      .then(
+        () => {
+          this.#targetUnblockLatency.record(performance.now() - attachedTime);
+          this.#logger?.(
+            LogType.browsingContexts,
+            `Target unblocked, latency histogram (ms): ${
+              this.#targetUnblockLatency
+            }`
+          );
+        },
+        // Superseded by another session, e.g. OOPiF.
+        () => {}
+      );
   }
 
   // { "method": "Target.detachedFromTarget",
@@ -204,12 +257,12 @@ export class BrowsingContextProcessor {
       }
     }
 
+    const browserContextId =
+      referenceContext?.cdpBrowserContextId ?? this.#browserContextId;
     const result = await browserCdpClient.sendCommand('Target.createTarget', {
       url: 'about:blank',
       newWindow: params.type === 'window',
-      ...(referenceContext?.cdpBrowserContextId
-        ? {browserContextId: referenceContext.cdpBrowserContextId}
-        : {}),
+      ...(browserContextId ? {browserContextId} : {}),
     });
 
     // Wait for the new tab to be loaded to avoid race conditions in the
@@ -255,12 +308,16 @@ export class BrowsingContextProcessor {
     params: Script.EvaluateParameters
   ): Promise<Script.EvaluateResult> {
     const realm = await this.#getRealm(params.target);
-    return await realm.scriptEvaluate(
-      params.expression,
-      params.awaitPromise,
-      params.resultOwnership ?? 'none',
-      this.#browsingContextStorage
-    );
+    try {
+      return await realm.scriptEvaluate(
+        params.expression,
+        params.awaitPromise,
+        params.resultOwnership ?? 'none',
+        this.#browsingContextStorage
+      );
+    } finally {
+      this.#logLiveObjectIds(realm);
+    }
   }
 
   process_script_getRealms(
@@ -283,16 +340,20 @@ export class BrowsingContextProcessor {
     params: Script.CallFunctionParameters
   ): Promise<Script.CallFunctionResult> {
     const realm = await this.#getRealm(params.target);
-    return await realm.callFunction(
-      params.functionDeclaration,
-      params.this || {
-        type: 'undefined',
-      }, // `this` is `undefined` by default.
-      params.arguments || [], // `arguments` is `[]` by default.
-      params.awaitPromise,
-      params.resultOwnership ?? 'none',
-      this.#browsingContextStorage
-    );
+    try {
+      return await realm.callFunction(
+        params.functionDeclaration,
+        params.this || {
+          type: 'undefined',
+        }, // `this` is `undefined` by default.
+        params.arguments || [], // `arguments` is `[]` by default.
+        params.awaitPromise,
+        params.resultOwnership ?? 'none',
+        this.#browsingContextStorage
+      );
+    } finally {
+      this.#logLiveObjectIds(realm);
+    }
   }
 
   async process_script_disown(
@@ -300,9 +361,28 @@ export class BrowsingContextProcessor {
   ): Promise<Script.DisownResult> {
     const realm = await this.#getRealm(params.target);
     await Promise.all(params.handles.map(async (h) => await realm.disown(h)));
+    this.#logLiveObjectIds(realm);
     return {result: {}};
   }
 
+  /**
+   * Makes remote object leaks visible in the logs. Only every
+   * `LIVE_OBJECT_IDS_LOG_INTERVAL`-th script command is logged.
+   */
+  #logLiveObjectIds(realm: Realm) {
+    if (
+      this.#logger === undefined ||
+      ++this.#scriptCommandCount % LIVE_OBJECT_IDS_LOG_INTERVAL !== 0
+    ) {
+      return;
+    }
+    this.#logger(
+      LogType.system,
+      `Live object ids in realm ${realm.realmId}:`,
+      realm.liveObjectIdCount
+    );
+  }
+
   async process_browsingContext_close(
     commandParams: BrowsingContext.CloseParameters
   ): Promise<BrowsingContext.CloseResult> {
@@ -343,6 +423,49 @@ export class BrowsingContextProcessor {
     return {result: {}};
   }
 
+  /**
+   * Brings the browser to its initial state, so that it can be reused by
+   * another session: closes all the top-level contexts but one, navigates the
+   * remaining one to `about:blank` and releases all the handles. Opens a new
+   * tab if no top-level context is left.
+   */
+  async reset(): Promise<void> {
+    const [defaultContext, ...extraContexts] =
+      this.#browsingContextStorage.getTopLevelContexts();
+
+    await Promise.all(
+      extraContexts.map((context) =>
+        this.process_browsingContext_close({context: context.contextId})
+      )
+    );
+
+    if (defaultContext === undefined) {
+      await this.process_browsingContext_create({type: 'tab'});
+    } else {
+      await defaultContext.navigate('about:blank', 'complete');
+    }
+
+    // Realms are destroyed by the navigation together with their handles.
+    // Release the handles of any realm which is still alive.
+    await Promise.all(
+      Array.from(this.#realmStorage.knownHandlesToRealm.entries()).map(
+        ([handle, realmId]) =>
+          this.#realmStorage.findRealm({realmId})?.disown(handle)
+      )
+    );
+  }
+
+  /**
+   * Returns `false` if the session is isolated in a browser context and the
+   * target belongs to another one.
+   */
+  #isOwnTarget(target: Protocol.Target.TargetInfo) {
+    return (
+      this.#browserContextId === undefined ||
+      target.browserContextId === this.#browserContextId
+    );
+  }
+
   #isValidTarget(target: Protocol.Target.TargetInfo) {
     if (target.targetId === this.#selfTargetId) {
       return false;
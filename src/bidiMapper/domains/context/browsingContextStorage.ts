@@ -20,6 +20,15 @@ import {Message} from '../../../protocol/protocol.js';
 
 export class BrowsingContextStorage {
   readonly #contexts = new Map<string, BrowsingContextImpl>();
+  #version = 0;
+
+  /**
+   * Incremented whenever a context is added or removed. Allows caching data
+   * derived from the context tree.
+   */
+  get version(): number {
+    return this.#version;
+  }
 
   getTopLevelContexts(): BrowsingContextImpl[] {
     return Array.from(this.#contexts.values()).filter(
@@ -29,10 +38,12 @@ export class BrowsingContextStorage {
 
   removeContext(contextId: string) {
     this.#contexts.delete(contextId);
+    this.#version++;
   }
 
   addContext(context: BrowsingContextImpl) {
     this.#contexts.set(context.contextId, context);
+    this.#version++;
     if (context.parentId !== null) {
       this.getKnownContext(context.parentId).addChild(context);
     }
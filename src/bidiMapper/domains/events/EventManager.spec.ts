@@ -0,0 +1,114 @@
+/**
+ * Copyright 2023 Google LLC.
+ * Copyright (c) Microsoft Corporation.
+ *
+ * Licensed under the Apache License, Version 2.0 (the "License");
+ * you may not use this file except in compliance with the License.
+ * You may obtain a copy of the License at
+ *
+ *     http://www.apache.org/licenses/LICENSE-2.0
+ *
+ * Unless required by applicable law or agreed to in writing, software
+ * distributed under the License is distributed on an "AS IS" BASIS,
+ * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ * See the License for the specific language governing permissions and
+ * limitations under the License.
+ */
+
+import * as chai from 'chai';
+import * as sinon from 'sinon';
+import {CDP, Log, Message} from '../../../protocol/protocol.js';
+import type {BidiServer} from '../../BidiServer.js';
+import {BrowsingContextStorage} from '../context/browsingContextStorage.js';
+import {EventManager} from './EventManager.js';
+
+const expect = chai.expect;
+const LOG_EVENT = Log.EventNames.LogEntryAddedEvent;
+const SOME_CONTEXT = 'SOME_CONTEXT';
+const SOME_CHANNEL = 'SOME_CHANNEL';
+
+describe('test EventManager', () => {
+  let emitOutgoingEvent: sinon.SinonSpy;
+  let eventManager: EventManager;
+
+  beforeEach(() => {
+    emitOutgoingEvent = sinon.spy();
+    eventManager = new EventManager({
+      getBrowsingContextStorage: () => new BrowsingContextStorage(),
+      emitOutgoingEvent,
+    } as unknown as BidiServer);
+  });
+
+  function createLogEvent(text: string): Message.EventMessage {
+    return {
+      method: LOG_EVENT,
+      params: {text},
+    } as unknown as Message.EventMessage;
+  }
+
+  it('should send buffered events on subscribe', async () => {
+    await eventManager.registerEvent(createLogEvent('1'), SOME_CONTEXT);
+    await eventManager.registerEvent(createLogEvent('2'), null);
+
+    await eventManager.subscribe([LOG_EVENT], [null], SOME_CHANNEL);
+
+    sinon.assert.calledTwice(emitOutgoingEvent);
+    expect(emitOutgoingEvent.getCalls().map((c) => c.args[1])).to.deep.equal([
+      SOME_CONTEXT,
+      null,
+    ]);
+  });
+
+  it('should not resend buffered events on re-subscribe', async () => {
+    await eventManager.subscribe([LOG_EVENT], [null], SOME_CHANNEL);
+    await eventManager.registerEvent(createLogEvent('1'), SOME_CONTEXT);
+    await eventManager.unsubscribe([LOG_EVENT], [null], SOME_CHANNEL);
+
+    await eventManager.subscribe([LOG_EVENT], [null], SOME_CHANNEL);
+
+    sinon.assert.calledOnce(emitOutgoingEvent);
+  });
+
+  it('should send buffered events to each channel once', async () => {
+    await eventManager.registerEvent(createLogEvent('1'), SOME_CONTEXT);
+
+    await eventManager.subscribe([LOG_EVENT], [null], SOME_CHANNEL);
+    await eventManager.subscribe([LOG_EVENT], [null], null);
+    await eventManager.subscribe([LOG_EVENT], [null], SOME_CHANNEL);
+
+    expect(emitOutgoingEvent.getCalls().map((c) => c.args[2])).to.deep.equal([
+      SOME_CHANNEL,
+      null,
+    ]);
+  });
+
+  it('should not create events nobody receives', async () => {
+    const createEvent = sinon.stub().resolves(createLogEvent('1'));
+    await eventManager.registerLazyEvent(
+      createEvent,
+      SOME_CONTEXT,
+      CDP.EventNames.EventReceivedEvent
+    );
+
+    sinon.assert.notCalled(createEvent);
+    sinon.assert.notCalled(emitOutgoingEvent);
+    expect(
+      eventManager.hasSubscribersOrBuffer(
+        CDP.EventNames.EventReceivedEvent,
+        SOME_CONTEXT
+      )
+    ).to.be.false;
+  });
+
+  it('should create buffered events at once', async () => {
+    const createEvent = sinon.stub().resolves(createLogEvent('1'));
+    await eventManager.registerLazyEvent(createEvent, SOME_CONTEXT, LOG_EVENT);
+    sinon.assert.calledOnce(createEvent);
+
+    await eventManager.subscribe([LOG_EVENT], [null], SOME_CHANNEL);
+    await eventManager.subscribe([LOG_EVENT], [null], null);
+
+    sinon.assert.calledOnce(createEvent);
+    sinon.assert.calledTwice(emitOutgoingEvent);
+  });
+});
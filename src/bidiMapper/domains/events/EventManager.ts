@@ -22,6 +22,7 @@ import type {
 } from '../../../protocol/protocol.js';
 import type {BidiServer} from '../../BidiServer.js';
 import {Buffer} from '../../../utils/buffer.js';
+import {DefaultMap} from '../../../utils/DefaultMap.js';
 import {IdWrapper} from '../../../utils/idWrapper.js';
 import {OutgoingBidiMessage} from '../../OutgoingBidiMessage.js';
 import {SubscriptionManager} from './SubscriptionManager.js';
@@ -60,6 +61,27 @@ export interface IEventManager {
     eventName: string
   ): Promise<void>;
 
+  /**
+   * Like `registerPromiseEvent`, but the event is created by `createEvent`
+   * only if it is sent or buffered. Events nobody is subscribed to and which
+   * are not buffered are never created. Buffered events are created at once,
+   * so that late subscribers get the state at the time of the event.
+   */
+  registerLazyEvent(
+    createEvent: () => Promise<Message.EventMessage>,
+    contextId: CommonDataTypes.BrowsingContext | null,
+    eventName: Session.SubscribeParametersEvent
+  ): Promise<void>;
+
+  /**
+   * Returns `false` if the event would be neither sent nor buffered, so that
+   * the producer can skip building it.
+   */
+  hasSubscribersOrBuffer(
+    eventName: Session.SubscribeParametersEvent,
+    contextId: CommonDataTypes.BrowsingContext | null
+  ): boolean;
+
   subscribe(
     events: Session.SubscribeParametersEvent[],
     contextIds: (CommonDataTypes.BrowsingContext | null)[],
@@ -71,6 +93,8 @@ export interface IEventManager {
     contextIds: (CommonDataTypes.BrowsingContext | null)[],
     channel: string | null
   ): Promise<void>;
+
+  reset(): void;
 }
 
 /**
@@ -82,25 +106,28 @@ const eventBufferLength: ReadonlyMap<string, number> = new Map([
 
 export class EventManager implements IEventManager {
   /**
-   * Maps event name to a set of contexts where this event already happened.
-   * Needed for getting buffered events from all the contexts in case of
-   * subscripting to all contexts.
+   * Maps `eventName` -> `browsingContext` to buffer. Used to get buffered
+   * events during subscription. Channel-agnostic. The keys of the inner map
+   * are the contexts where the event already happened, which is needed for
+   * getting buffered events from all the contexts in case of subscribing to
+   * all contexts.
    */
-  #eventToContextsMap: Map<
+  #eventBuffers = new DefaultMap<
     string,
-    Set<CommonDataTypes.BrowsingContext | null>
-  > = new Map();
-  /**
-   * Maps `eventName` + `browsingContext` to buffer. Used to get buffered events
-   * during subscription. Channel-agnostic.
-   */
-  #eventBuffers: Map<string, Buffer<EventWrapper>> = new Map();
+    Map<CommonDataTypes.BrowsingContext | null, Buffer<EventWrapper>>
+  >(() => new Map());
   /**
-   * Maps `eventName` + `browsingContext` + `channel` to last sent event id.
+   * Maps `eventName` -> `browsingContext` -> `channel` to last sent event id.
    * Used to avoid sending duplicated events when user
    * subscribes -> unsubscribes -> subscribes.
    */
-  #lastMessageSent: Map<string, number> = new Map();
+  #lastMessageSent = new DefaultMap<
+    string,
+    DefaultMap<
+      CommonDataTypes.BrowsingContext | null,
+      Map<string | null, number>
+    >
+  >(() => new DefaultMap(() => new Map()));
   #subscriptionManager: SubscriptionManager;
   #bidiServer: BidiServer;
 
@@ -111,17 +138,6 @@ export class EventManager implements IEventManager {
     );
   }
 
-  /**
-   * Returns consistent key to be used to access value maps.
-   */
-  #getMapKey(
-    eventName: string,
-    browsingContext: CommonDataTypes.BrowsingContext | null,
-    channel: string | null | undefined = undefined
-  ) {
-    return JSON.stringify({eventName, browsingContext, channel});
-  }
-
   async registerEvent(
     event: Message.EventMessage,
     contextId: CommonDataTypes.BrowsingContext | null
@@ -138,22 +154,49 @@ export class EventManager implements IEventManager {
     contextId: CommonDataTypes.BrowsingContext | null,
     eventName: Session.SubscribeParametersEvent
   ): Promise<void> {
-    const eventWrapper = new EventWrapper(event, contextId);
+    await this.registerLazyEvent(() => event, contextId, eventName);
+  }
+
+  async registerLazyEvent(
+    createEvent: () => Promise<Message.EventMessage>,
+    contextId: CommonDataTypes.BrowsingContext | null,
+    eventName: Session.SubscribeParametersEvent
+  ): Promise<void> {
     const sortedChannels =
       this.#subscriptionManager.getChannelsSubscribedToEvent(
         eventName,
         contextId
       );
+    if (sortedChannels.length === 0 && !eventBufferLength.has(eventName)) {
+      // Nobody would ever receive the event.
+      return;
+    }
+    const eventWrapper = new EventWrapper(createEvent(), contextId);
     this.#bufferEvent(eventWrapper, eventName);
     // Send events to channels in the subscription priority.
     for (const channel of sortedChannels) {
-      this.#bidiServer.emitOutgoingMessage(
-        OutgoingBidiMessage.createFromPromise(event, channel)
+      this.#bidiServer.emitOutgoingEvent(
+        OutgoingBidiMessage.createFromPromise(eventWrapper.event, channel),
+        contextId,
+        channel
       );
       this.#markEventSent(eventWrapper, channel, eventName);
     }
   }
 
+  hasSubscribersOrBuffer(
+    eventName: Session.SubscribeParametersEvent,
+    contextId: CommonDataTypes.BrowsingContext | null
+  ): boolean {
+    return (
+      eventBufferLength.has(eventName) ||
+      this.#subscriptionManager.getChannelsSubscribedToEvent(
+        eventName,
+        contextId
+      ).length > 0
+    );
+  }
+
   async subscribe(
     events: Session.SubscribeParametersEvent[],
     contextIds: (CommonDataTypes.BrowsingContext | null)[],
@@ -177,8 +220,10 @@ export class EventManager implements IEventManager {
           channel
         )) {
           // The order of the events is important.
-          this.#bidiServer.emitOutgoingMessage(
-            OutgoingBidiMessage.createFromPromise(eventWrapper.event, channel)
+          this.#bidiServer.emitOutgoingEvent(
+            OutgoingBidiMessage.createFromPromise(eventWrapper.event, channel),
+            eventWrapper.contextId,
+            channel
           );
           this.#markEventSent(eventWrapper, channel, eventName);
         }
@@ -198,6 +243,16 @@ export class EventManager implements IEventManager {
     }
   }
 
+  /**
+   * Drops all the subscriptions and buffered events, so that the next session
+   * starts from scratch.
+   */
+  reset(): void {
+    this.#subscriptionManager.unsubscribeAll();
+    this.#eventBuffers.clear();
+    this.#lastMessageSent.clear();
+  }
+
   /**
    * If the event is buffer-able, put it in the buffer.
    */
@@ -206,19 +261,13 @@ export class EventManager implements IEventManager {
       // Do nothing if the event is no buffer-able.
       return;
     }
-    const bufferMapKey = this.#getMapKey(eventName, eventWrapper.contextId);
-    if (!this.#eventBuffers.has(bufferMapKey)) {
-      this.#eventBuffers.set(
-        bufferMapKey,
-        new Buffer<EventWrapper>(eventBufferLength.get(eventName)!)
-      );
-    }
-    this.#eventBuffers.get(bufferMapKey)!.add(eventWrapper);
-    // Add the context to the list of contexts having `eventName` events.
-    if (!this.#eventToContextsMap.has(eventName)) {
-      this.#eventToContextsMap.set(eventName, new Set());
+    const contextToBuffer = this.#eventBuffers.get(eventName);
+    let buffer = contextToBuffer.get(eventWrapper.contextId);
+    if (buffer === undefined) {
+      buffer = new Buffer<EventWrapper>(eventBufferLength.get(eventName)!);
+      contextToBuffer.set(eventWrapper.contextId, buffer);
     }
-    this.#eventToContextsMap.get(eventName)!.add(eventWrapper.contextId);
+    buffer.add(eventWrapper);
   }
 
   /**
@@ -234,17 +283,30 @@ export class EventManager implements IEventManager {
       return;
     }
 
-    const lastSentMapKey = this.#getMapKey(
-      eventName,
-      eventWrapper.contextId,
-      channel
-    );
-    this.#lastMessageSent.set(
-      lastSentMapKey,
-      Math.max(this.#lastMessageSent.get(lastSentMapKey) ?? 0, eventWrapper.id)
+    const channelToLastSent = this.#lastMessageSent
+      .get(eventName)
+      .get(eventWrapper.contextId);
+    channelToLastSent.set(
+      channel,
+      Math.max(channelToLastSent.get(channel) ?? 0, eventWrapper.id)
     );
   }
 
+  #getLastSentMessageId(
+    eventName: string,
+    contextId: CommonDataTypes.BrowsingContext | null,
+    channel: string | null
+  ): number | undefined {
+    if (!this.#lastMessageSent.has(eventName)) {
+      return undefined;
+    }
+    const contextToLastSent = this.#lastMessageSent.get(eventName);
+    if (!contextToLastSent.has(contextId)) {
+      return undefined;
+    }
+    return contextToLastSent.get(contextId).get(channel);
+  }
+
   /**
    * Returns events which are buffered and not yet sent to the given channel events.
    */
@@ -253,20 +315,25 @@ export class EventManager implements IEventManager {
     contextId: CommonDataTypes.BrowsingContext | null,
     channel: string | null
   ): EventWrapper[] {
-    const bufferMapKey = this.#getMapKey(eventName, contextId);
-    const lastSentMapKey = this.#getMapKey(eventName, contextId, channel);
+    // Only read the maps, so that no entries are created for events which
+    // were never buffered.
+    if (!this.#eventBuffers.has(eventName)) {
+      return [];
+    }
+    const contextToBuffer = this.#eventBuffers.get(eventName);
     const lastSentMessageId =
-      this.#lastMessageSent.get(lastSentMapKey) ?? -Infinity;
+      this.#getLastSentMessageId(eventName, contextId, channel) ?? -Infinity;
 
-    const result: EventWrapper[] =
-      this.#eventBuffers
-        .get(bufferMapKey)
-        ?.get()
-        .filter((wrapper) => wrapper.id > lastSentMessageId) ?? [];
+    const buffer = contextToBuffer.get(contextId);
+    const result: EventWrapper[] = buffer
+      ? Array.from(
+          buffer.newerThan(lastSentMessageId, (wrapper) => wrapper.id)
+        )
+      : [];
 
     if (contextId === null) {
       // For global subscriptions, events buffered in each context should be sent back.
-      Array.from(this.#eventToContextsMap.get(eventName)?.keys() ?? [])
+      Array.from(contextToBuffer.keys())
         // Events without context are already in the result.
         .filter((_contextId) => _contextId !== null)
         .map((_contextId) =>
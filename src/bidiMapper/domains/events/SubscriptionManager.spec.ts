@@ -16,6 +16,7 @@
 
 import * as chai from 'chai';
 import {BrowsingContext} from '../../../protocol/protocol.js';
+import {BrowsingContextImpl} from '../context/browsingContextImpl.js';
 import {BrowsingContextStorage} from '../context/browsingContextStorage.js';
 import {SubscriptionManager} from './SubscriptionManager.js';
 
@@ -278,4 +279,148 @@ describe('test SubscriptionManager', () => {
       ).to.deep.equal([SOME_CHANNEL, ANOTHER_CHANNEL]);
     });
   });
+  describe('index', () => {
+    it('should be updated on subscribe and unsubscribe', () => {
+      const subscriptionManager = new SubscriptionManager(
+        new BrowsingContextStorage()
+      );
+      subscriptionManager.subscribe(SOME_EVENT, null, SOME_CHANNEL);
+      expect(
+        subscriptionManager.getChannelsSubscribedToEvent(
+          SOME_EVENT,
+          SOME_CONTEXT
+        )
+      ).to.deep.equal([SOME_CHANNEL]);
+
+      subscriptionManager.subscribe(SOME_EVENT, SOME_CONTEXT, ANOTHER_CHANNEL);
+      expect(
+        subscriptionManager.getChannelsSubscribedToEvent(
+          SOME_EVENT,
+          SOME_CONTEXT
+        )
+      ).to.deep.equal([SOME_CHANNEL, ANOTHER_CHANNEL]);
+
+      subscriptionManager.unsubscribe(SOME_EVENT, null, SOME_CHANNEL);
+      expect(
+        subscriptionManager.getChannelsSubscribedToEvent(
+          SOME_EVENT,
+          SOME_CONTEXT
+        )
+      ).to.deep.equal([ANOTHER_CHANNEL]);
+    });
+    it('should be updated when contexts are added', () => {
+      const browsingContextStorage = new BrowsingContextStorage();
+      const subscriptionManager = new SubscriptionManager(
+        browsingContextStorage
+      );
+      subscriptionManager.subscribe(SOME_EVENT, SOME_CONTEXT, SOME_CHANNEL);
+      expect(
+        subscriptionManager.getChannelsSubscribedToEvent(
+          SOME_EVENT,
+          ANOTHER_CONTEXT
+        )
+      ).to.deep.equal([]);
+
+      browsingContextStorage.addContext(createContext(SOME_CONTEXT, null));
+      browsingContextStorage.addContext(
+        createContext(ANOTHER_CONTEXT, SOME_CONTEXT)
+      );
+      expect(
+        subscriptionManager.getChannelsSubscribedToEvent(
+          SOME_EVENT,
+          ANOTHER_CONTEXT
+        )
+      ).to.deep.equal([SOME_CHANNEL]);
+    });
+    it('should be updated when contexts are removed', () => {
+      const browsingContextStorage = new BrowsingContextStorage();
+      const subscriptionManager = new SubscriptionManager(
+        browsingContextStorage
+      );
+      subscriptionManager.subscribe(SOME_EVENT, SOME_CONTEXT, SOME_CHANNEL);
+      browsingContextStorage.addContext(createContext(SOME_CONTEXT, null));
+      browsingContextStorage.addContext(
+        createContext(ANOTHER_CONTEXT, SOME_CONTEXT)
+      );
+      expect(
+        subscriptionManager.getChannelsSubscribedToEvent(
+          SOME_EVENT,
+          ANOTHER_CONTEXT
+        )
+      ).to.deep.equal([SOME_CHANNEL]);
+
+      browsingContextStorage.removeContext(ANOTHER_CONTEXT);
+      browsingContextStorage.removeContext(SOME_CONTEXT);
+      browsingContextStorage.addContext(createContext(ANOTHER_CONTEXT, null));
+      expect(
+        subscriptionManager.getChannelsSubscribedToEvent(
+          SOME_EVENT,
+          ANOTHER_CONTEXT
+        )
+      ).to.deep.equal([]);
+    });
+    it('should be updated on subscribe to parent context', () => {
+      const browsingContextStorage = new BrowsingContextStorage();
+      const subscriptionManager = new SubscriptionManager(
+        browsingContextStorage
+      );
+      browsingContextStorage.addContext(createContext(SOME_CONTEXT, null));
+      browsingContextStorage.addContext(
+        createContext(ANOTHER_CONTEXT, SOME_CONTEXT)
+      );
+      expect(
+        subscriptionManager.getChannelsSubscribedToEvent(
+          SOME_EVENT,
+          ANOTHER_CONTEXT
+        )
+      ).to.deep.equal([]);
+
+      subscriptionManager.subscribe(SOME_EVENT, SOME_CONTEXT, SOME_CHANNEL);
+      expect(
+        subscriptionManager.getChannelsSubscribedToEvent(
+          SOME_EVENT,
+          ANOTHER_CONTEXT
+        )
+      ).to.deep.equal([SOME_CHANNEL]);
+
+      subscriptionManager.unsubscribe(SOME_EVENT, SOME_CONTEXT, SOME_CHANNEL);
+      expect(
+        subscriptionManager.getChannelsSubscribedToEvent(
+          SOME_EVENT,
+          ANOTHER_CONTEXT
+        )
+      ).to.deep.equal([]);
+    });
+    it('should be updated on unsubscribe all', () => {
+      const subscriptionManager = new SubscriptionManager(
+        new BrowsingContextStorage()
+      );
+      subscriptionManager.subscribe(SOME_EVENT, null, SOME_CHANNEL);
+      expect(
+        subscriptionManager.getChannelsSubscribedToEvent(
+          SOME_EVENT,
+          SOME_CONTEXT
+        )
+      ).to.deep.equal([SOME_CHANNEL]);
+
+      subscriptionManager.unsubscribeAll();
+      expect(
+        subscriptionManager.getChannelsSubscribedToEvent(
+          SOME_EVENT,
+          SOME_CONTEXT
+        )
+      ).to.deep.equal([]);
+    });
+  });
 });
+
+function createContext(
+  contextId: string,
+  parentId: string | null
+): BrowsingContextImpl {
+  return {
+    contextId,
+    parentId,
+    addChild: () => {},
+  } as unknown as BrowsingContextImpl;
+}
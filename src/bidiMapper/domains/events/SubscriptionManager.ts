@@ -37,30 +37,73 @@ export class SubscriptionManager {
     >
   > = new Map();
   #browsingContextStorage: BrowsingContextStorage;
+  /**
+   * Maps event name and browsing context to the channels subscribed to the
+   * event in the context, sorted by priority. Cleared when subscriptions
+   * change or browsing contexts are added or removed.
+   */
+  #channelsIndex: Map<
+    Session.SubscribeParametersEvent,
+    Map<CommonDataTypes.BrowsingContext | null, readonly (string | null)[]>
+  > = new Map();
+  /** Version of the browsing context storage the index is built for. */
+  #indexedContextsVersion: number;
 
   constructor(browsingContextStorage: BrowsingContextStorage) {
     this.#browsingContextStorage = browsingContextStorage;
+    this.#indexedContextsVersion = browsingContextStorage.version;
   }
 
+  /**
+   * Returns the channels subscribed to the event in the given context, sorted
+   * by the subscription priority. The result is shared and must not be
+   * modified.
+   */
   getChannelsSubscribedToEvent(
     eventMethod: Session.SubscribeParametersEvent,
     contextId: CommonDataTypes.BrowsingContext | null
+  ): readonly (string | null)[] {
+    if (this.#indexedContextsVersion !== this.#browsingContextStorage.version) {
+      this.#invalidateIndex();
+    }
+
+    let contextToChannels = this.#channelsIndex.get(eventMethod);
+    if (contextToChannels === undefined) {
+      contextToChannels = new Map();
+      this.#channelsIndex.set(eventMethod, contextToChannels);
+    }
+    let channels = contextToChannels.get(contextId);
+    if (channels === undefined) {
+      channels = this.#computeChannelsSubscribedToEvent(eventMethod, contextId);
+      contextToChannels.set(contextId, channels);
+    }
+    return channels;
+  }
+
+  #invalidateIndex() {
+    this.#channelsIndex.clear();
+    this.#indexedContextsVersion = this.#browsingContextStorage.version;
+  }
+
+  #computeChannelsSubscribedToEvent(
+    eventMethod: Session.SubscribeParametersEvent,
+    contextId: CommonDataTypes.BrowsingContext | null
   ): (string | null)[] {
-    const prioritiesAndChannels = Array.from(
-      this.#channelToContextToEventMap.keys()
-    )
-      .map((channel) => ({
-        priority: this.#getEventSubscriptionPriorityForChannel(
-          eventMethod,
-          contextId,
-          channel
-        ),
-        channel,
-      }))
-      .filter(({priority}) => priority !== null) as {
+    const relevantContexts = this.#getRelevantContexts(contextId);
+    const prioritiesAndChannels: {
       priority: number;
       channel: string | null;
-    }[];
+    }[] = [];
+    for (const [channel, eventsByContext] of this.#channelToContextToEventMap) {
+      const priority = this.#getEventSubscriptionPriority(
+        eventMethod,
+        relevantContexts,
+        eventsByContext
+      );
+      if (priority !== null) {
+        prioritiesAndChannels.push({priority, channel});
+      }
+    }
 
     // Sort channels by priority.
     return prioritiesAndChannels
@@ -68,28 +111,23 @@ export class SubscriptionManager {
       .map(({channel}) => channel);
   }
 
-  #getEventSubscriptionPriorityForChannel(
+  #getEventSubscriptionPriority(
     eventMethod: Session.SubscribeParametersEvent,
-    contextId: CommonDataTypes.BrowsingContext | null,
-    channel: string | null
+    relevantContexts: (CommonDataTypes.BrowsingContext | null)[],
+    contextToEventMap: Map<
+      CommonDataTypes.BrowsingContext | null,
+      Map<Session.SubscribeParametersEvent, number>
+    >
   ): null | number {
-    const contextToEventMap = this.#channelToContextToEventMap.get(channel);
-    if (contextToEventMap === undefined) {
-      return null;
-    }
-
-    // Get all the subscription priorities.
-    const priorities: number[] = this.#getRelevantContexts(contextId)
-      .map((c) => contextToEventMap.get(c)?.get(eventMethod))
-      .filter((p) => p !== undefined) as number[];
-
-    if (priorities.length === 0) {
-      // Not subscribed, return null.
-      return null;
+    // Return minimal priority, or null if not subscribed.
+    let result: number | null = null;
+    for (const context of relevantContexts) {
+      const priority = contextToEventMap.get(context)?.get(eventMethod);
+      if (priority !== undefined && (result === null || priority < result)) {
+        result = priority;
+      }
     }
-
-    // Return minimal priority.
-    return Math.min(...priorities);
+    return result;
   }
 
   #getRelevantContexts(
@@ -146,6 +184,15 @@ export class SubscriptionManager {
     }
 
     eventMap.set(event, this.#subscriptionPriority++);
+    this.#invalidateIndex();
+  }
+
+  /**
+   * Removes all the subscriptions in all the channels.
+   */
+  unsubscribeAll(): void {
+    this.#channelToContextToEventMap.clear();
+    this.#invalidateIndex();
   }
 
   unsubscribe(
@@ -182,11 +229,14 @@ export class SubscriptionManager {
     }
     const eventMap = contextToEventMap.get(contextId)!;
 
-    eventMap.delete(event);
+    if (!eventMap.delete(event)) {
+      return;
+    }
+    this.#invalidateIndex();
 
     // Clean up maps if empty.
     if (eventMap.size === 0) {
-      contextToEventMap.delete(event);
+      contextToEventMap.delete(contextId);
     }
     if (contextToEventMap.size === 0) {
       this.#channelToContextToEventMap.delete(channel);
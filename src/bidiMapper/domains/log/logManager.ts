@@ -104,13 +104,11 @@ export class LogManager {
           realm === undefined
             ? Promise.resolve(params.args as CommonDataTypes.RemoteValue[])
             : // Properly serialize arguments if possible.
-              Promise.all(
-                params.args.map((arg) => {
-                  return realm.serializeCdpObject(arg, 'none');
-                })
-              );
+              realm.serializeCdpObjects(params.args, 'none');
 
         // No need in waiting for the result, just register the event promise.
+        // `log.entryAdded` is always buffered, so the arguments are always
+        // serialized, even if nobody is subscribed.
         // noinspection JSIgnoredPromiseFromCall
         this.#eventManager.registerPromiseEvent(
           argsPromise.then((args) => ({
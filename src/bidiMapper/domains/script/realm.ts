@@ -39,6 +39,21 @@ export class Realm {
   readonly #origin: string;
   readonly #type: RealmType;
   readonly #cdpClient: CdpClient;
+  /**
+   * Object ids of the DOM nodes resolved by `backendNodeId`, by the temporary
+   * object group of the command they were resolved for. Dropped together with
+   * the group, so that the cache does not grow during the page lifetime.
+   */
+  readonly #nodeObjectIds = new Map<
+    string,
+    Map<
+      Protocol.DOM.BackendNodeId,
+      Promise<Protocol.Runtime.RemoteObjectId | undefined>
+    >
+  >();
+  /** Number of live objects in each temporary object group. */
+  readonly #temporaryObjectCounts = new Map<string, number>();
+  #lastTemporaryObjectGroupId = 0;
 
   readonly sandbox?: string;
   readonly cdpSessionId: string;
@@ -66,7 +81,7 @@ export class Realm {
     this.#cdpClient = cdpClient;
     this.#realmStorage = realmStorage;
 
-    this.#realmStorage.realmMap.set(this.#realmId, this);
+    this.#realmStorage.addRealm(this);
   }
 
   async disown(handle: string): Promise<void> {
@@ -85,7 +100,95 @@ export class Realm {
         throw e;
       }
     }
-    this.#realmStorage.knownHandlesToRealm.delete(handle);
+    this.#realmStorage.deleteKnownHandle(handle);
+  }
+
+  /**
+   * Resolves a DOM node to an object in this realm for the command owning the
+   * temporary `objectGroup`. The object belongs to the group and is released
+   * together with it. Repeated and concurrent resolutions of the same node
+   * within the command share one `DOM.resolveNode` call.
+   */
+  resolveNode(
+    backendNodeId: Protocol.DOM.BackendNodeId,
+    objectGroup: string
+  ): Promise<Protocol.Runtime.RemoteObjectId | undefined> {
+    const nodeObjectIds =
+      this.#nodeObjectIds.get(objectGroup) ??
+      new Map<
+        Protocol.DOM.BackendNodeId,
+        Promise<Protocol.Runtime.RemoteObjectId | undefined>
+      >();
+    if (this.#temporaryObjectCounts.has(objectGroup)) {
+      // Not cached once the group is released.
+      this.#nodeObjectIds.set(objectGroup, nodeObjectIds);
+    }
+    let objectId = nodeObjectIds.get(backendNodeId);
+    if (objectId === undefined) {
+      objectId = this.cdpClient
+        .sendCommand('DOM.resolveNode', {
+          backendNodeId,
+          executionContextId: this.executionContextId,
+          objectGroup,
+        })
+        .then(({object}) => {
+          this.retainTemporaryObject(objectGroup);
+          return object.objectId;
+        });
+      nodeObjectIds.set(backendNodeId, objectId);
+      // Don't cache failures, e.g. for nodes not created yet.
+      objectId.catch(() => nodeObjectIds.delete(backendNodeId));
+    }
+    return objectId;
+  }
+
+  /**
+   * Creates a CDP object group for objects needed only during a command. The
+   * whole group is released at once with `releaseTemporaryObjectGroup`.
+   */
+  createTemporaryObjectGroup(): string {
+    const id = ++this.#lastTemporaryObjectGroupId;
+    const objectGroup = `${this.#realmId}_temporary_${id}`;
+    this.#temporaryObjectCounts.set(objectGroup, 0);
+    return objectGroup;
+  }
+
+  /** Accounts for an object created in the temporary `objectGroup`. */
+  retainTemporaryObject(objectGroup: string) {
+    const count = this.#temporaryObjectCounts.get(objectGroup);
+    if (count === undefined) {
+      // The group was released while the object was being created, e.g. as
+      // another argument failed.
+      // noinspection ES6MissingAwait
+      this.cdpClient.sendCommand('Runtime.releaseObjectGroup', {objectGroup});
+      return;
+    }
+    this.#temporaryObjectCounts.set(objectGroup, count + 1);
+  }
+
+  releaseTemporaryObjectGroup(objectGroup: string) {
+    const count = this.#temporaryObjectCounts.get(objectGroup);
+    this.#temporaryObjectCounts.delete(objectGroup);
+    this.#nodeObjectIds.delete(objectGroup);
+    if (count) {
+      // No need in waiting for the objects to be released.
+      // noinspection ES6MissingAwait
+      this.cdpClient.sendCommand('Runtime.releaseObjectGroup', {objectGroup});
+    }
+  }
+
+  /**
+   * Number of the remote objects the mapper keeps alive in this realm: the
+   * handles owned by the client, and the temporary objects of the running
+   * commands, including the resolved DOM nodes. Growing constantly indicates
+   * a leak.
+   */
+  get liveObjectIdCount(): number {
+    let count = this.#realmStorage.getKnownHandles(this.#realmId).size;
+    for (const temporaryObjectCount of this.#temporaryObjectCounts.values()) {
+      count += temporaryObjectCount;
+    }
+    return count;
   }
 
   async cdpToBidiValue(
@@ -104,7 +207,7 @@ export class Realm {
         // and  CDP response but not on the actual BiDi type.
         (bidiValue as any).handle = objectId;
         // Remember all the handles sent to client.
-        this.#realmStorage.knownHandlesToRealm.set(objectId, this.realmId);
+        this.#realmStorage.addKnownHandle(objectId, this.realmId);
       } else {
         // No need in waiting for the object to be released.
         // noinspection ES6MissingAwait
@@ -259,6 +362,23 @@ export class Realm {
     );
   }
 
+  /**
+   * Serializes a list of CDP objects into BiDi. Primitive values are converted
+   * without CDP round trips.
+   * @param cdpObjects CDP remote objects to be serialized.
+   * @param resultOwnership indicates desired OwnershipModel.
+   */
+  public async serializeCdpObjects(
+    cdpObjects: Protocol.Runtime.RemoteObject[],
+    resultOwnership: Script.OwnershipModel
+  ): Promise<CommonDataTypes.RemoteValue[]> {
+    return await scriptEvaluator.serializeCdpObjects(
+      cdpObjects,
+      resultOwnership,
+      this
+    );
+  }
+
   /**
    * Gets the string representation of an object. This is equivalent to
    * calling toString() on the object value.
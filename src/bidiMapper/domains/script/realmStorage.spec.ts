@@ -0,0 +1,185 @@
+/**
+ * Copyright 2023 Google LLC.
+ * Copyright (c) Microsoft Corporation.
+ *
+ * Licensed under the Apache License, Version 2.0 (the "License");
+ * you may not use this file except in compliance with the License.
+ * You may obtain a copy of the License at
+ *
+ *     http://www.apache.org/licenses/LICENSE-2.0
+ *
+ * Unless required by applicable law or agreed to in writing, software
+ * distributed under the License is distributed on an "AS IS" BASIS,
+ * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ * See the License for the specific language governing permissions and
+ * limitations under the License.
+ */
+
+import * as chai from 'chai';
+import {Realm} from './realm.js';
+import {RealmStorage} from './realmStorage.js';
+
+const expect = chai.expect;
+
+describe('test RealmStorage', () => {
+  let realmStorage: RealmStorage;
+
+  beforeEach(() => {
+    realmStorage = new RealmStorage();
+  });
+
+  function addRealm(
+    realmId: string,
+    browsingContextId: string,
+    executionContextId: number,
+    sandbox?: string
+  ): Realm {
+    const realm = {
+      realmId,
+      browsingContextId,
+      navigableId: `${browsingContextId}_NAVIGABLE`,
+      executionContextId,
+      origin: 'SOME_ORIGIN',
+      type: 'window',
+      sandbox,
+      cdpSessionId: `${browsingContextId}_SESSION`,
+    } as unknown as Realm;
+    realmStorage.addRealm(realm);
+    return realm;
+  }
+
+  it('should find realms by indexed fields', () => {
+    const realm1 = addRealm('REALM_1', 'CONTEXT_1', 1);
+    const realm2 = addRealm('REALM_2', 'CONTEXT_1', 2, 'SANDBOX');
+    const realm3 = addRealm('REALM_3', 'CONTEXT_2', 1, 'SANDBOX');
+
+    expect(realmStorage.findRealms({})).to.deep.equal([realm1, realm2, realm3]);
+    expect(realmStorage.findRealm({realmId: 'REALM_2'})).to.equal(realm2);
+    expect(
+      realmStorage.findRealm({
+        cdpSessionId: 'CONTEXT_2_SESSION',
+        executionContextId: 1,
+      })
+    ).to.equal(realm3);
+    expect(
+      realmStorage.findRealms({cdpSessionId: 'CONTEXT_1_SESSION'})
+    ).to.deep.equal([realm1, realm2]);
+    expect(
+      realmStorage.findRealms({browsingContextId: 'CONTEXT_1'})
+    ).to.deep.equal([realm1, realm2]);
+    expect(
+      realmStorage.findRealms({navigableId: 'CONTEXT_2_NAVIGABLE'})
+    ).to.deep.equal([realm3]);
+    expect(
+      realmStorage.findRealm({
+        browsingContextId: 'CONTEXT_1',
+        sandbox: 'SANDBOX',
+      })
+    ).to.equal(realm2);
+    expect(
+      realmStorage.findRealms({
+        browsingContextId: 'UNKNOWN',
+        sandbox: 'SANDBOX',
+      })
+    ).to.be.empty;
+  });
+
+  it('should apply non-indexed fields', () => {
+    const realm = addRealm('REALM_1', 'CONTEXT_1', 1);
+
+    expect(
+      realmStorage.findRealms({browsingContextId: 'CONTEXT_1', type: 'window'})
+    ).to.deep.equal([realm]);
+    expect(
+      realmStorage.findRealms({browsingContextId: 'CONTEXT_1', origin: 'OTHER'})
+    ).to.be.empty;
+  });
+
+  it('should remove deleted realms from indexes', () => {
+    addRealm('REALM_1', 'CONTEXT_1', 1, 'SANDBOX');
+    const realm2 = addRealm('REALM_2', 'CONTEXT_2', 1, 'SANDBOX');
+
+    realmStorage.deleteRealms({
+      cdpSessionId: 'CONTEXT_1_SESSION',
+      executionContextId: 1,
+    });
+
+    expect(realmStorage.findRealms({browsingContextId: 'CONTEXT_1'})).to.be
+      .empty;
+    expect(realmStorage.findRealms({sandbox: 'SANDBOX'})).to.deep.equal([
+      realm2,
+    ]);
+    expect(realmStorage.realmMap.size).to.equal(1);
+  });
+
+  it('should delete handles of deleted realms only', () => {
+    addRealm('REALM_1', 'CONTEXT_1', 1);
+    addRealm('REALM_2', 'CONTEXT_2', 1);
+    realmStorage.addKnownHandle('HANDLE_1', 'REALM_1');
+    realmStorage.addKnownHandle('HANDLE_2', 'REALM_2');
+    realmStorage.addKnownHandle('HANDLE_3', 'REALM_2');
+    realmStorage.deleteKnownHandle('HANDLE_3');
+
+    realmStorage.deleteRealms({realmId: 'REALM_1'});
+
+    expect(Array.from(realmStorage.knownHandlesToRealm)).to.deep.equal([
+      ['HANDLE_2', 'REALM_2'],
+    ]);
+    expect(realmStorage.getKnownHandles('REALM_1')).to.be.empty;
+    expect(Array.from(realmStorage.getKnownHandles('REALM_2'))).to.deep.equal([
+      'HANDLE_2',
+    ]);
+  });
+
+  it('should move known handles added to another realm', () => {
+    addRealm('REALM_1', 'CONTEXT_1', 1);
+    addRealm('REALM_2', 'CONTEXT_2', 1);
+    realmStorage.addKnownHandle('HANDLE', 'REALM_1');
+
+    realmStorage.addKnownHandle('HANDLE', 'REALM_2');
+
+    expect(realmStorage.knownHandlesToRealm.get('HANDLE')).to.equal('REALM_2');
+    expect(realmStorage.getKnownHandles('REALM_1')).to.be.empty;
+    expect(Array.from(realmStorage.getKnownHandles('REALM_2'))).to.deep.equal([
+      'HANDLE',
+    ]);
+  });
+
+  it('should delete known handles', () => {
+    addRealm('REALM_1', 'CONTEXT_1', 1);
+    realmStorage.addKnownHandle('HANDLE_1', 'REALM_1');
+    realmStorage.addKnownHandle('HANDLE_2', 'REALM_1');
+
+    realmStorage.deleteKnownHandle('HANDLE_1');
+    expect(Array.from(realmStorage.getKnownHandles('REALM_1'))).to.deep.equal([
+      'HANDLE_2',
+    ]);
+
+    realmStorage.deleteKnownHandle('HANDLE_2');
+    // Unknown handles are ignored.
+    realmStorage.deleteKnownHandle('HANDLE_2');
+    expect(realmStorage.getKnownHandles('REALM_1')).to.be.empty;
+    expect(realmStorage.knownHandlesToRealm.size).to.equal(0);
+  });
+
+  it('should delete handles of all the deleted realms', () => {
+    addRealm('REALM_1', 'CONTEXT_1', 1);
+    addRealm('REALM_2', 'CONTEXT_1', 2, 'SANDBOX');
+    addRealm('REALM_3', 'CONTEXT_2', 1);
+    realmStorage.addKnownHandle('HANDLE_1', 'REALM_1');
+    realmStorage.addKnownHandle('HANDLE_2', 'REALM_2');
+    realmStorage.addKnownHandle('HANDLE_3', 'REALM_3');
+
+    realmStorage.deleteRealms({browsingContextId: 'CONTEXT_1'});
+
+    expect(Array.from(realmStorage.knownHandlesToRealm)).to.deep.equal([
+      ['HANDLE_3', 'REALM_3'],
+    ]);
+
+    // A new realm with the same id does not get the handles of the old one.
+    addRealm('REALM_1', 'CONTEXT_1', 1);
+    expect(realmStorage.getKnownHandles('REALM_1')).to.be.empty;
+    realmStorage.deleteKnownHandle('HANDLE_1');
+    expect(realmStorage.knownHandlesToRealm.size).to.equal(1);
+  });
+});
@@ -29,21 +29,193 @@ type RealmFilter = {
   cdpSessionId?: string;
 };
 
+function addToIndex<K>(index: Map<K, Set<Realm>>, key: K, realm: Realm) {
+  let realms = index.get(key);
+  if (realms === undefined) {
+    realms = new Set();
+    index.set(key, realms);
+  }
+  realms.add(realm);
+}
+
+function removeFromIndex<K>(
+  index: Map<K, Set<Realm>>,
+  key: K,
+  realm: Realm
+) {
+  const realms = index.get(key);
+  if (realms === undefined) {
+    return;
+  }
+  realms.delete(realm);
+  if (realms.size === 0) {
+    index.delete(key);
+  }
+}
+
 export class RealmStorage {
   /** Tracks handles and their realms sent to the client. */
   readonly #knownHandlesToRealm = new Map<string, string>();
+  /** Reverse index of `#knownHandlesToRealm`. */
+  readonly #realmToKnownHandles = new Map<string, Set<string>>();
   readonly #realmMap: Map<string, Realm> = new Map();
 
-  get knownHandlesToRealm() {
+  // Secondary indexes, which narrow down the realms to filter.
+  readonly #realmsByExecutionContext = new Map<
+    string,
+    Map<Protocol.Runtime.ExecutionContextId, Set<Realm>>
+  >();
+  readonly #realmsByBrowsingContextId = new Map<string, Set<Realm>>();
+  readonly #realmsByNavigableId = new Map<string, Set<Realm>>();
+  readonly #realmsBySandbox = new Map<string, Set<Realm>>();
+
+  get knownHandlesToRealm(): ReadonlyMap<string, string> {
     return this.#knownHandlesToRealm;
   }
 
-  get realmMap() {
+  addKnownHandle(handle: string, realmId: string) {
+    this.deleteKnownHandle(handle);
+    this.#knownHandlesToRealm.set(handle, realmId);
+    let handles = this.#realmToKnownHandles.get(realmId);
+    if (handles === undefined) {
+      handles = new Set();
+      this.#realmToKnownHandles.set(realmId, handles);
+    }
+    handles.add(handle);
+  }
+
+  deleteKnownHandle(handle: string) {
+    const realmId = this.#knownHandlesToRealm.get(handle);
+    if (realmId === undefined) {
+      return;
+    }
+    this.#knownHandlesToRealm.delete(handle);
+    const handles = this.#realmToKnownHandles.get(realmId);
+    handles?.delete(handle);
+    if (handles?.size === 0) {
+      this.#realmToKnownHandles.delete(realmId);
+    }
+  }
+
+  /** Returns the handles of the realm sent to the client. */
+  getKnownHandles(realmId: string): ReadonlySet<string> {
+    return this.#realmToKnownHandles.get(realmId) ?? new Set();
+  }
+
+  get realmMap(): ReadonlyMap<string, Realm> {
     return this.#realmMap;
   }
 
+  addRealm(realm: Realm) {
+    this.#realmMap.set(realm.realmId, realm);
+
+    let realmsByExecutionContextId = this.#realmsByExecutionContext.get(
+      realm.cdpSessionId
+    );
+    if (realmsByExecutionContextId === undefined) {
+      realmsByExecutionContextId = new Map();
+      this.#realmsByExecutionContext.set(
+        realm.cdpSessionId,
+        realmsByExecutionContextId
+      );
+    }
+    addToIndex(realmsByExecutionContextId, realm.executionContextId, realm);
+    addToIndex(
+      this.#realmsByBrowsingContextId,
+      realm.browsingContextId,
+      realm
+    );
+    addToIndex(this.#realmsByNavigableId, realm.navigableId, realm);
+    if (realm.sandbox !== undefined) {
+      addToIndex(this.#realmsBySandbox, realm.sandbox, realm);
+    }
+  }
+
+  #removeRealm(realm: Realm) {
+    this.#realmMap.delete(realm.realmId);
+
+    const realmsByExecutionContextId = this.#realmsByExecutionContext.get(
+      realm.cdpSessionId
+    );
+    if (realmsByExecutionContextId !== undefined) {
+      removeFromIndex(
+        realmsByExecutionContextId,
+        realm.executionContextId,
+        realm
+      );
+      if (realmsByExecutionContextId.size === 0) {
+        this.#realmsByExecutionContext.delete(realm.cdpSessionId);
+      }
+    }
+    removeFromIndex(
+      this.#realmsByBrowsingContextId,
+      realm.browsingContextId,
+      realm
+    );
+    removeFromIndex(this.#realmsByNavigableId, realm.navigableId, realm);
+    if (realm.sandbox !== undefined) {
+      removeFromIndex(this.#realmsBySandbox, realm.sandbox, realm);
+    }
+  }
+
+  /**
+   * Returns the realms which can match the filter, taken from the most
+   * selective index the filter allows.
+   */
+  #getCandidates(filter: RealmFilter): Iterable<Realm> {
+    if (filter.realmId !== undefined) {
+      const realm = this.#realmMap.get(filter.realmId);
+      return realm === undefined ? [] : [realm];
+    }
+
+    const candidateSets: (ReadonlySet<Realm> | undefined)[] = [];
+    if (filter.cdpSessionId !== undefined) {
+      const realmsByExecutionContextId = this.#realmsByExecutionContext.get(
+        filter.cdpSessionId
+      );
+      if (filter.executionContextId !== undefined) {
+        candidateSets.push(
+          realmsByExecutionContextId?.get(filter.executionContextId)
+        );
+      } else {
+        candidateSets.push(
+          new Set(
+            Array.from(realmsByExecutionContextId?.values() ?? []).flatMap(
+              (realms) => Array.from(realms)
+            )
+          )
+        );
+      }
+    }
+    if (filter.browsingContextId !== undefined) {
+      candidateSets.push(
+        this.#realmsByBrowsingContextId.get(filter.browsingContextId)
+      );
+    }
+    if (filter.navigableId !== undefined) {
+      candidateSets.push(this.#realmsByNavigableId.get(filter.navigableId));
+    }
+    if (filter.sandbox !== undefined) {
+      candidateSets.push(this.#realmsBySandbox.get(filter.sandbox));
+    }
+
+    if (candidateSets.length === 0) {
+      return this.#realmMap.values();
+    }
+    let smallestSet: ReadonlySet<Realm> | undefined;
+    for (const candidateSet of candidateSets) {
+      if (candidateSet === undefined || candidateSet.size === 0) {
+        return [];
+      }
+      if (smallestSet === undefined || candidateSet.size < smallestSet.size) {
+        smallestSet = candidateSet;
+      }
+    }
+    return smallestSet!;
+  }
+
   findRealms(filter: RealmFilter): Realm[] {
-    return Array.from(this.#realmMap.values()).filter((realm) => {
+    return Array.from(this.#getCandidates(filter)).filter((realm) => {
       if (filter.realmId !== undefined && filter.realmId !== realm.realmId) {
         return false;
       }
@@ -104,10 +276,11 @@ export class RealmStorage {
 
   deleteRealms(filter: RealmFilter) {
     this.findRealms(filter).map((realm) => {
-      this.#realmMap.delete(realm.realmId);
-      Array.from(this.#knownHandlesToRealm.entries())
-        .filter(([, r]) => r === realm.realmId)
-        .map(([h]) => this.#knownHandlesToRealm.delete(h));
+      this.#removeRealm(realm);
+      for (const handle of this.getKnownHandles(realm.realmId)) {
+        this.#knownHandlesToRealm.delete(handle);
+      }
+      this.#realmToKnownHandles.delete(realm.realmId);
     });
   }
 }
@@ -0,0 +1,394 @@
+/**
+ * Copyright 2023 Google LLC.
+ * Copyright (c) Microsoft Corporation.
+ *
+ * Licensed under the Apache License, Version 2.0 (the "License");
+ * you may not use this file except in compliance with the License.
+ * You may obtain a copy of the License at
+ *
+ *     http://www.apache.org/licenses/LICENSE-2.0
+ *
+ * Unless required by applicable law or agreed to in writing, software
+ * distributed under the License is distributed on an "AS IS" BASIS,
+ * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ * See the License for the specific language governing permissions and
+ * limitations under the License.
+ */
+
+import * as chai from 'chai';
+import * as sinon from 'sinon';
+import {
+  SHARED_ID_DIVIDER,
+  ScriptEvaluator,
+  cdpPrimitiveToBidiValue,
+} from './scriptEvaluator.js';
+import {CdpClient} from '../../CdpConnection.js';
+import {Protocol} from 'devtools-protocol';
+import {Realm} from './realm.js';
+import {RealmStorage} from './realmStorage.js';
+import {Script} from '../../../protocol/protocol.js';
+
+const expect = chai.expect;
+
+describe('test ScriptEvaluator', () => {
+  describe('cdpPrimitiveToBidiValue', () => {
+    it('should convert primitive values', () => {
+      expect(
+        cdpPrimitiveToBidiValue({type: 'undefined'})
+      ).to.deep.equal({type: 'undefined'});
+      expect(
+        cdpPrimitiveToBidiValue({type: 'object', subtype: 'null', value: null})
+      ).to.deep.equal({type: 'null'});
+      expect(
+        cdpPrimitiveToBidiValue({type: 'string', value: 'a'})
+      ).to.deep.equal({type: 'string', value: 'a'});
+      expect(
+        cdpPrimitiveToBidiValue({type: 'number', value: 1})
+      ).to.deep.equal({type: 'number', value: 1});
+      expect(
+        cdpPrimitiveToBidiValue({type: 'number', unserializableValue: '-0'})
+      ).to.deep.equal({type: 'number', value: '-0'});
+      expect(
+        cdpPrimitiveToBidiValue({type: 'boolean', value: false})
+      ).to.deep.equal({type: 'boolean', value: false});
+      expect(
+        cdpPrimitiveToBidiValue({type: 'bigint', unserializableValue: '12n'})
+      ).to.deep.equal({type: 'bigint', value: '12'});
+    });
+
+    it('should not convert objects', () => {
+      expect(
+        cdpPrimitiveToBidiValue({type: 'object', objectId: 'SOME_OBJECT_ID'})
+      ).to.be.undefined;
+      expect(
+        cdpPrimitiveToBidiValue({type: 'symbol', objectId: 'SOME_OBJECT_ID'})
+      ).to.be.undefined;
+    });
+  });
+
+  describe('serializeCdpObjects', () => {
+    it('should send CDP commands only for objects', async () => {
+      const sendCommand = sinon.stub().resolves({
+        result: {type: 'object', webDriverValue: {type: 'object'}},
+      });
+      const realm = {
+        cdpClient: {sendCommand},
+        executionContextId: 1,
+        cdpToBidiValue: sinon.stub().resolves({type: 'object'}),
+      } as unknown as Realm;
+
+      const result = await new ScriptEvaluator().serializeCdpObjects(
+        [
+          {type: 'string', value: 'a'},
+          {type: 'object', objectId: 'SOME_OBJECT_ID'},
+          {type: 'number', value: 1},
+        ],
+        'none',
+        realm
+      );
+
+      sinon.assert.calledOnce(sendCommand);
+      expect(result).to.deep.equal([
+        {type: 'string', value: 'a'},
+        {type: 'object'},
+        {type: 'number', value: 1},
+      ]);
+    });
+  });
+
+  describe('callFunction', () => {
+    let sendCommand: sinon.SinonStub;
+    let realm: Realm;
+
+    beforeEach(() => {
+      sendCommand = sinon.stub().resolves({
+        result: {type: 'object', objectId: 'SOME_OBJECT_ID'},
+      });
+      realm = {
+        cdpClient: {sendCommand},
+        executionContextId: 1,
+        realmId: 'SOME_REALM_ID',
+        cdpToBidiValue: sinon.stub().resolves({type: 'undefined'}),
+        createTemporaryObjectGroup: () => 'SOME_OBJECT_GROUP',
+        retainTemporaryObject: sinon.spy(),
+        releaseTemporaryObjectGroup: sinon.spy(),
+      } as unknown as Realm;
+    });
+
+    it('should pass local values in one round trip', async () => {
+      await new ScriptEvaluator().callFunction(
+        realm,
+        '(arg) => arg',
+        {type: 'undefined'},
+        [
+          {
+            type: 'object',
+            value: [
+              ['a', {type: 'array', value: [{type: 'number', value: '-0'}]}],
+              [
+                {type: 'number', value: 1},
+                {
+                  type: 'map',
+                  value: [['b', {type: 'set', value: [{type: 'null'}]}]],
+                },
+              ],
+              ['c', {type: 'string', value: 'd"'}],
+            ],
+          },
+        ],
+        false,
+        'none'
+      );
+
+      sinon.assert.calledOnce(sendCommand);
+      const argument = sendCommand.firstCall.args[1].arguments[1];
+      expect(argument).to.deep.equal({
+        unserializableValue:
+          '({["a"]:[-0],[1]:new Map([["b",new Set([null])]]),["c"]:"d\\""})',
+      });
+      // eslint-disable-next-line no-eval
+      const value = eval(argument.unserializableValue);
+      expect(Object.is(value.a[0], -0)).to.be.true;
+      expect(value[1].get('b').has(null)).to.be.true;
+      expect(value.c).to.equal('d"');
+    });
+
+    it('should build containers with handles in the target', async () => {
+      await new ScriptEvaluator().callFunction(
+        realm,
+        '(arg) => arg',
+        {type: 'undefined'},
+        [
+          {
+            type: 'array',
+            value: [
+              {type: 'array', value: [{type: 'string', value: 'a'}]},
+              {handle: 'SOME_HANDLE'},
+            ],
+          },
+        ],
+        false,
+        'none'
+      );
+
+      sinon.assert.calledTwice(sendCommand);
+      expect(sendCommand.firstCall.args[1].arguments).to.deep.equal([
+        {unserializableValue: '["a"]'},
+        {objectId: 'SOME_HANDLE'},
+      ]);
+    });
+
+    it('should resolve each shared node once', async () => {
+      const sendCommand = sinon.stub().callsFake(async (method, params) => {
+        switch (method) {
+          case 'DOM.resolveNode':
+            return {object: {objectId: `OBJECT_${params.backendNodeId}`}};
+          case 'Runtime.callFunctionOn':
+            return {
+              result: {
+                type: 'object',
+                objectId: 'ARRAY_ID',
+                webDriverValue: {type: 'array'},
+              },
+            };
+          default:
+            return {};
+        }
+      });
+      const realm = createRealm(sendCommand);
+      const node = (backendNodeId: number): Script.ArgumentValue => ({
+        sharedId: `SOME_NAVIGABLE_ID${SHARED_ID_DIVIDER}${backendNodeId}`,
+      });
+
+      await new ScriptEvaluator().callFunction(
+        realm,
+        '(...args) => args',
+        node(1),
+        [node(1), {type: 'array', value: [node(2), node(1)]}],
+        false,
+        'none'
+      );
+
+      const resolvedNodes = sendCommand
+        .getCalls()
+        .filter((call) => call.args[0] === 'DOM.resolveNode')
+        .map((call) => call.args[1].backendNodeId);
+      expect(resolvedNodes).to.have.members([1, 2]);
+      const userFunctionCall = sendCommand
+        .getCalls()
+        .filter((call) => call.args[0] === 'Runtime.callFunctionOn')
+        .at(-1)!;
+      expect(
+        userFunctionCall.args[1].arguments.map(
+          (argument: Protocol.Runtime.CallArgument) => argument.objectId
+        )
+      ).to.deep.equal(['OBJECT_1', 'OBJECT_1', 'ARRAY_ID']);
+    });
+
+    it('should resolve shared nodes again in the next call', async () => {
+      const sendCommand = sinon.stub().callsFake(async (method, params) => {
+        switch (method) {
+          case 'DOM.resolveNode':
+            return {object: {objectId: `OBJECT_${params.backendNodeId}`}};
+          case 'Runtime.callFunctionOn':
+            return {result: {type: 'undefined', webDriverValue: {}}};
+          default:
+            return {};
+        }
+      });
+      const realm = createRealm(sendCommand);
+      const node: Script.ArgumentValue = {
+        sharedId: `SOME_NAVIGABLE_ID${SHARED_ID_DIVIDER}1`,
+      };
+
+      for (let i = 0; i < 2; i++) {
+        await new ScriptEvaluator().callFunction(
+          realm,
+          '(arg) => arg',
+          {type: 'undefined'},
+          [node],
+          false,
+          'none'
+        );
+        expect(realm.liveObjectIdCount).to.equal(0);
+      }
+
+      const resolveCalls = sendCommand
+        .getCalls()
+        .filter((call) => call.args[0] === 'DOM.resolveNode');
+      expect(resolveCalls).to.have.lengthOf(2);
+      // The nodes are released with the temporary object groups.
+      const releasedObjectGroups = sendCommand
+        .getCalls()
+        .filter((call) => call.args[0] === 'Runtime.releaseObjectGroup')
+        .map((call) => call.args[1].objectGroup);
+      expect(releasedObjectGroups).to.deep.equal(
+        resolveCalls.map((call) => call.args[1].objectGroup)
+      );
+    });
+
+    it('should release temporary objects after the call', async () => {
+      const sendCommand = sinon.stub().resolves({
+        result: {
+          type: 'object',
+          objectId: 'SOME_OBJECT_ID',
+          webDriverValue: {type: 'array'},
+        },
+      });
+      const realm = createRealm(sendCommand);
+
+      await new ScriptEvaluator().callFunction(
+        realm,
+        '(arg) => arg',
+        {type: 'undefined'},
+        [
+          {
+            type: 'array',
+            value: [
+              {type: 'array', value: [{handle: 'SOME_HANDLE'}]},
+              {type: 'set', value: [{handle: 'SOME_HANDLE'}]},
+            ],
+          },
+        ],
+        false,
+        'none'
+      );
+
+      const releaseCalls = sendCommand
+        .getCalls()
+        .filter((call) => call.args[0] === 'Runtime.releaseObjectGroup');
+      expect(releaseCalls).to.have.lengthOf(1);
+      expect(releaseCalls[0]!.args[1].objectGroup).to.equal(
+        sendCommand.firstCall.args[1].objectGroup
+      );
+      expect(realm.liveObjectIdCount).to.equal(0);
+    });
+  });
+
+  describe('scriptEvaluate', () => {
+    function createSendCommand(exception: Protocol.Runtime.RemoteObject) {
+      return sinon.stub().callsFake(async (method) => {
+        switch (method) {
+          case 'Runtime.evaluate':
+            return {
+              result: exception,
+              exceptionDetails: {
+                exceptionId: 1,
+                text: 'Uncaught',
+                lineNumber: 0,
+                columnNumber: 0,
+                exception,
+              },
+            };
+          case 'Runtime.callFunctionOn':
+            return {result: {type: 'string', value: 'Error: SOME_MESSAGE'}};
+          default:
+            return {};
+        }
+      });
+    }
+
+    it('should serialize thrown error in one round trip', async () => {
+      const sendCommand = createSendCommand({
+        type: 'object',
+        subtype: 'error',
+        objectId: 'SOME_OBJECT_ID',
+      });
+
+      const result = await new ScriptEvaluator().scriptEvaluate(
+        createRealm(sendCommand),
+        'throw new Error("SOME_MESSAGE")',
+        false,
+        'none'
+      );
+
+      expect(
+        sendCommand.getCalls().map((call) => call.args[0])
+      ).to.deep.equal([
+        'Runtime.evaluate',
+        'Runtime.callFunctionOn',
+        'Runtime.releaseObject',
+      ]);
+      expect(result).to.deep.include({type: 'exception'});
+      expect(result).to.have.nested.property(
+        'exceptionDetails.text',
+        'Error: SOME_MESSAGE'
+      );
+      expect(result)
+        .to.have.nested.property('exceptionDetails.exception')
+        .that.deep.equals({type: 'error'});
+    });
+
+    it('should serialize thrown primitive without round trips', async () => {
+      const sendCommand = createSendCommand({type: 'number', value: 42});
+
+      const result = await new ScriptEvaluator().scriptEvaluate(
+        createRealm(sendCommand),
+        'throw 42',
+        false,
+        'none'
+      );
+
+      sinon.assert.calledOnce(sendCommand);
+      expect(result).to.have.nested.property('exceptionDetails.text', '42');
+      expect(result)
+        .to.have.nested.property('exceptionDetails.exception')
+        .that.deep.equals({type: 'number', value: 42});
+    });
+  });
+});
+
+function createRealm(sendCommand: sinon.SinonStub): Realm {
+  return new Realm(
+    new RealmStorage(),
+    'SOME_REALM_ID',
+    'SOME_CONTEXT_ID',
+    'SOME_NAVIGABLE_ID',
+    1,
+    'SOME_ORIGIN',
+    'window',
+    undefined,
+    'SOME_SESSION_ID',
+    {sendCommand} as unknown as CdpClient
+  );
+}
@@ -36,9 +36,180 @@ function cdpRemoteObjectToCallArgument(
   return {value: cdpRemoteObject.value};
 }
 
+/**
+ * Converts a CDP remote object of a primitive type to BiDi without a round
+ * trip. Returns `undefined` for other values, which have to be serialized by
+ * the browser.
+ */
+export function cdpPrimitiveToBidiValue(
+  cdpRemoteObject: Protocol.Runtime.RemoteObject
+): CommonDataTypes.PrimitiveProtocolValue | undefined {
+  if (cdpRemoteObject.objectId !== undefined) {
+    return undefined;
+  }
+  const {type, subtype, value, unserializableValue} = cdpRemoteObject;
+  switch (type) {
+    case 'undefined':
+      return {type: 'undefined'};
+    case 'string':
+      if (typeof value === 'string') {
+        return {type: 'string', value};
+      }
+      break;
+    case 'boolean':
+      if (typeof value === 'boolean') {
+        return {type: 'boolean', value};
+      }
+      break;
+    case 'number':
+      if (unserializableValue !== undefined) {
+        return {
+          type: 'number',
+          value: unserializableValue as CommonDataTypes.SpecialNumber,
+        };
+      }
+      if (typeof value === 'number') {
+        return {type: 'number', value};
+      }
+      break;
+    case 'bigint':
+      // CDP represents BigInt as `123n`.
+      if (unserializableValue?.endsWith('n')) {
+        return {type: 'bigint', value: unserializableValue.slice(0, -1)};
+      }
+      break;
+    case 'object':
+      if (subtype === 'null') {
+        return {type: 'null'};
+      }
+      break;
+  }
+  return undefined;
+}
+
+/**
+ * Builds a JavaScript expression constructing the given local value. Passed as
+ * `unserializableValue`, it lets CDP construct the whole value tree while
+ * resolving the call arguments, without extra round trips. Returns `undefined`
+ * if the value refers to remote objects by `handle` or `sharedId`.
+ */
+function localValueToExpression(
+  argumentValue: Script.ArgumentValue
+): string | undefined {
+  if ('sharedId' in argumentValue || 'handle' in argumentValue) {
+    return undefined;
+  }
+  switch (argumentValue.type) {
+    case 'undefined':
+    case 'null': {
+      return argumentValue.type;
+    }
+    case 'string': {
+      return JSON.stringify(argumentValue.value);
+    }
+    case 'number': {
+      // Special values, like `NaN` and `-0`, are valid expressions as is.
+      return String(argumentValue.value);
+    }
+    case 'boolean': {
+      return String(Boolean(argumentValue.value));
+    }
+    case 'bigint': {
+      return `BigInt(${JSON.stringify(argumentValue.value)})`;
+    }
+    case 'date': {
+      return `new Date(Date.parse(${JSON.stringify(argumentValue.value)}))`;
+    }
+    case 'regexp': {
+      return `new RegExp(${JSON.stringify(
+        argumentValue.value.pattern
+      )}, ${JSON.stringify(argumentValue.value.flags)})`;
+    }
+    case 'array':
+    case 'set': {
+      const items = listToExpressions(argumentValue.value);
+      if (items === undefined) {
+        return undefined;
+      }
+      return argumentValue.type === 'array'
+        ? `[${items.join(',')}]`
+        : `new Set([${items.join(',')}])`;
+    }
+    case 'map':
+    case 'object': {
+      const entries: string[] = [];
+      for (const [key, value] of argumentValue.value) {
+        const keyExpression =
+          typeof key === 'string'
+            ? JSON.stringify(key)
+            : localValueToExpression(key);
+        const valueExpression = localValueToExpression(value);
+        if (keyExpression === undefined || valueExpression === undefined) {
+          return undefined;
+        }
+        entries.push(
+          argumentValue.type === 'map'
+            ? `[${keyExpression},${valueExpression}]`
+            : `[${keyExpression}]:${valueExpression}`
+        );
+      }
+      // Parentheses prevent the object literal from being parsed as a block.
+      return argumentValue.type === 'map'
+        ? `new Map([${entries.join(',')}])`
+        : `({${entries.join(',')}})`;
+    }
+  }
+  return undefined;
+}
+
+function listToExpressions(
+  list: CommonDataTypes.ListLocalValue
+): string[] | undefined {
+  const result: string[] = [];
+  for (const value of list) {
+    const expression = localValueToExpression(value);
+    if (expression === undefined) {
+      return undefined;
+    }
+    result.push(expression);
+  }
+  return result;
+}
+
+/**
+ * Constructs an object in the realm by calling `constructor` with `args`. The
+ * object belongs to `objectGroup` and lives until the group is released.
+ */
+async function createTemporaryObject(
+  constructor: (...args: any[]) => unknown,
+  args: Protocol.Runtime.CallArgument[],
+  realm: Realm,
+  objectGroup: string
+): Promise<Protocol.Runtime.CallArgument> {
+  const argEvalResult = await realm.cdpClient.sendCommand(
+    'Runtime.callFunctionOn',
+    {
+      functionDeclaration: String(constructor),
+      awaitPromise: false,
+      arguments: args,
+      returnByValue: false,
+      executionContextId: realm.executionContextId,
+      objectGroup,
+    }
+  );
+  realm.retainTemporaryObject(objectGroup);
+  return {objectId: argEvalResult.result.objectId};
+}
+
+/**
+ * Deserializes a BiDi argument into a CDP call argument. The intermediate
+ * objects created for it belong to `objectGroup`, which the caller releases
+ * once the argument is not needed anymore.
+ */
 async function deserializeToCdpArg(
   argumentValue: Script.ArgumentValue,
-  realm: Realm
+  realm: Realm,
+  objectGroup: string
 ): Promise<Protocol.Runtime.CallArgument> {
   if ('sharedId' in argumentValue) {
     const [navigableId, rawBackendNodeId] =
@@ -62,13 +233,7 @@ async function deserializeToCdpArg(
     }
 
     try {
-      const obj = await realm.cdpClient.sendCommand('DOM.resolveNode', {
-        backendNodeId,
-        executionContextId: realm.executionContextId,
-      });
-      // TODO: release `obj.object.objectId` after using.
-      // https://github.com/GoogleChromeLabs/chromium-bidi/issues/375
-      return {objectId: obj.object.objectId};
+      return {objectId: await realm.resolveNode(backendNodeId, objectGroup)};
     } catch (e: any) {
       // Heuristic to detect "no such node" exception. Based on the  specific
       // CDP implementation.
@@ -83,6 +248,14 @@ async function deserializeToCdpArg(
   if ('handle' in argumentValue) {
     return {objectId: argumentValue.handle};
   }
+  if (['array', 'map', 'object', 'set'].includes(argumentValue.type)) {
+    // Without nested remote references, the value is constructed by the call
+    // itself. Otherwise, each nested container costs a round trip.
+    const expression = localValueToExpression(argumentValue);
+    if (expression !== undefined) {
+      return {unserializableValue: expression};
+    }
+  }
   switch (argumentValue.type) {
     // Primitive Protocol Value
     // https://w3c.github.io/webdriver-bidi/#data-types-protocolValue-primitiveProtocolValue
@@ -137,115 +310,80 @@ async function deserializeToCdpArg(
       };
     }
     case 'map': {
-      // TODO(sadym): if non of the nested keys and values has remote
-      // reference, serialize to `unserializableValue` without CDP roundtrip.
       const keyValueArray = await flattenKeyValuePairs(
         argumentValue.value,
-        realm
+        realm,
+        objectGroup
       );
-      const argEvalResult = await realm.cdpClient.sendCommand(
-        'Runtime.callFunctionOn',
-        {
-          functionDeclaration: String(
-            (...args: Protocol.Runtime.CallArgument[]) => {
-              const result = new Map();
-              for (let i = 0; i < args.length; i += 2) {
-                result.set(args[i], args[i + 1]);
-              }
-              return result;
-            }
-          ),
-          awaitPromise: false,
-          arguments: keyValueArray,
-          returnByValue: false,
-          executionContextId: realm.executionContextId,
-        }
+      return await createTemporaryObject(
+        (...args: Protocol.Runtime.CallArgument[]) => {
+          const result = new Map();
+          for (let i = 0; i < args.length; i += 2) {
+            result.set(args[i], args[i + 1]);
+          }
+          return result;
+        },
+        keyValueArray,
+        realm,
+        objectGroup
       );
-      // TODO: release `argEvalResult.result.objectId`  after using.
-      // https://github.com/GoogleChromeLabs/chromium-bidi/issues/375
-      return {objectId: argEvalResult.result.objectId};
     }
     case 'object': {
-      // TODO(sadym): if non of the nested keys and values has remote
-      //  reference, serialize to `unserializableValue` without CDP roundtrip.
       const keyValueArray = await flattenKeyValuePairs(
         argumentValue.value,
-        realm
+        realm,
+        objectGroup
       );
-
-      const argEvalResult = await realm.cdpClient.sendCommand(
-        'Runtime.callFunctionOn',
-        {
-          functionDeclaration: String(
-            (...args: Protocol.Runtime.CallArgument[]) => {
-              const result: Record<
-                string | number | symbol,
-                Protocol.Runtime.CallArgument
-              > = {};
-
-              for (let i = 0; i < args.length; i += 2) {
-                // Key should be either `string`, `number`, or `symbol`.
-                const key = args[i] as string | number | symbol;
-                result[key] = args[i + 1]!;
-              }
-              return result;
-            }
-          ),
-          awaitPromise: false,
-          arguments: keyValueArray,
-          returnByValue: false,
-          executionContextId: realm.executionContextId,
-        }
+      return await createTemporaryObject(
+        (...args: Protocol.Runtime.CallArgument[]) => {
+          const result: Record<
+            string | number | symbol,
+            Protocol.Runtime.CallArgument
+          > = {};
+
+          for (let i = 0; i < args.length; i += 2) {
+            // Key should be either `string`, `number`, or `symbol`.
+            const key = args[i] as string | number | symbol;
+            result[key] = args[i + 1]!;
+          }
+          return result;
+        },
+        keyValueArray,
+        realm,
+        objectGroup
       );
-      // TODO: release `argEvalResult.result.objectId`  after using.
-      // https://github.com/GoogleChromeLabs/chromium-bidi/issues/375
-      return {objectId: argEvalResult.result.objectId};
     }
     case 'array': {
-      // TODO(sadym): if non of the nested items has remote reference,
-      //  serialize to `unserializableValue` without CDP roundtrip.
-      const args = await flattenValueList(argumentValue.value, realm);
-
-      const argEvalResult = await realm.cdpClient.sendCommand(
-        'Runtime.callFunctionOn',
-        {
-          functionDeclaration: String((...args: unknown[]) => {
-            return args;
-          }),
-          awaitPromise: false,
-          arguments: args,
-          returnByValue: false,
-          executionContextId: realm.executionContextId,
-        }
+      const args = await flattenValueList(
+        argumentValue.value,
+        realm,
+        objectGroup
+      );
+      return await createTemporaryObject(
+        (...args: unknown[]) => {
+          return args;
+        },
+        args,
+        realm,
+        objectGroup
       );
-      // TODO: release `argEvalResult.result.objectId`  after using.
-      // https://github.com/GoogleChromeLabs/chromium-bidi/issues/375
-      return {objectId: argEvalResult.result.objectId};
     }
     case 'set': {
-      // TODO(sadym): if non of the nested items has remote reference,
-      //  serialize to `unserializableValue` without CDP roundtrip.
-      const args = await flattenValueList(argumentValue.value, realm);
-
-      const argEvalResult = await realm.cdpClient.sendCommand(
-        'Runtime.callFunctionOn',
-        {
-          functionDeclaration: String((...args: unknown[]) => {
-            return new Set(args);
-          }),
-          awaitPromise: false,
-          arguments: args,
-          returnByValue: false,
-          executionContextId: realm.executionContextId,
-        }
+      const args = await flattenValueList(
+        argumentValue.value,
+        realm,
+        objectGroup
+      );
+      return await createTemporaryObject(
+        (...args: unknown[]) => {
+          return new Set(args);
+        },
+        args,
+        realm,
+        objectGroup
       );
-      // TODO: release `argEvalResult.result.objectId`  after using.
-      // https://github.com/GoogleChromeLabs/chromium-bidi/issues/375
-      return {objectId: argEvalResult.result.objectId};
     }
 
-    // TODO(sadym): dispose nested objects.
-
     default:
       throw new Error(
         `Value ${JSON.stringify(argumentValue)} is not deserializable.`
@@ -255,41 +393,33 @@ async function deserializeToCdpArg(
 
 async function flattenKeyValuePairs(
   value: CommonDataTypes.MappingLocalValue,
-  realm: Realm
+  realm: Realm,
+  objectGroup: string
 ): Promise<Protocol.Runtime.CallArgument[]> {
-  const keyValueArray: Protocol.Runtime.CallArgument[] = [];
-  for (const pair of value) {
-    const key = pair[0];
-    const value = pair[1];
-
-    let keyArg;
-    if (typeof key === 'string') {
-      // Key is a string.
-      keyArg = {value: key};
-    } else {
-      // Key is a serialized value.
-      keyArg = await deserializeToCdpArg(key, realm);
-    }
-
-    const valueArg = await deserializeToCdpArg(value, realm);
-
-    keyValueArray.push(keyArg);
-    keyValueArray.push(valueArg);
-  }
-  return keyValueArray;
+  // Keys and values are deserialized concurrently, e.g. to resolve all the
+  // nested nodes at once.
+  const keyValueArray = await Promise.all(
+    value.map(([key, value]) =>
+      Promise.all([
+        // Key is either a string or a serialized value.
+        typeof key === 'string'
+          ? {value: key}
+          : deserializeToCdpArg(key, realm, objectGroup),
+        deserializeToCdpArg(value, realm, objectGroup),
+      ])
+    )
+  );
+  return keyValueArray.flat();
 }
 
 async function flattenValueList(
   list: CommonDataTypes.ListLocalValue,
-  realm: Realm
+  realm: Realm,
+  objectGroup: string
 ): Promise<Protocol.Runtime.CallArgument[]> {
-  const result: Protocol.Runtime.CallArgument[] = [];
-
-  for (const value of list) {
-    result.push(await deserializeToCdpArg(value, realm));
-  }
-
-  return result;
+  return await Promise.all(
+    list.map((value) => deserializeToCdpArg(value, realm, objectGroup))
+  );
 }
 
 /**
@@ -303,6 +433,13 @@ export async function stringifyObject(
   cdpObject: Protocol.Runtime.RemoteObject,
   realm: Realm
 ): Promise<string> {
+  if (
+    cdpObject.objectId === undefined &&
+    cdpObject.unserializableValue === undefined
+  ) {
+    // Primitive value is stringified without a CDP round trip.
+    return String(cdpObject.value);
+  }
   const stringifyResult = await realm.cdpClient.sendCommand(
     'Runtime.callFunctionOn',
     {
@@ -331,6 +468,11 @@ export class ScriptEvaluator {
     resultOwnership: Script.OwnershipModel,
     realm: Realm
   ): Promise<CommonDataTypes.RemoteValue> {
+    const primitiveValue = cdpPrimitiveToBidiValue(cdpRemoteObject);
+    if (primitiveValue !== undefined) {
+      return primitiveValue;
+    }
+
     const arg = cdpRemoteObjectToCallArgument(cdpRemoteObject);
 
     const cdpWebDriverValue: Protocol.Runtime.CallFunctionOnResponse =
@@ -344,6 +486,23 @@ export class ScriptEvaluator {
     return await realm.cdpToBidiValue(cdpWebDriverValue, resultOwnership);
   }
 
+  /**
+   * Serializes a list of CDP objects, e.g. console arguments. Primitive values
+   * are converted without round trips, and the other ones are serialized
+   * concurrently.
+   */
+  public async serializeCdpObjects(
+    cdpRemoteObjects: Protocol.Runtime.RemoteObject[],
+    resultOwnership: Script.OwnershipModel,
+    realm: Realm
+  ): Promise<CommonDataTypes.RemoteValue[]> {
+    return await Promise.all(
+      cdpRemoteObjects.map((cdpRemoteObject) =>
+        this.serializeCdpObject(cdpRemoteObject, resultOwnership, realm)
+      )
+    );
+  }
+
   public async callFunction(
     realm: Realm,
     functionDeclaration: string,
@@ -359,17 +518,15 @@ export class ScriptEvaluator {
         return f.apply(deserializedThis, deserializedArgs);
       }}`;
 
-    const thisAndArgumentsList = [await deserializeToCdpArg(_this, realm)];
-    thisAndArgumentsList.push(
-      ...(await Promise.all(
-        _arguments.map(async (a) => {
-          return await deserializeToCdpArg(a, realm);
-        })
-      ))
-    );
-
+    // The intermediate objects of the arguments are only needed for the call.
+    const argumentsObjectGroup = realm.createTemporaryObjectGroup();
     let cdpCallFunctionResult: Protocol.Runtime.CallFunctionOnResponse;
     try {
+      const thisAndArgumentsList = await Promise.all(
+        [_this, ..._arguments].map((a) =>
+          deserializeToCdpArg(a, realm, argumentsObjectGroup)
+        )
+      );
       cdpCallFunctionResult = await realm.cdpClient.sendCommand(
         'Runtime.callFunctionOn',
         {
@@ -394,6 +551,8 @@ export class ScriptEvaluator {
         throw new Message.InvalidArgumentException('Handle was not found.');
       }
       throw e;
+    } finally {
+      realm.releaseTemporaryObjectGroup(argumentsObjectGroup);
     }
 
     if (cdpCallFunctionResult.exceptionDetails) {
@@ -436,14 +595,13 @@ export class ScriptEvaluator {
       })
     );
 
-    const exception = await this.serializeCdpObject(
-      // Exception should always be there.
-      cdpExceptionDetails.exception!,
-      resultOwnership,
-      realm
-    );
-
-    const text = await stringifyObject(cdpExceptionDetails.exception!, realm);
+    // Exception should always be there.
+    const cdpException = cdpExceptionDetails.exception!;
+    // Stringify is requested first, as serializing an error may release it.
+    const [text, exception] = await Promise.all([
+      stringifyObject(cdpException, realm),
+      this.#serializeCdpException(cdpException, resultOwnership, realm),
+    ]);
 
     return {
       exception,
@@ -458,6 +616,21 @@ export class ScriptEvaluator {
     };
   }
 
+  async #serializeCdpException(
+    cdpException: Protocol.Runtime.RemoteObject,
+    resultOwnership: Script.OwnershipModel,
+    realm: Realm
+  ): Promise<CommonDataTypes.RemoteValue> {
+    if (cdpException.subtype === 'error') {
+      // Errors are serialized without value, so no round trip is needed.
+      return await realm.cdpToBidiValue(
+        {result: {...cdpException, webDriverValue: {type: 'error'}}},
+        resultOwnership
+      );
+    }
+    return await this.serializeCdpObject(cdpException, resultOwnership, realm);
+  }
+
   public async scriptEvaluate(
     realm: Realm,
     expression: string,
@@ -48,7 +48,7 @@ export class BidiServerRunner {
    * @param onNewBidiConnectionOpen delegate to be called for each new
    * connection. `onNewBidiConnectionOpen` delegate should return another
    * `onConnectionClose` delegate, which will be called after the connection is
-   * closed.
+   * closed. If it throws, the connection is rejected.
    */
   run(
     bidiPort: number,
@@ -124,7 +124,14 @@ export class BidiServerRunner {
 
       const bidiServer = new BidiServer();
 
-      const onBidiConnectionClosed = await onNewBidiConnectionOpen(bidiServer);
+      let onBidiConnectionClosed: () => void;
+      try {
+        onBidiConnectionClosed = await onNewBidiConnectionOpen(bidiServer);
+      } catch (e) {
+        log('Connection rejected:', e);
+        request.reject(503, (e as Error).message);
+        return;
+      }
 
       const connection = request.accept();
 
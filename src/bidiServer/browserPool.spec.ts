@@ -0,0 +1,120 @@
+/**
+ * Copyright 2023 Google LLC.
+ * Copyright (c) Microsoft Corporation.
+ *
+ * Licensed under the Apache License, Version 2.0 (the "License");
+ * you may not use this file except in compliance with the License.
+ * You may obtain a copy of the License at
+ *
+ *     http://www.apache.org/licenses/LICENSE-2.0
+ *
+ * Unless required by applicable law or agreed to in writing, software
+ * distributed under the License is distributed on an "AS IS" BASIS,
+ * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ * See the License for the specific language governing permissions and
+ * limitations under the License.
+ */
+
+import * as chai from 'chai';
+import * as sinon from 'sinon';
+import {BrowserPool} from './browserPool.js';
+import chaiAsPromised from 'chai-as-promised';
+
+chai.use(chaiAsPromised);
+const expect = chai.expect;
+
+describe('test BrowserPool', () => {
+  let launchedCount: number;
+  let launch: sinon.SinonSpy<[], Promise<number>>;
+  let close: sinon.SinonSpy<[number], Promise<void>>;
+
+  beforeEach(() => {
+    launchedCount = 0;
+    launch = sinon.spy(() => Promise.resolve(++launchedCount));
+    close = sinon.spy(() => Promise.resolve());
+  });
+
+  function createPool(
+    size: number,
+    isHealthy: (browser: number) => Promise<boolean> = () =>
+      Promise.resolve(true)
+  ) {
+    return new BrowserPool<number>({
+      launch,
+      close,
+      isHealthy,
+      size,
+      idleTimeout: 1000,
+    });
+  }
+
+  it('should launch browsers in advance', async () => {
+    const pool = createPool(2);
+    await wait(1);
+
+    sinon.assert.calledTwice(launch);
+    expect(pool.idleCount).to.equal(2);
+  });
+
+  it('should return warm browser and launch replacement', async () => {
+    const pool = createPool(1);
+    await wait(1);
+
+    expect(await pool.acquire()).to.equal(1);
+    await wait(1);
+
+    sinon.assert.calledTwice(launch);
+    expect(pool.idleCount).to.equal(1);
+  });
+
+  it('should wait for launch if no warm browser', async () => {
+    const pool = createPool(1);
+
+    const browsers = await Promise.all([pool.acquire(), pool.acquire()]);
+    await wait(1);
+
+    expect(browsers.sort()).to.deep.equal([1, 2]);
+    expect(pool.idleCount).to.equal(1);
+  });
+
+  it('should skip and close unhealthy browsers', async () => {
+    const pool = createPool(2, (browser) => Promise.resolve(browser !== 1));
+    await wait(1);
+
+    expect(await pool.acquire()).to.equal(2);
+    sinon.assert.calledOnceWithExactly(close, 1);
+  });
+
+  it('should evict idle browsers', async () => {
+    const clock = sinon.useFakeTimers();
+    try {
+      const pool = createPool(1);
+      await clock.tickAsync(1);
+      expect(pool.idleCount).to.equal(1);
+
+      await clock.tickAsync(1000);
+
+      expect(pool.idleCount).to.equal(0);
+      sinon.assert.calledOnceWithExactly(close, 1);
+      sinon.assert.calledOnce(launch);
+    } finally {
+      clock.restore();
+    }
+  });
+
+  it('should close warm browsers when closed', async () => {
+    const pool = createPool(2);
+    await wait(1);
+
+    pool.close();
+
+    sinon.assert.calledTwice(close);
+    await expect(pool.acquire()).to.be.rejectedWith('closed');
+  });
+});
+
+function wait(timeout: number): Promise<void> {
+  return new Promise((resolve) => {
+    setTimeout(resolve, timeout);
+  });
+}
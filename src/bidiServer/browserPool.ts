@@ -0,0 +1,177 @@
+/**
+ * Copyright 2023 Google LLC.
+ * Copyright (c) Microsoft Corporation.
+ *
+ * Licensed under the Apache License, Version 2.0 (the "License");
+ * you may not use this file except in compliance with the License.
+ * You may obtain a copy of the License at
+ *
+ *     http://www.apache.org/licenses/LICENSE-2.0
+ *
+ * Unless required by applicable law or agreed to in writing, software
+ * distributed under the License is distributed on an "AS IS" BASIS,
+ * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ * See the License for the specific language governing permissions and
+ * limitations under the License.
+ */
+
+import {Deferred} from '../utils/deferred.js';
+import debug from 'debug';
+
+const debugInternal = debug('bidiServer:internal');
+
+export interface BrowserPoolOptions<T> {
+  /** Launches a new browser with the mapper running in it. */
+  launch: () => Promise<T>;
+  /** Closes the browser. */
+  close: (browser: T) => Promise<void>;
+  /** Resolves to `false` if the browser can't be used anymore. */
+  isHealthy: (browser: T) => Promise<boolean>;
+  /** Number of warm browsers to keep ready. */
+  size: number;
+  /** Milliseconds after which an unused warm browser is closed. */
+  idleTimeout: number;
+}
+
+type IdleBrowser<T> = {
+  browser: T;
+  evictionTimer: ReturnType<typeof setTimeout>;
+};
+
+/**
+ * Keeps up to `size` browsers launched in advance, so that a new connection
+ * does not wait for a cold browser start. Each acquired browser is replaced in
+ * the background. Browsers staying unused for longer than `idleTimeout` are
+ * closed and not replaced until the next `acquire`.
+ */
+export class BrowserPool<T> {
+  readonly #options: BrowserPoolOptions<T>;
+  readonly #idle: IdleBrowser<T>[] = [];
+  readonly #waiting: Deferred<T>[] = [];
+  #launching = 0;
+  #isClosed = false;
+
+  constructor(options: BrowserPoolOptions<T>) {
+    this.#options = options;
+    this.#fill();
+  }
+
+  /** Number of warm browsers ready to be acquired. */
+  get idleCount(): number {
+    return this.#idle.length;
+  }
+
+  /** Number of browsers being launched. */
+  get launchingCount(): number {
+    return this.#launching;
+  }
+
+  /**
+   * Returns a healthy warm browser if there is one. Otherwise, waits for the
+   * next launched browser. The caller owns the returned browser and is
+   * responsible for closing it.
+   */
+  async acquire(): Promise<T> {
+    if (this.#isClosed) {
+      throw new Error('Browser pool is closed');
+    }
+
+    while (this.#idle.length > 0) {
+      const {browser, evictionTimer} = this.#idle.shift()!;
+      clearTimeout(evictionTimer);
+      if (await this.#isHealthy(browser)) {
+        this.#fill();
+        return browser;
+      }
+      debugInternal('Unhealthy browser removed from the pool.');
+      this.#closeBrowser(browser);
+    }
+
+    const deferred = new Deferred<T>();
+    this.#waiting.push(deferred);
+    this.#fill();
+    return await deferred;
+  }
+
+  /** Closes all the warm browsers and rejects pending `acquire` calls. */
+  close(): void {
+    this.#isClosed = true;
+    for (const {browser, evictionTimer} of this.#idle.splice(0)) {
+      clearTimeout(evictionTimer);
+      this.#closeBrowser(browser);
+    }
+    for (const deferred of this.#waiting.splice(0)) {
+      deferred.reject(new Error('Browser pool is closed'));
+    }
+  }
+
+  /**
+   * Starts enough launches to serve all the waiting `acquire` calls and to
+   * keep `size` warm browsers.
+   */
+  #fill() {
+    const required = Math.max(
+      this.#options.size - this.#idle.length,
+      this.#waiting.length
+    );
+    for (let i = this.#launching; i < required; i++) {
+      this.#launch();
+    }
+  }
+
+  #launch() {
+    this.#launching++;
+    this.#options.launch().then(
+      (browser) => {
+        this.#launching--;
+        this.#onLaunched(browser);
+      },
+      (error) => {
+        this.#launching--;
+        debugInternal('Browser launch failed.', error);
+        this.#waiting.shift()?.reject(error);
+      }
+    );
+  }
+
+  #onLaunched(browser: T) {
+    const waiting = this.#waiting.shift();
+    if (waiting !== undefined) {
+      waiting.resolve(browser);
+      // Replace the handed out browser.
+      this.#fill();
+      return;
+    }
+    if (this.#isClosed) {
+      this.#closeBrowser(browser);
+      return;
+    }
+
+    const idleBrowser: IdleBrowser<T> = {
+      browser,
+      evictionTimer: setTimeout(() => {
+        const index = this.#idle.indexOf(idleBrowser);
+        if (index !== -1) {
+          debugInternal('Idle browser evicted from the pool.');
+          this.#idle.splice(index, 1);
+          this.#closeBrowser(browser);
+        }
+      }, this.#options.idleTimeout),
+    };
+    this.#idle.push(idleBrowser);
+  }
+
+  async #isHealthy(browser: T): Promise<boolean> {
+    try {
+      return await this.#options.isHealthy(browser);
+    } catch {
+      return false;
+    }
+  }
+
+  #closeBrowser(browser: T) {
+    this.#options.close(browser).catch((error) => {
+      debugInternal('Closing browser failed.', error);
+    });
+  }
+}
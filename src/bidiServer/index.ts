@@ -15,16 +15,29 @@
  * limitations under the License.
  */
 
+import puppeteer, {Browser} from 'puppeteer';
 import {BidiServerRunner} from './bidiServerRunner.js';
+import {BrowserPool} from './browserPool.js';
 import {ITransport} from '../utils/transport.js';
-import {MapperServer} from './mapperServer.js';
+import {MapperOptions, MapperServer} from './mapperServer.js';
+import {ReusedBrowser} from './reusedBrowser.js';
 import argparse from 'argparse';
 import debug from 'debug';
 import mapperReader from './mapperReader.js';
-import puppeteer from 'puppeteer';
 
 const log = debug('bidiServer:log');
 
+type BrowserAndMapper = {browser: Browser; mapperServer: MapperServer};
+
+/** How long a pooled browser may take to respond to a health check. */
+const HEALTH_CHECK_TIMEOUT = 1000;
+/**
+ * How long resetting a reused browser may take before a new browser is
+ * launched instead. A page stuck in a dialog or a busy loop can block the
+ * reset forever.
+ */
+const RESET_TIMEOUT = 10000;
+
 function parseArguments() {
   const parser = new argparse.ArgumentParser({
     add_help: true,
@@ -53,6 +66,80 @@ function parseArguments() {
     default: true,
   });
 
+  parser.add_argument('-rb', '--reuse-browser', {
+    help:
+      'If `true`, the browser and the mapper are launched once and reused ' +
+      'by all the following connections, resetting the session state ' +
+      'between them. Only one connection at a time is supported. Default is ' +
+      '`--reuse-browser=false`.',
+    default: process.env['REUSE_BROWSER'] || false,
+  });
+
+  parser.add_argument('-ps', '--pool-size', {
+    help:
+      'Number of browsers with the mapper launched in advance and kept ' +
+      'ready for new connections. Ignored with `--reuse-browser=true`. ' +
+      'Default is 0, which launches a browser on each new connection.',
+    type: 'int',
+    default: process.env['POOL_SIZE'] || 0,
+  });
+
+  parser.add_argument('-pit', '--pool-idle-timeout', {
+    help:
+      'Milliseconds after which an unused pre-launched browser is closed. ' +
+      'Default is 300000.',
+    type: 'int',
+    default: process.env['POOL_IDLE_TIMEOUT'] || 300000,
+  });
+
+  parser.add_argument('-spb', '--sessions-per-browser', {
+    help:
+      'Maximum number of connections sharing one browser. Each connection ' +
+      'gets its own mapper tab and is isolated in its own browser context. ' +
+      'Takes precedence over `--pool-size`. Ignored with ' +
+      '`--reuse-browser=true`. Default is 1, which launches a browser per ' +
+      'connection.',
+    type: 'int',
+    default: process.env['SESSIONS_PER_BROWSER'] || 1,
+  });
+
+  parser.add_argument('-oor', '--out-of-order-responses', {
+    help:
+      'If `true`, command responses are sent as soon as they are ready ' +
+      'instead of in the order of the commands. Events are still sent in ' +
+      'order per browsing context and channel, and before the response of ' +
+      'the command they were emitted during. Default is ' +
+      '`--out-of-order-responses=false`.',
+    default: process.env['OUT_OF_ORDER_RESPONSES'] || false,
+  });
+
+  parser.add_argument('-mqe', '--max-queued-events', {
+    help:
+      'Maximum number of events waiting in the mapper to be sent. When it ' +
+      'is reached, new events are dropped until the queued ones are sent. ' +
+      'Command responses are never dropped. Dropped events are not ' +
+      'reported to the client. Default is 0, which means no limit.',
+    type: 'int',
+    default: process.env['MAX_QUEUED_EVENTS'] || 0,
+  });
+
+  parser.add_argument('-mbd', '--message-batch-delay', {
+    help:
+      'Milliseconds for which the mapper accumulates outgoing messages and ' +
+      'sends them to the server at once. The client still gets a frame per ' +
+      'message. Default is 0, which sends each message immediately.',
+    type: 'int',
+    default: process.env['MESSAGE_BATCH_DELAY'] || 0,
+  });
+
+  parser.add_argument('-mbs', '--message-batch-size', {
+    help:
+      'Maximum number of messages in one batch, see ' +
+      '`--message-batch-delay`. Default is 100.',
+    type: 'int',
+    default: process.env['MESSAGE_BATCH_SIZE'] || 100,
+  });
+
   // `parse_known_args` puts known args in the first element of the result.
   const args = parser.parse_known_args();
   return args[0];
@@ -66,10 +153,57 @@ function parseArguments() {
     const bidiPort = args.port;
     const headless = args.headless !== 'false';
     const chromeChannel = args.channel;
+    const reuseBrowser = String(args.reuse_browser) === 'true';
+    const mapperOptions: MapperOptions = {
+      outOfOrderResponses: String(args.out_of_order_responses) === 'true',
+      maxQueuedEvents:
+        args.max_queued_events > 0 ? args.max_queued_events : undefined,
+      messageBatch:
+        args.message_batch_delay > 0
+          ? {
+              maxDelay: args.message_batch_delay,
+              maxSize: args.message_batch_size,
+            }
+          : undefined,
+    };
 
-    new BidiServerRunner().run(bidiPort, (bidiServer) => {
-      return onNewBidiConnectionOpen(headless, chromeChannel, bidiServer);
-    });
+    const launch = () =>
+      launchBrowserAndMapper(headless, chromeChannel, mapperOptions);
+    let getBrowserAndMapper = launch;
+    if (
+      !reuseBrowser &&
+      args.sessions_per_browser <= 1 &&
+      args.pool_size > 0
+    ) {
+      const pool = new BrowserPool<BrowserAndMapper>({
+        launch,
+        close: ({browser}) => browser.close(),
+        isHealthy: ({mapperServer}) =>
+          mapperServer.isAlive(HEALTH_CHECK_TIMEOUT),
+        size: args.pool_size,
+        idleTimeout: args.pool_idle_timeout,
+      });
+      getBrowserAndMapper = () => pool.acquire();
+    }
+
+    let onNewConnection = (bidiServer: ITransport) =>
+      onNewBidiConnectionOpen(getBrowserAndMapper, bidiServer);
+    if (reuseBrowser) {
+      onNewConnection = createReusedBrowserConnectionHandler(
+        headless,
+        chromeChannel,
+        mapperOptions
+      );
+    } else if (args.sessions_per_browser > 1) {
+      onNewConnection = createSharedBrowserConnectionHandler(
+        headless,
+        chromeChannel,
+        mapperOptions,
+        args.sessions_per_browser
+      );
+    }
+
+    new BidiServerRunner().run(bidiPort, onNewConnection);
     log('BiDi server launched');
   } catch (e) {
     log('Error', e);
@@ -83,36 +217,16 @@ function parseArguments() {
  * 3. Run `BiDi-CDP` mapper in launched browser.
  * 4. Bind `BiDi-CDP` mapper to the `BiDi server`.
  *
+ * @param getBrowserAndMapper performs steps 1-3, or takes a browser with the
+ * mapper already running from the pool.
  * @returns delegate to be called when the connection is closed
  */
 async function onNewBidiConnectionOpen(
-  headless: boolean,
-  chromeChannel: string,
+  getBrowserAndMapper: () => Promise<BrowserAndMapper>,
   bidiTransport: ITransport
 ): Promise<() => void> {
-  const browserLaunchOptions: any = {
-    headless,
-  };
-  if (chromeChannel) {
-    browserLaunchOptions.channel = chromeChannel;
-  }
-
-  // 1. Launch Chromium (using Puppeteer for now).
-  // Puppeteer should have downloaded Chromium during the installation.
-  // Use Puppeteer's logic of launching browser as well.
-  const browser = await puppeteer.launch(browserLaunchOptions);
-
-  // No need in Puppeteer being connected to browser.
-  browser.disconnect();
-
-  // 2. Get `BiDi-CDP` mapper JS binaries using `mapperReader`.
-  const bidiMapperScript = await mapperReader();
-
-  // 3. Run `BiDi-CDP` mapper in launched browser.
-  const mapperServer = await MapperServer.create(
-    browser.wsEndpoint(),
-    bidiMapperScript
-  );
+  // 1-3. Launch Chromium and run `BiDi-CDP` mapper in it.
+  const {browser, mapperServer} = await getBrowserAndMapper();
 
   // 4. Bind `BiDi-CDP` mapper to the `BiDi server`.
   // Forward messages from BiDi Mapper to the client.
@@ -131,3 +245,186 @@ async function onNewBidiConnectionOpen(
     await browser.close();
   };
 }
+
+/**
+ * Creates an `onNewBidiConnectionOpen` replacement, which launches Chromium
+ * and the mapper only for the first connection and reuses them for the
+ * following ones. Before a new connection is bound, the mapper state is reset:
+ * extra browsing contexts are closed, the remaining one is navigated to
+ * `about:blank`, and all the subscriptions, buffered events and handles are
+ * dropped. If the reset fails or takes longer than `RESET_TIMEOUT`, a new
+ * browser is launched instead.
+ *
+ * Only one connection at a time is supported, and further connections are
+ * rejected until it is closed. Messages the mapper sends while no connection
+ * is bound are dropped, and so are the messages of the previous session after
+ * the reset.
+ */
+function createReusedBrowserConnectionHandler(
+  headless: boolean,
+  chromeChannel: string,
+  mapperOptions: MapperOptions
+): (bidiTransport: ITransport) => Promise<() => void> {
+  let currentTransport: ITransport | null = null;
+  let connected = false;
+
+  const reusedBrowser = new ReusedBrowser<BrowserAndMapper>({
+    launch: async () => {
+      const result = await launchBrowserAndMapper(
+        headless,
+        chromeChannel,
+        mapperOptions
+      );
+      result.mapperServer.setOnMessage(async (message) => {
+        await currentTransport?.sendMessage(message);
+      });
+      return result;
+    },
+    close: ({browser}) => browser.close(),
+    reset: ({mapperServer}) => mapperServer.reset(),
+    resetTimeout: RESET_TIMEOUT,
+  });
+
+  return async (bidiTransport: ITransport) => {
+    if (connected) {
+      throw new Error(
+        'Only one connection at a time is supported with --reuse-browser.'
+      );
+    }
+    connected = true;
+
+    let mapperServer: MapperServer;
+    try {
+      ({mapperServer} = await reusedBrowser.acquire());
+    } catch (e) {
+      connected = false;
+      throw e;
+    }
+
+    currentTransport = bidiTransport;
+    bidiTransport.setOnMessage(async (message) => {
+      if (currentTransport === bidiTransport) {
+        await mapperServer.sendMessage(message);
+      }
+    });
+
+    return () => {
+      currentTransport = null;
+      connected = false;
+    };
+  };
+}
+
+/**
+ * Creates an `onNewBidiConnectionOpen` replacement, which lets up to
+ * `sessionsPerBrowser` connections share one Chromium. Each connection gets
+ * its own mapper tab, and its session is isolated in its own CDP browser
+ * context, so it only sees its own targets, events and realms. Closing the
+ * connection disposes of its browser context. The browser is closed when its
+ * last connection is closed.
+ */
+function createSharedBrowserConnectionHandler(
+  headless: boolean,
+  chromeChannel: string,
+  mapperOptions: MapperOptions,
+  sessionsPerBrowser: number
+): (bidiTransport: ITransport) => Promise<() => void> {
+  type SharedBrowser = {browser: Promise<Browser>; sessions: number};
+  const sharedBrowsers: SharedBrowser[] = [];
+
+  return async (bidiTransport: ITransport) => {
+    let shared = sharedBrowsers.find(
+      ({sessions}) => sessions < sessionsPerBrowser
+    );
+    if (shared === undefined) {
+      shared = {browser: launchBrowser(headless, chromeChannel), sessions: 0};
+      sharedBrowsers.push(shared);
+    }
+    const sharedBrowser = shared;
+    sharedBrowser.sessions++;
+
+    const release = async () => {
+      sharedBrowser.sessions--;
+      if (sharedBrowser.sessions === 0) {
+        sharedBrowsers.splice(sharedBrowsers.indexOf(sharedBrowser), 1);
+        await (await sharedBrowser.browser).close();
+      }
+    };
+
+    let mapperServer: MapperServer;
+    try {
+      const browser = await sharedBrowser.browser;
+      mapperServer = await MapperServer.create(
+        browser.wsEndpoint(),
+        await mapperReader(),
+        {...mapperOptions, isolated: true}
+      );
+    } catch (e) {
+      release().catch(() => {});
+      throw e;
+    }
+
+    mapperServer.setOnMessage(async (message) => {
+      await bidiTransport.sendMessage(message);
+    });
+    bidiTransport.setOnMessage(async (message) => {
+      await mapperServer.sendMessage(message);
+    });
+
+    return async () => {
+      try {
+        await mapperServer.dispose();
+      } catch (e) {
+        log('Disposing of the session failed.', e);
+      }
+      await release();
+    };
+  };
+}
+
+/**
+ * 1. Launch Chromium (using Puppeteer for now).
+ * 2. Get `BiDi-CDP` mapper JS binaries using `mapperReader`.
+ * 3. Run `BiDi-CDP` mapper in launched browser.
+ */
+async function launchBrowserAndMapper(
+  headless: boolean,
+  chromeChannel: string,
+  mapperOptions: MapperOptions
+): Promise<BrowserAndMapper> {
+  // 1. Launch Chromium (using Puppeteer for now).
+  const browser = await launchBrowser(headless, chromeChannel);
+
+  // 2. Get `BiDi-CDP` mapper JS binaries using `mapperReader`.
+  const bidiMapperScript = await mapperReader();
+
+  // 3. Run `BiDi-CDP` mapper in launched browser.
+  const mapperServer = await MapperServer.create(
+    browser.wsEndpoint(),
+    bidiMapperScript,
+    mapperOptions
+  );
+
+  return {browser, mapperServer};
+}
+
+async function launchBrowser(
+  headless: boolean,
+  chromeChannel: string
+): Promise<Browser> {
+  const browserLaunchOptions: any = {
+    headless,
+  };
+  if (chromeChannel) {
+    browserLaunchOptions.channel = chromeChannel;
+  }
+
+  // Puppeteer should have downloaded Chromium during the installation.
+  // Use Puppeteer's logic of launching browser as well.
+  const browser = await puppeteer.launch(browserLaunchOptions);
+
+  // No need in Puppeteer being connected to browser.
+  browser.disconnect();
+
+  return browser;
+}
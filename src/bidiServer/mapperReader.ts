@@ -18,9 +18,21 @@
 import fs from 'fs/promises';
 import path from 'path';
 
-export default async function read(): Promise<string> {
-  return await fs.readFile(
-    path.join(__dirname, '../../iife/mapperTab.js'),
-    'utf8'
-  );
+let mapperContent: Promise<string> | undefined;
+
+/**
+ * Reads the mapper bundle. It is read from disk once and kept in memory for
+ * all the sessions.
+ */
+export default function read(): Promise<string> {
+  if (mapperContent === undefined) {
+    mapperContent = fs
+      .readFile(path.join(__dirname, '../../iife/mapperTab.js'), 'utf8')
+      .catch((e) => {
+        // Retry on the next call.
+        mapperContent = undefined;
+        throw e;
+      });
+  }
+  return mapperContent;
 }
@@ -22,21 +22,81 @@ import debug from 'debug';
 
 const debugInternal = debug('bidiMapper:internal');
 const debugLog = debug('bidiMapper:log');
+const debugCdp = debug('bidiMapper:cdp');
+// Not logged on the server. Enables the CDP log on the mapper tab page.
+const debugMapperTabCdp = debug('bidiMapper:mapperTabCdp');
+
+/** Large CDP messages, like DOM snapshots, are truncated in the logs. */
+const CDP_LOG_MAX_LENGTH = 10000;
+
+/**
+ * Delivers a BiDi message to the mapper. The message is passed as an argument
+ * instead of being embedded into a script, and the function source is the
+ * same for every message, so V8 does not compile a new script per message.
+ */
+const ON_BIDI_MESSAGE_FUNCTION =
+  'function (message) { this.onBidiMessage(message); }';
+
+type MapperTarget = {
+  mapperCdpClient: CdpClient;
+  mapperTargetId: string;
+  /** Remote object id of the mapper tab's `window`. */
+  mapperWindowObjectId: string;
+  browserContextId?: string;
+};
+
+export type MapperOptions = {
+  /**
+   * If true, the session is isolated in a new CDP browser context with one
+   * initial tab, so that several sessions can share the browser. The mapper
+   * tab itself stays in the default browser context.
+   */
+  isolated?: boolean;
+  /**
+   * If true, command responses are sent as soon as they are ready instead of
+   * in the order of the commands.
+   */
+  outOfOrderResponses?: boolean;
+  /**
+   * Maximum number of events waiting in the mapper to be sent. Unbounded if
+   * not set.
+   */
+  maxQueuedEvents?: number;
+  /**
+   * If set, the mapper sends its outgoing messages in batches of up to
+   * `maxSize` messages, delayed by up to `maxDelay` milliseconds.
+   */
+  messageBatch?: {maxDelay: number; maxSize: number};
+};
 
 export class MapperServer {
   private handlers: ((message: string) => void)[] = [];
 
   static async create(
     cdpUrl: string,
-    mapperContent: string
+    mapperContent: string,
+    options: MapperOptions = {}
   ): Promise<MapperServer> {
+    const start = performance.now();
     const cdpConnection = await this.establishCdpConnection(cdpUrl);
     try {
-      const mapperCdpClient = await this.initMapper(
+      const {
+        mapperCdpClient,
+        mapperTargetId,
+        mapperWindowObjectId,
+        browserContextId,
+      } = await this.initMapper(cdpConnection, mapperContent, options);
+      debugInternal(
+        'Mapper launched in %dms.',
+        Math.round(performance.now() - start)
+      );
+      return new MapperServer(
         cdpConnection,
-        mapperContent
+        mapperCdpClient,
+        mapperTargetId,
+        mapperWindowObjectId,
+        browserContextId
       );
-      return new MapperServer(cdpConnection, mapperCdpClient);
     } catch (e) {
       cdpConnection.close();
       throw e;
@@ -45,7 +105,10 @@ export class MapperServer {
 
   private constructor(
     private cdpConnection: CdpConnection,
-    private mapperCdpClient: CdpClient
+    private mapperCdpClient: CdpClient,
+    private mapperTargetId: string,
+    private mapperWindowObjectId: string,
+    private browserContextId?: string
   ) {
     this.mapperCdpClient.on('Runtime.bindingCalled', this.onBindingCalled);
     this.mapperCdpClient.on(
@@ -64,6 +127,67 @@ export class MapperServer {
     this.cdpConnection.close();
   }
 
+  /**
+   * Closes the session browser context with all its tabs and the mapper tab,
+   * leaving the browser running for other sessions.
+   */
+  async dispose(): Promise<void> {
+    const browserClient = this.cdpConnection.browserClient();
+    try {
+      if (this.browserContextId !== undefined) {
+        await browserClient.sendCommand('Target.disposeBrowserContext', {
+          browserContextId: this.browserContextId,
+        });
+      }
+      await browserClient.sendCommand('Target.closeTarget', {
+        targetId: this.mapperTargetId,
+      });
+    } finally {
+      this.close();
+    }
+  }
+
+  /**
+   * Checks that the mapper tab responds within the given timeout.
+   */
+  async isAlive(timeout: number): Promise<boolean> {
+    let timer: ReturnType<typeof setTimeout> | undefined;
+    const timeoutPromise = new Promise<boolean>((resolve) => {
+      timer = setTimeout(() => resolve(false), timeout);
+    });
+    const pingPromise = this.mapperCdpClient
+      .sendCommand('Runtime.evaluate', {expression: '1'})
+      .then(
+        () => true,
+        () => false
+      );
+    try {
+      return await Promise.race([pingPromise, timeoutPromise]);
+    } finally {
+      clearTimeout(timer);
+    }
+  }
+
+  /**
+   * Resets the mapper state, so that it can be reused for a new BiDi session.
+   */
+  async reset(): Promise<void> {
+    const {exceptionDetails} = await this.mapperCdpClient.sendCommand(
+      'Runtime.evaluate',
+      {
+        expression: 'window.resetBidiState()',
+        awaitPromise: true,
+      }
+    );
+    if (exceptionDetails) {
+      throw new Error(
+        `Mapper reset failed: ${
+          exceptionDetails.exception?.description ?? exceptionDetails.text
+        }`
+      );
+    }
+  }
+
   private static async establishCdpConnection(
     cdpUrl: string
   ): Promise<CdpConnection> {
@@ -78,15 +202,22 @@ export class MapperServer {
         debugInternal('Session established.');
 
         const transport = new WebSocketTransport(ws);
-        const connection = new CdpConnection(transport);
+        // CDP messages are only formatted if the namespace is enabled.
+        const connection = new CdpConnection(
+          transport,
+          debugCdp.enabled ? debugCdp : undefined,
+          {logMaxLength: CDP_LOG_MAX_LENGTH}
+        );
         resolve(connection);
       });
     });
   }
 
   private async sendBidiMessage(bidiMessageJson: string): Promise<void> {
-    await this.mapperCdpClient.sendCommand('Runtime.evaluate', {
-      expression: `onBidiMessage(${JSON.stringify(bidiMessageJson)})`,
+    await this.mapperCdpClient.sendCommand('Runtime.callFunctionOn', {
+      functionDeclaration: ON_BIDI_MESSAGE_FUNCTION,
+      objectId: this.mapperWindowObjectId,
+      arguments: [{value: bidiMessageJson}],
     });
   }
 
@@ -98,7 +229,11 @@ export class MapperServer {
     params: Protocol.Runtime.BindingCalledEvent
   ) => {
     if (params.name === 'sendBidiResponse') {
-      this.onBidiMessage(params.payload);
+      // Batched messages are separated by new lines, which serialized JSON
+      // can't contain.
+      for (const message of params.payload.split('\n')) {
+        this.onBidiMessage(message);
+      }
     }
   };
 
@@ -114,17 +249,76 @@ export class MapperServer {
 
   private static async initMapper(
     cdpConnection: CdpConnection,
-    mapperContent: string
-  ): Promise<CdpClient> {
+    mapperContent: string,
+    options: MapperOptions
+  ): Promise<MapperTarget> {
     debugInternal('Connection opened.');
 
     // await browserClient.Log.enable();
 
     const browserClient = cdpConnection.browserClient();
 
-    const {targetId} = await browserClient.sendCommand('Target.createTarget', {
-      url: 'about:blank',
-    });
+    if (!options.isolated) {
+      const {targetId} = await browserClient.sendCommand(
+        'Target.createTarget',
+        {url: 'about:blank'}
+      );
+      return await this.initMapperTab(
+        cdpConnection,
+        targetId,
+        mapperContent,
+        options
+      );
+    }
+
+    const {browserContextId} = await browserClient.sendCommand(
+      'Target.createBrowserContext'
+    );
+    let mapperTargetId: string | undefined;
+    try {
+      // The initial tab of the session.
+      await browserClient.sendCommand('Target.createTarget', {
+        url: 'about:blank',
+        browserContextId,
+      });
+      ({targetId: mapperTargetId} = await browserClient.sendCommand(
+        'Target.createTarget',
+        {url: 'about:blank'}
+      ));
+      return await this.initMapperTab(
+        cdpConnection,
+        mapperTargetId,
+        mapperContent,
+        options,
+        browserContextId
+      );
+    } catch (e) {
+      // The browser is shared with other sessions, so the tabs of the failed
+      // session would stay open.
+      await browserClient
+        .sendCommand('Target.disposeBrowserContext', {browserContextId})
+        .catch((error) => {
+          debugInternal('Disposing browser context failed.', error);
+        });
+      if (mapperTargetId !== undefined) {
+        await browserClient
+          .sendCommand('Target.closeTarget', {targetId: mapperTargetId})
+          .catch((error) => {
+            debugInternal('Closing mapper tab failed.', error);
+          });
+      }
+      throw e;
+    }
+  }
+
+  private static async initMapperTab(
+    cdpConnection: CdpConnection,
+    targetId: string,
+    mapperContent: string,
+    options: MapperOptions,
+    browserContextId?: string
+  ): Promise<MapperTarget> {
+    const browserClient = cdpConnection.browserClient();
     const {sessionId: mapperSessionId} = await browserClient.sendCommand(
       'Target.attachToTarget',
       {targetId, flatten: true}
@@ -154,8 +348,8 @@ export class MapperServer {
         // Needed to check when Mapper is launched on the frontend.
         if (name === 'sendBidiResponse') {
           try {
-            const parsed = JSON.parse(payload);
-            if (parsed.launched) {
+            const messages = payload.split('\n').map((m) => JSON.parse(m));
+            if (messages.some((parsed) => parsed.launched)) {
               mapperCdpClient.off('Runtime.bindingCalled', onBindingCalled);
               resolve();
             }
@@ -172,13 +366,38 @@ export class MapperServer {
       expression: mapperContent,
     });
 
-    // Let Mapper know what is it's TargetId to filter out related targets.
+    // Let Mapper know what is it's TargetId to filter out related targets, and
+    // pass the session options.
+    const sessionOptions = {
+      browserContextId,
+      outOfOrderResponses: options.outOfOrderResponses,
+      maxQueuedEvents: options.maxQueuedEvents,
+      messageBatch: options.messageBatch,
+      logCdp: debugMapperTabCdp.enabled,
+    };
     await mapperCdpClient.sendCommand('Runtime.evaluate', {
-      expression: `window.setSelfTargetId(${JSON.stringify(targetId)})`,
+      expression: `window.setSelfTargetId(${JSON.stringify(
+        targetId
+      )}, ${JSON.stringify(sessionOptions)})`,
     });
 
     await launchedPromise;
     debugInternal('Launched!');
-    return mapperCdpClient;
+
+    // The mapper tab never navigates, so the object id stays valid.
+    const {result: mapperWindow} = await mapperCdpClient.sendCommand(
+      'Runtime.evaluate',
+      {expression: 'window'}
+    );
+    if (mapperWindow.objectId === undefined) {
+      throw new Error('Unable to get mapper window object');
+    }
+
+    return {
+      mapperCdpClient,
+      mapperTargetId: targetId,
+      mapperWindowObjectId: mapperWindow.objectId,
+      browserContextId,
+    };
   }
 }
@@ -0,0 +1,105 @@
+/**
+ * Copyright 2023 Google LLC.
+ * Copyright (c) Microsoft Corporation.
+ *
+ * Licensed under the Apache License, Version 2.0 (the "License");
+ * you may not use this file except in compliance with the License.
+ * You may obtain a copy of the License at
+ *
+ *     http://www.apache.org/licenses/LICENSE-2.0
+ *
+ * Unless required by applicable law or agreed to in writing, software
+ * distributed under the License is distributed on an "AS IS" BASIS,
+ * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ * See the License for the specific language governing permissions and
+ * limitations under the License.
+ */
+
+import * as chai from 'chai';
+import * as sinon from 'sinon';
+import {Deferred} from '../utils/deferred.js';
+import {ReusedBrowser} from './reusedBrowser.js';
+import chaiAsPromised from 'chai-as-promised';
+
+chai.use(chaiAsPromised);
+const expect = chai.expect;
+
+describe('test ReusedBrowser', () => {
+  let launchedCount: number;
+  let launch: sinon.SinonSpy<[], Promise<number>>;
+  let close: sinon.SinonSpy<[number], Promise<void>>;
+  let reset: sinon.SinonStub<[number], Promise<void>>;
+
+  beforeEach(() => {
+    launchedCount = 0;
+    launch = sinon.spy(() => Promise.resolve(++launchedCount));
+    close = sinon.spy(() => Promise.resolve());
+    reset = sinon.stub<[number], Promise<void>>().resolves();
+  });
+
+  function createReusedBrowser() {
+    return new ReusedBrowser<number>({
+      launch,
+      close,
+      reset,
+      resetTimeout: 1000,
+    });
+  }
+
+  it('should launch browser once and reset it for next sessions', async () => {
+    const reusedBrowser = createReusedBrowser();
+
+    expect(await reusedBrowser.acquire()).to.equal(1);
+    sinon.assert.notCalled(reset);
+
+    expect(await reusedBrowser.acquire()).to.equal(1);
+    expect(await reusedBrowser.acquire()).to.equal(1);
+    sinon.assert.calledOnce(launch);
+    sinon.assert.calledTwice(reset);
+    sinon.assert.notCalled(close);
+  });
+
+  it('should launch new browser if reset fails', async () => {
+    const reusedBrowser = createReusedBrowser();
+    await reusedBrowser.acquire();
+    reset.rejects(new Error('Reset failed'));
+
+    expect(await reusedBrowser.acquire()).to.equal(2);
+
+    sinon.assert.calledOnceWithExactly(close, 1);
+    // The new browser is not reset for the session it is launched for.
+    sinon.assert.calledOnce(reset);
+  });
+
+  it('should launch new browser if reset times out', async () => {
+    const clock = sinon.useFakeTimers();
+    try {
+      const reusedBrowser = createReusedBrowser();
+      await reusedBrowser.acquire();
+      reset.returns(new Deferred<void>());
+
+      const acquired = reusedBrowser.acquire();
+      await clock.tickAsync(999);
+      sinon.assert.notCalled(close);
+
+      await clock.tickAsync(1);
+      expect(await acquired).to.equal(2);
+      sinon.assert.calledOnceWithExactly(close, 1);
+
+      // The new browser is reused.
+      reset.resolves();
+      expect(await reusedBrowser.acquire()).to.equal(2);
+    } finally {
+      clock.restore();
+    }
+  });
+
+  it('should launch again after failed launch', async () => {
+    launch = sinon.spy(() => Promise.reject(new Error('Launch failed')));
+    const reusedBrowser = createReusedBrowser();
+
+    await expect(reusedBrowser.acquire()).to.be.rejectedWith('Launch failed');
+    await expect(reusedBrowser.acquire()).to.be.rejectedWith('Launch failed');
+    sinon.assert.calledTwice(launch);
+  });
+});
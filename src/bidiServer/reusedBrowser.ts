@@ -0,0 +1,105 @@
+/**
+ * Copyright 2023 Google LLC.
+ * Copyright (c) Microsoft Corporation.
+ *
+ * Licensed under the Apache License, Version 2.0 (the "License");
+ * you may not use this file except in compliance with the License.
+ * You may obtain a copy of the License at
+ *
+ *     http://www.apache.org/licenses/LICENSE-2.0
+ *
+ * Unless required by applicable law or agreed to in writing, software
+ * distributed under the License is distributed on an "AS IS" BASIS,
+ * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ * See the License for the specific language governing permissions and
+ * limitations under the License.
+ */
+
+import debug from 'debug';
+
+const log = debug('bidiServer:log');
+
+export interface ReusedBrowserOptions<T> {
+  /** Launches a new browser with the mapper running in it. */
+  launch: () => Promise<T>;
+  /** Closes the browser. */
+  close: (browser: T) => Promise<void>;
+  /** Resets the browser state, so that it can be used by a new session. */
+  reset: (browser: T) => Promise<void>;
+  /**
+   * Milliseconds after which a reset is considered stuck, and a new browser is
+   * launched instead.
+   */
+  resetTimeout: number;
+}
+
+/**
+ * Launches a browser only once and reuses it for the following sessions. The
+ * browser is reset before it is handed out again. If the reset fails or does
+ * not finish within `resetTimeout`, for example because a page is stuck, the
+ * browser is closed and a new one is launched instead.
+ */
+export class ReusedBrowser<T> {
+  readonly #options: ReusedBrowserOptions<T>;
+  #launched: Promise<T> | null = null;
+  #isFresh = false;
+
+  constructor(options: ReusedBrowserOptions<T>) {
+    this.#options = options;
+  }
+
+  /**
+   * Returns the browser ready for a new session. Only one session can use it
+   * at a time.
+   */
+  async acquire(): Promise<T> {
+    const browser = await (this.#launched ?? this.#launch());
+    if (this.#isFresh) {
+      this.#isFresh = false;
+      return browser;
+    }
+
+    try {
+      await this.#reset(browser);
+      return browser;
+    } catch (e) {
+      log('Browser reset failed. Launching new browser.', e);
+      this.#options.close(browser).catch((error) => {
+        log('Closing browser failed.', error);
+      });
+      const relaunched = await this.#launch();
+      this.#isFresh = false;
+      return relaunched;
+    }
+  }
+
+  #launch(): Promise<T> {
+    this.#isFresh = true;
+    const launched = this.#options.launch();
+    this.#launched = launched;
+    launched.catch(() => {
+      if (this.#launched === launched) {
+        this.#launched = null;
+      }
+    });
+    return launched;
+  }
+
+  async #reset(browser: T): Promise<void> {
+    let timer: ReturnType<typeof setTimeout> | undefined;
+    const timeoutPromise = new Promise<void>((_, reject) => {
+      timer = setTimeout(
+        () =>
+          reject(
+            new Error(`Reset timed out after ${this.#options.resetTimeout}ms`)
+          ),
+        this.#options.resetTimeout
+      );
+    });
+    try {
+      await Promise.race([this.#options.reset(browser), timeoutPromise]);
+    } finally {
+      clearTimeout(timer);
+    }
+  }
+}
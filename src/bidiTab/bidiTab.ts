@@ -18,6 +18,7 @@
  */
 
 import * as Parser from '../protocol-parser/protocol-parser.js';
+import {BidiServer, BidiServerOptions} from '../bidiMapper/BidiServer.js';
 import type {
   BrowsingContext,
   CDP,
@@ -27,13 +28,29 @@ import type {
 } from '../protocol/protocol';
 import {generatePage, log} from './mapperTabPage.js';
 import {BidiParser} from '../bidiMapper/CommandProcessor.js';
-import {BidiServer} from '../bidiMapper/BidiServer.js';
 import {BidiTransport} from '../bidiMapper/bidiMapper.js';
 import {CdpConnection} from '../cdp/index.js';
 import {ITransport} from '../utils/transport.js';
 import {LogType} from '../utils/log.js';
 import {OutgoingBidiMessage} from '../bidiMapper/OutgoingBidiMessage.js';
 
+/** Options of the mapper tab, passed by the server with `setSelfTargetId`. */
+type MapperTabOptions = BidiServerOptions & {
+  /**
+   * If set, outgoing messages are sent to the server in batches of up to
+   * `maxSize` messages, delayed by up to `maxDelay` milliseconds.
+   */
+  messageBatch?: MessageBatchOptions;
+  /**
+   * If true, the CDP messages of the mapper are logged on the mapper tab page,
+   * truncated to `CDP_LOG_MAX_LENGTH` characters. Otherwise, they are not even
+   * formatted.
+   */
+  logCdp?: boolean;
+};
+
+type MessageBatchOptions = {maxDelay: number; maxSize: number};
+
 declare global {
   interface Window {
     // `window.cdp` is exposed by `Target.exposeDevToolsProtocol` from the server side.
@@ -46,11 +63,15 @@ declare global {
     // `window.sendBidiResponse` is exposed by `Runtime.addBinding` from the server side.
     sendBidiResponse: (response: string) => void;
 
-    // `window.onBidiMessage` is called via `Runtime.evaluate` from the server side.
+    // `window.onBidiMessage` is called via `Runtime.callFunctionOn` from the server side.
     onBidiMessage: ((message: string) => void) | null;
 
     // `window.setSelfTargetId` is called via `Runtime.evaluate` from the server side.
-    setSelfTargetId: (targetId: string) => void;
+    setSelfTargetId: (targetId: string, options?: MapperTabOptions) => void;
+
+    // `window.resetBidiState` is called via `Runtime.evaluate` from the server
+    // side before the mapper is reused for a new BiDi session.
+    resetBidiState: () => Promise<void>;
   }
 }
 
@@ -61,9 +82,19 @@ const waitSelfTargetIdPromise = waitSelfTargetId();
   generatePage();
 
   // Needed to filter out info related to BiDi target.
-  const selfTargetId = await waitSelfTargetIdPromise;
+  const {selfTargetId, options} = await waitSelfTargetIdPromise;
+
+  const {bidiServer, bidiTransport} = await createBidiServer(
+    selfTargetId,
+    options
+  );
 
-  const bidiServer = await createBidiServer(selfTargetId);
+  window.resetBidiState = async () => {
+    log(LogType.system, 'Resetting state');
+    // The batched messages belong to the previous session.
+    bidiTransport.dropMessageBatch();
+    await bidiServer.reset();
+  };
 
   log(LogType.system, 'Launched');
 
@@ -72,7 +103,10 @@ const waitSelfTargetIdPromise = waitSelfTargetId();
   );
 })();
 
-function createCdpConnection() {
+/** Longer CDP messages are logged truncated and not pretty-printed. */
+const CDP_LOG_MAX_LENGTH = 1000;
+
+function createCdpConnection(logCdp: boolean) {
   // A CdpTransport implementation that uses the window.cdp bindings
   // injected by Target.exposeDevToolsProtocol.
   class WindowCdpTransport implements ITransport {
@@ -102,18 +136,28 @@ function createCdpConnection() {
 
   return new CdpConnection(
     new WindowCdpTransport(),
-    (...messages: unknown[]) => {
-      log(LogType.cdp, ...messages);
-    }
+    logCdp
+      ? (...messages: unknown[]) => {
+          log(LogType.cdp, ...messages);
+        }
+      : undefined,
+    {logMaxLength: CDP_LOG_MAX_LENGTH}
   );
 }
 
-async function createBidiServer(selfTargetId: string) {
+async function createBidiServer(
+  selfTargetId: string,
+  options?: MapperTabOptions
+) {
   class WindowBidiTransport implements BidiTransport {
     private onMessage: ((message: Message.RawCommandRequest) => void) | null =
       null;
+    readonly #messageBatchOptions?: MessageBatchOptions;
+    #messageBatch: string[] = [];
+    #messageBatchTimer?: ReturnType<typeof setTimeout>;
 
-    constructor() {
+    constructor(messageBatchOptions?: MessageBatchOptions) {
+      this.#messageBatchOptions = messageBatchOptions;
       window.onBidiMessage = (messageStr: string) => {
         log(LogType.bidi, 'received ◂', messageStr);
         let messageObj;
@@ -143,15 +187,49 @@ async function createBidiServer(selfTargetId: string) {
 
     async sendMessage(message: Message.OutgoingMessage): Promise<void> {
       const messageStr = JSON.stringify(message);
-      window.sendBidiResponse(messageStr);
+      if (this.#messageBatchOptions === undefined) {
+        window.sendBidiResponse(messageStr);
+      } else {
+        this.#addToMessageBatch(messageStr, this.#messageBatchOptions);
+      }
       log(LogType.bidi, 'sent ▸', messageStr);
     }
 
     close() {
+      this.#flushMessageBatch();
       this.onMessage = null;
       window.onBidiMessage = null;
     }
 
+    #addToMessageBatch(messageStr: string, batchOptions: MessageBatchOptions) {
+      this.#messageBatch.push(messageStr);
+      if (this.#messageBatch.length >= batchOptions.maxSize) {
+        this.#flushMessageBatch();
+      } else if (this.#messageBatchTimer === undefined) {
+        this.#messageBatchTimer = setTimeout(
+          () => this.#flushMessageBatch(),
+          batchOptions.maxDelay
+        );
+      }
+    }
+
+    /** Drops the batched messages which are not sent yet. */
+    dropMessageBatch() {
+      clearTimeout(this.#messageBatchTimer);
+      this.#messageBatchTimer = undefined;
+      this.#messageBatch = [];
+    }
+
+    #flushMessageBatch() {
+      clearTimeout(this.#messageBatchTimer);
+      this.#messageBatchTimer = undefined;
+      if (this.#messageBatch.length > 0) {
+        // Serialized JSON can't contain new lines, so they separate messages.
+        window.sendBidiResponse(this.#messageBatch.join('\n'));
+        this.#messageBatch = [];
+      }
+    }
+
     #respondWithError(
       plainCommandData: string,
       errorCode: Message.ErrorCode,
@@ -260,13 +338,16 @@ async function createBidiServer(selfTargetId: string) {
     }
   }
 
-  return await BidiServer.createAndStart(
-    new WindowBidiTransport(),
-    createCdpConnection(),
+  const bidiTransport = new WindowBidiTransport(options?.messageBatch);
+  const bidiServer = await BidiServer.createAndStart(
+    bidiTransport,
+    createCdpConnection(options?.logCdp ?? false),
     selfTargetId,
     new BidiParserImpl(),
-    log
+    log,
+    options
   );
+  return {bidiServer, bidiTransport};
 }
 
 class BidiParserImpl implements BidiParser {
@@ -306,11 +387,15 @@ class BidiParserImpl implements BidiParser {
 }
 
 // Needed to filter out info related to BiDi target.
-async function waitSelfTargetId(): Promise<string> {
+async function waitSelfTargetId(): Promise<{
+  selfTargetId: string;
+  options?: MapperTabOptions;
+}> {
   return await new Promise((resolve) => {
-    window.setSelfTargetId = (targetId) => {
+    window.setSelfTargetId = (targetId, options) => {
       log(LogType.system, 'Current target ID:', targetId);
-      resolve(targetId);
+      log(LogType.system, 'Session options:', options);
+      resolve({selfTargetId: targetId, options});
     };
   });
 }
@@ -153,6 +153,113 @@ describe('CdpConnection', () => {
     otherSessionCallback.resetHistory();
   });
 
+  it('does not format messages without log function', async () => {
+    const mockCdpServer = new StubTransport();
+    new CdpConnection(mockCdpServer);
+    const stringify = sinon.spy(JSON, 'stringify');
+
+    try {
+      await mockCdpServer.emulateIncomingMessage({
+        method: 'Target.targetCreated',
+        params: {},
+      });
+    } finally {
+      stringify.restore();
+    }
+
+    sinon.assert.neverCalledWith(stringify, sinon.match.any, null, 2);
+  });
+
+  it('samples and truncates logged messages', async () => {
+    const mockCdpServer = new StubTransport();
+    const log = sinon.spy();
+    new CdpConnection(mockCdpServer, log, {
+      logSampleInterval: 2,
+      logMaxLength: 10,
+    });
+
+    for (let i = 0; i < 3; i++) {
+      await mockCdpServer.emulateIncomingMessage({
+        method: 'Target.targetCreated',
+        params: {},
+      });
+    }
+
+    sinon.assert.calledTwice(log);
+    sinon.assert.alwaysCalledWithExactly(
+      log,
+      'received ◂',
+      '{"method":… (35 more characters)'
+    );
+  });
+
+  it('forgets commands once they are responded', async () => {
+    const mockCdpServer = new StubTransport();
+    const cdpConnection = new CdpConnection(mockCdpServer);
+
+    const withResult = cdpConnection.browserClient().sendCommand(
+      'Browser.getVersion'
+    );
+    const withoutResult = cdpConnection.browserClient().sendCommand(
+      'Browser.getVersion'
+    );
+    chai.assert.equal(cdpConnection.pendingCommandCount, 2);
+
+    await mockCdpServer.emulateIncomingMessage({id: 0, result: {}});
+    await mockCdpServer.emulateIncomingMessage({id: 1});
+
+    await chai.assert.eventually.deepEqual(withResult, {});
+    await chai.assert.eventually.deepEqual(withoutResult, {});
+    chai.assert.equal(cdpConnection.pendingCommandCount, 0);
+    chai.assert.equal(cdpConnection.completedCommandCount, 2);
+  });
+
+  it('rejects commands after the timeout', async () => {
+    const clock = sinon.useFakeTimers();
+    try {
+      const mockCdpServer = new StubTransport();
+      const cdpConnection = new CdpConnection(mockCdpServer, undefined, {
+        commandTimeout: 100,
+      });
+
+      const command = cdpConnection.browserClient().sendCommand(
+        'Browser.getVersion'
+      );
+      clock.tick(100);
+
+      await chai.assert.isRejected(command, 'timed out');
+      chai.assert.equal(cdpConnection.pendingCommandCount, 0);
+      chai.assert.equal(cdpConnection.timedOutCommandCount, 1);
+    } finally {
+      clock.restore();
+    }
+  });
+
+  it('rejects commands of a detached session', async () => {
+    const mockCdpServer = new StubTransport();
+    const cdpConnection = new CdpConnection(mockCdpServer);
+    await mockCdpServer.emulateIncomingMessage({
+      method: 'Target.attachedToTarget',
+      params: {sessionId: SOME_SESSION_ID},
+    });
+
+    const sessionCommand = cdpConnection
+      .getCdpClient(SOME_SESSION_ID)
+      .sendCommand('Runtime.enable');
+    const browserCommand = cdpConnection.browserClient().sendCommand(
+      'Browser.getVersion'
+    );
+    await mockCdpServer.emulateIncomingMessage({
+      method: 'Target.detachedFromTarget',
+      params: {sessionId: SOME_SESSION_ID},
+    });
+
+    await chai.assert.isRejected(sessionCommand, 'detached');
+    chai.assert.equal(cdpConnection.pendingCommandCount, 1);
+    await mockCdpServer.emulateIncomingMessage({id: 1, result: {}});
+    await chai.assert.eventually.deepEqual(browserCommand, {});
+  });
+
   it('closes the transport connection when closed', () => {
     const mockCdpServer = new StubTransport();
     const cdpConnection = new CdpConnection(mockCdpServer);
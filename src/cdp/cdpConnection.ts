@@ -21,6 +21,25 @@ import {ITransport} from '../utils/transport.js';
 interface CdpCallbacks {
   resolve: (messageObj: object) => void;
   reject: (errorObj: object) => void;
+  sessionId: string | null;
+  timeoutId?: ReturnType<typeof setTimeout>;
+}
+
+export interface CdpConnectionOptions {
+  /**
+   * Only one of every `logSampleInterval` messages is logged. Defaults to 1.
+   */
+  logSampleInterval?: number;
+  /**
+   * Messages longer than `logMaxLength` are logged truncated and not
+   * pretty-printed. Not limited by default.
+   */
+  logMaxLength?: number;
+  /**
+   * Milliseconds after which a command without response is rejected. Not
+   * limited by default.
+   */
+  commandTimeout?: number;
 }
 
 /**
@@ -32,16 +51,25 @@ export class CdpConnection {
   readonly #browserCdpClient: CdpClient;
   readonly #sessionCdpClients: Map<string, CdpClient> = new Map();
   readonly #commandCallbacks: Map<number, CdpCallbacks> = new Map();
-  readonly #log: (...messages: unknown[]) => void;
+  readonly #log?: (...messages: unknown[]) => void;
+  readonly #options: CdpConnectionOptions;
 
   #nextId = 0;
+  #messageCount = 0;
+  #completedCommandCount = 0;
+  #timedOutCommandCount = 0;
 
+  /**
+   * @param log If not provided, messages are not formatted for logging at all.
+   */
   constructor(
     transport: ITransport,
-    log: (...messages: unknown[]) => void = () => {}
+    log?: (...messages: unknown[]) => void,
+    options: CdpConnectionOptions = {}
   ) {
     this.#transport = transport;
     this.#log = log;
+    this.#options = options;
     this.#transport.setOnMessage(this.onMessage);
     this.#browserCdpClient = createClient(this, null);
   }
@@ -51,13 +79,27 @@ export class CdpConnection {
    */
   close() {
     this.#transport.close();
-    for (const [, {reject}] of this.#commandCallbacks) {
-      reject(new Error('Disconnected'));
+    for (const [id] of this.#commandCallbacks) {
+      this.#takeCommandCallbacks(id)?.reject(new Error('Disconnected'));
     }
-    this.#commandCallbacks.clear();
     this.#sessionCdpClients.clear();
   }
 
+  /** Number of commands waiting for a response. */
+  get pendingCommandCount(): number {
+    return this.#commandCallbacks.size;
+  }
+
+  /** Number of commands which got a response. */
+  get completedCommandCount(): number {
+    return this.#completedCommandCount;
+  }
+
+  /** Number of commands rejected after `commandTimeout`. */
+  get timedOutCommandCount(): number {
+    return this.#timedOutCommandCount;
+  }
+
   /**
    * @returns The CdpClient object attached to the root browser session.
    */
@@ -85,23 +127,31 @@ export class CdpConnection {
   ): Promise<object> {
     return new Promise((resolve, reject) => {
       const id = this.#nextId++;
-      this.#commandCallbacks.set(id, {resolve, reject});
+      const callbacks: CdpCallbacks = {resolve, reject, sessionId};
+      const {commandTimeout} = this.#options;
+      if (commandTimeout !== undefined) {
+        callbacks.timeoutId = setTimeout(() => {
+          this.#timedOutCommandCount++;
+          this.#takeCommandCallbacks(id)?.reject(
+            new Error(`${method} timed out after ${commandTimeout}ms`)
+          );
+        }, commandTimeout);
+      }
+      this.#commandCallbacks.set(id, callbacks);
       const messageObj: CdpMessage = {id, method, params};
       if (sessionId) {
         messageObj.sessionId = sessionId;
       }
 
       const messageStr = JSON.stringify(messageObj);
-      const messagePretty = JSON.stringify(messageObj, null, 2);
       this.#transport.sendMessage(messageStr);
-      this.#log('sent ▸', messagePretty);
+      this.#logMessage('sent ▸', messageStr, messageObj);
     });
   }
 
   private onMessage = async (message: string) => {
     const parsed = JSON.parse(message);
-    const messagePretty = JSON.stringify(parsed, null, 2);
-    this.#log('received ◂', messagePretty);
+    this.#logMessage('received ◂', message, parsed);
 
     // Update client map if a session is attached or detached.
     // Listen for these events on every session.
@@ -114,16 +164,25 @@ export class CdpConnection {
       if (client) {
         this.#sessionCdpClients.delete(sessionId);
       }
+      // The detached session will never respond.
+      for (const [id, callbacks] of this.#commandCallbacks) {
+        if (callbacks.sessionId === sessionId) {
+          this.#takeCommandCallbacks(id)?.reject(
+            new Error(`Session ${sessionId} detached`)
+          );
+        }
+      }
     }
 
     if (parsed.id !== undefined) {
       // Handle command response.
-      const callbacks = this.#commandCallbacks.get(parsed.id);
+      const callbacks = this.#takeCommandCallbacks(parsed.id);
       if (callbacks) {
-        if (parsed.result) {
-          callbacks.resolve(parsed.result);
-        } else if (parsed.error) {
+        this.#completedCommandCount++;
+        if (parsed.error) {
           callbacks.reject(parsed.error);
+        } else {
+          callbacks.resolve(parsed.result ?? {});
         }
       }
     } else if (parsed.method) {
@@ -135,4 +194,39 @@ export class CdpConnection {
       }
     }
   };
+
+  /** Removes the callbacks of a finished command and stops its timeout. */
+  #takeCommandCallbacks(id: number): CdpCallbacks | undefined {
+    const callbacks = this.#commandCallbacks.get(id);
+    if (callbacks !== undefined) {
+      this.#commandCallbacks.delete(id);
+      clearTimeout(callbacks.timeoutId);
+    }
+    return callbacks;
+  }
+
+  /**
+   * Formats the message only if it is going to be logged. Messages above
+   * `logMaxLength` are cut from the raw string, so they are never serialized
+   * again.
+   */
+  #logMessage(prefix: string, messageStr: string, messageObj: object) {
+    if (this.#log === undefined) {
+      return;
+    }
+    const {logSampleInterval = 1, logMaxLength} = this.#options;
+    if (this.#messageCount++ % logSampleInterval !== 0) {
+      return;
+    }
+    if (logMaxLength !== undefined && messageStr.length > logMaxLength) {
+      this.#log(
+        prefix,
+        `${messageStr.slice(0, logMaxLength)}… (${
+          messageStr.length - logMaxLength
+        } more characters)`
+      );
+      return;
+    }
+    this.#log(prefix, JSON.stringify(messageObj, null, 2));
+  }
 }
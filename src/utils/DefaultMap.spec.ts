@@ -0,0 +1,41 @@
+/**
+ * Copyright 2023 Google LLC.
+ * Copyright (c) Microsoft Corporation.
+ *
+ * Licensed under the Apache License, Version 2.0 (the "License");
+ * you may not use this file except in compliance with the License.
+ * You may obtain a copy of the License at
+ *
+ *     http://www.apache.org/licenses/LICENSE-2.0
+ *
+ * Unless required by applicable law or agreed to in writing, software
+ * distributed under the License is distributed on an "AS IS" BASIS,
+ * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ * See the License for the specific language governing permissions and
+ * limitations under the License.
+ */
+
+import * as chai from 'chai';
+import {DefaultMap} from './DefaultMap.js';
+
+const expect = chai.expect;
+
+describe('test DefaultMap', () => {
+  it('should create and store default value', () => {
+    const map = new DefaultMap<string, number[]>(() => []);
+    map.get('key').push(1);
+    map.get('key').push(2);
+    expect(map.get('key')).to.deep.equal([1, 2]);
+    expect(map.size).to.equal(1);
+  });
+  it('should keep initial entries', () => {
+    const map = new DefaultMap<string, number>(() => 0, [['key', 1]]);
+    expect(map.get('key')).to.equal(1);
+    expect(map.get('another key')).to.equal(0);
+  });
+  it('should not create value on `has`', () => {
+    const map = new DefaultMap<string, number>(() => 0);
+    expect(map.has('key')).to.be.false;
+    expect(map.size).to.equal(0);
+  });
+});
@@ -0,0 +1,40 @@
+/**
+ * Copyright 2023 Google LLC.
+ * Copyright (c) Microsoft Corporation.
+ *
+ * Licensed under the Apache License, Version 2.0 (the "License");
+ * you may not use this file except in compliance with the License.
+ * You may obtain a copy of the License at
+ *
+ *     http://www.apache.org/licenses/LICENSE-2.0
+ *
+ * Unless required by applicable law or agreed to in writing, software
+ * distributed under the License is distributed on an "AS IS" BASIS,
+ * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ * See the License for the specific language governing permissions and
+ * limitations under the License.
+ */
+
+/**
+ * A subclass of Map whose `get` method creates, stores and returns a default
+ * value for missing keys. Allows nesting maps instead of building composite
+ * string keys.
+ */
+export class DefaultMap<K, V> extends Map<K, V> {
+  readonly #getDefaultValue: (key: K) => V;
+
+  constructor(
+    getDefaultValue: (key: K) => V,
+    entries?: readonly (readonly [K, V])[] | null
+  ) {
+    super(entries);
+    this.#getDefaultValue = getDefaultValue;
+  }
+
+  override get(key: K): V {
+    if (!this.has(key)) {
+      this.set(key, this.#getDefaultValue(key));
+    }
+    return super.get(key)!;
+  }
+}
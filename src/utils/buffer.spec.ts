@@ -42,4 +42,38 @@ describe('test Buffer', () => {
     buffer.add(3);
     sinon.assert.calledOnceWithExactly(onRemoved, 1);
   });
+  it('should keep order after wrapping around', () => {
+    const buffer = new Buffer<number>(3);
+    for (let i = 1; i <= 7; i++) {
+      buffer.add(i);
+    }
+    expect(Array.from(buffer)).to.deep.equal([5, 6, 7]);
+    expect(buffer.length).to.equal(3);
+  });
+  it('should not expose internal state', () => {
+    const buffer = new Buffer<number>(2);
+    buffer.add(1);
+    buffer.get().push(2);
+    expect(buffer.get()).to.deep.equal([1]);
+  });
+  it('should return values newer than id', () => {
+    const buffer = new Buffer<{id: number}>(3);
+    for (let id = 1; id <= 5; id++) {
+      buffer.add({id});
+    }
+    const newerThan = (id: number) =>
+      Array.from(buffer.newerThan(id, (value) => value.id)).map(
+        (value) => value.id
+      );
+    expect(newerThan(-Infinity)).to.deep.equal([3, 4, 5]);
+    expect(newerThan(3)).to.deep.equal([4, 5]);
+    expect(newerThan(5)).to.deep.equal([]);
+  });
+  it('should drop every value if capacity is 0', () => {
+    const onRemoved = sinon.mock();
+    const buffer = new Buffer<number>(0, onRemoved);
+    buffer.add(1);
+    expect(buffer.get()).to.deep.equal([]);
+    sinon.assert.calledOnceWithExactly(onRemoved, 1);
+  });
 });
@@ -16,12 +16,16 @@
  */
 
 /**
- * Implements a FIFO buffer with a fixed size.
+ * Implements a FIFO buffer with a fixed size. Backed by a circular array, so
+ * that adding and evicting elements are O(1).
  */
 export class Buffer<T> {
   readonly #capacity: number;
-  readonly #entries: T[] = [];
+  readonly #entries: (T | undefined)[];
   readonly #onItemRemoved: (value: T) => void;
+  /** Index of the oldest element. */
+  #start = 0;
+  #length = 0;
 
   /**
    * @param capacity
@@ -29,20 +33,72 @@ export class Buffer<T> {
    */
   constructor(capacity: number, onItemRemoved: (value: T) => void = () => {}) {
     this.#capacity = capacity;
+    this.#entries = new Array(capacity);
     this.#onItemRemoved = onItemRemoved;
   }
 
+  get length(): number {
+    return this.#length;
+  }
+
+  /**
+   * Returns a copy of the elements, from the oldest to the newest.
+   */
   get(): T[] {
-    return this.#entries;
+    return Array.from(this);
   }
 
   add(value: T): void {
-    this.#entries.push(value);
-    while (this.#entries.length > this.#capacity) {
-      const item = this.#entries.shift();
-      if (item !== undefined) {
-        this.#onItemRemoved(item);
+    if (this.#capacity === 0) {
+      this.#onItemRemoved(value);
+      return;
+    }
+    if (this.#length === this.#capacity) {
+      const item = this.#entries[this.#start] as T;
+      this.#entries[this.#start] = value;
+      this.#start = (this.#start + 1) % this.#capacity;
+      this.#onItemRemoved(item);
+      return;
+    }
+    this.#entries[(this.#start + this.#length) % this.#capacity] = value;
+    this.#length++;
+  }
+
+  /**
+   * Iterates over the elements, from the oldest to the newest.
+   */
+  *[Symbol.iterator](): IterableIterator<T> {
+    yield* this.#valuesFrom(0);
+  }
+
+  /**
+   * Iterates over the elements with an id greater than the given one, from
+   * the oldest to the newest. Expects the elements to be added in the
+   * ascending order of their ids, and finds the first one with a binary
+   * search.
+   */
+  *newerThan(id: number, getId: (value: T) => number): IterableIterator<T> {
+    let low = 0;
+    let high = this.#length;
+    while (low < high) {
+      const middle = (low + high) >>> 1;
+      if (getId(this.#at(middle)) > id) {
+        high = middle;
+      } else {
+        low = middle + 1;
       }
     }
+    yield* this.#valuesFrom(low);
+  }
+
+  *#valuesFrom(index: number): IterableIterator<T> {
+    for (let i = index; i < this.#length; i++) {
+      yield this.#at(i);
+    }
+  }
+
+  /** Returns the element at the given position counting from the oldest. */
+  #at(index: number): T {
+    return this.#entries[(this.#start + index) % this.#capacity] as T;
   }
 }
@@ -0,0 +1,54 @@
+/**
+ * Copyright 2023 Google LLC.
+ * Copyright (c) Microsoft Corporation.
+ *
+ * Licensed under the Apache License, Version 2.0 (the "License");
+ * you may not use this file except in compliance with the License.
+ * You may obtain a copy of the License at
+ *
+ *     http://www.apache.org/licenses/LICENSE-2.0
+ *
+ * Unless required by applicable law or agreed to in writing, software
+ * distributed under the License is distributed on an "AS IS" BASIS,
+ * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ * See the License for the specific language governing permissions and
+ * limitations under the License.
+ */
+
+import * as chai from 'chai';
+import {Deque} from './deque.js';
+
+const expect = chai.expect;
+
+describe('test Deque', () => {
+  it('should shift values in order', () => {
+    const deque = new Deque<number>();
+    deque.push(1);
+    deque.push(2);
+    deque.push(3);
+    expect(deque.length).to.equal(3);
+    expect(deque.shift()).to.equal(1);
+    expect(deque.shift()).to.equal(2);
+    expect(deque.shift()).to.equal(3);
+    expect(deque.shift()).to.be.undefined;
+    expect(deque.length).to.equal(0);
+  });
+  it('should pop values in reverse order', () => {
+    const deque = new Deque<number>();
+    deque.push(1);
+    deque.push(2);
+    expect(deque.pop()).to.equal(2);
+    expect(deque.pop()).to.equal(1);
+    expect(deque.pop()).to.be.undefined;
+  });
+  it('should be reusable after being emptied', () => {
+    const deque = new Deque<number>();
+    deque.push(1);
+    deque.shift();
+    deque.push(2);
+    deque.push(3);
+    deque.pop();
+    deque.push(4);
+    expect(Array.from(deque)).to.deep.equal([2, 4]);
+  });
+});
@@ -0,0 +1,86 @@
+/**
+ * Copyright 2023 Google LLC.
+ * Copyright (c) Microsoft Corporation.
+ *
+ * Licensed under the Apache License, Version 2.0 (the "License");
+ * you may not use this file except in compliance with the License.
+ * You may obtain a copy of the License at
+ *
+ *     http://www.apache.org/licenses/LICENSE-2.0
+ *
+ * Unless required by applicable law or agreed to in writing, software
+ * distributed under the License is distributed on an "AS IS" BASIS,
+ * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ * See the License for the specific language governing permissions and
+ * limitations under the License.
+ */
+
+type Node<T> = {
+  value: T;
+  previous: Node<T> | null;
+  next: Node<T> | null;
+};
+
+/**
+ * Double-ended queue backed by a doubly linked list. All the operations are
+ * O(1), unlike `Array.prototype.shift`.
+ */
+export class Deque<T> {
+  #head: Node<T> | null = null;
+  #tail: Node<T> | null = null;
+  #length = 0;
+
+  get length(): number {
+    return this.#length;
+  }
+
+  /** Adds the value to the end. */
+  push(value: T): void {
+    const node: Node<T> = {value, previous: this.#tail, next: null};
+    if (this.#tail === null) {
+      this.#head = node;
+    } else {
+      this.#tail.next = node;
+    }
+    this.#tail = node;
+    this.#length++;
+  }
+
+  /** Removes and returns the value from the end. */
+  pop(): T | undefined {
+    const node = this.#tail;
+    if (node === null) {
+      return undefined;
+    }
+    this.#tail = node.previous;
+    if (this.#tail === null) {
+      this.#head = null;
+    } else {
+      this.#tail.next = null;
+    }
+    this.#length--;
+    return node.value;
+  }
+
+  /** Removes and returns the value from the beginning. */
+  shift(): T | undefined {
+    const node = this.#head;
+    if (node === null) {
+      return undefined;
+    }
+    this.#head = node.next;
+    if (this.#head === null) {
+      this.#tail = null;
+    } else {
+      this.#head.previous = null;
+    }
+    this.#length--;
+    return node.value;
+  }
+
+  *[Symbol.iterator](): IterableIterator<T> {
+    for (let node = this.#head; node !== null; node = node.next) {
+      yield node.value;
+    }
+  }
+}
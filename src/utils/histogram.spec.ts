@@ -0,0 +1,44 @@
+/**
+ * Copyright 2023 Google LLC.
+ * Copyright (c) Microsoft Corporation.
+ *
+ * Licensed under the Apache License, Version 2.0 (the "License");
+ * you may not use this file except in compliance with the License.
+ * You may obtain a copy of the License at
+ *
+ *     http://www.apache.org/licenses/LICENSE-2.0
+ *
+ * Unless required by applicable law or agreed to in writing, software
+ * distributed under the License is distributed on an "AS IS" BASIS,
+ * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ * See the License for the specific language governing permissions and
+ * limitations under the License.
+ */
+
+import * as chai from 'chai';
+import {Histogram} from './histogram.js';
+
+const expect = chai.expect;
+
+describe('test Histogram', () => {
+  it('should count values per bucket', () => {
+    const histogram = new Histogram([10, 100]);
+    histogram.record(1);
+    histogram.record(10);
+    histogram.record(11);
+    histogram.record(1000);
+
+    expect(histogram.buckets).to.deep.equal([
+      {bound: 10, count: 2},
+      {bound: 100, count: 1},
+      {bound: Infinity, count: 1},
+    ]);
+    expect(histogram.count).to.equal(4);
+    expect(histogram.mean).to.equal(255.5);
+    expect(histogram.toString()).to.equal('≤10: 2, ≤100: 1, ≤Infinity: 1');
+  });
+
+  it('should have zero mean without values', () => {
+    expect(new Histogram([10]).mean).to.equal(0);
+  });
+});
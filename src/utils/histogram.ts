@@ -0,0 +1,66 @@
+/**
+ * Copyright 2023 Google LLC.
+ * Copyright (c) Microsoft Corporation.
+ *
+ * Licensed under the Apache License, Version 2.0 (the "License");
+ * you may not use this file except in compliance with the License.
+ * You may obtain a copy of the License at
+ *
+ *     http://www.apache.org/licenses/LICENSE-2.0
+ *
+ * Unless required by applicable law or agreed to in writing, software
+ * distributed under the License is distributed on an "AS IS" BASIS,
+ * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ * See the License for the specific language governing permissions and
+ * limitations under the License.
+ */
+
+/**
+ * Counts recorded values in buckets, e.g. to track a latency distribution
+ * without keeping every sample.
+ */
+export class Histogram {
+  /** Inclusive upper bounds of the buckets, ascending. */
+  readonly #bounds: readonly number[];
+  /** Counts per bucket. The last bucket counts values above all the bounds. */
+  readonly #counts: number[];
+  #count = 0;
+  #sum = 0;
+
+  constructor(bounds: readonly number[]) {
+    this.#bounds = bounds;
+    this.#counts = new Array(bounds.length + 1).fill(0);
+  }
+
+  get count(): number {
+    return this.#count;
+  }
+
+  get mean(): number {
+    return this.#count === 0 ? 0 : this.#sum / this.#count;
+  }
+
+  record(value: number): void {
+    let bucket = this.#bounds.findIndex((bound) => value <= bound);
+    if (bucket === -1) {
+      bucket = this.#bounds.length;
+    }
+    this.#counts[bucket]!++;
+    this.#count++;
+    this.#sum += value;
+  }
+
+  /** Returns the buckets with their upper bounds and counts. */
+  get buckets(): {bound: number; count: number}[] {
+    return this.#counts.map((count, i) => ({
+      bound: this.#bounds[i] ?? Infinity,
+      count,
+    }));
+  }
+
+  toString(): string {
+    return this.buckets
+      .map(({bound, count}) => `≤${bound}: ${count}`)
+      .join(', ');
+  }
+}
@@ -20,7 +20,9 @@ import * as chai from 'chai';
 import * as sinon from 'sinon';
 import {Deferred} from './deferred.js';
 import {ProcessingQueue} from './processingQueue.js';
+import chaiAsPromised from 'chai-as-promised';
 
+chai.use(chaiAsPromised);
 const expect = chai.expect;
 
 describe('test ProcessingQueue', () => {
@@ -86,6 +88,143 @@ describe('test ProcessingQueue', () => {
     await wait(1);
     sinon.assert.calledOnceWithExactly(processor, 2);
   });
+  it('should track depth and high-water mark', async () => {
+    const processor = sinon.stub().returns(Promise.resolve());
+    const queue = new ProcessingQueue<number>(processor);
+    const deferred = new Deferred<number>();
+
+    queue.add(deferred);
+    queue.add(Promise.resolve(2));
+    queue.add(Promise.resolve(3));
+    // The first entry is being awaited.
+    expect(queue.depth).to.equal(2);
+
+    deferred.resolve(1);
+    await wait(1);
+
+    expect(queue.depth).to.equal(0);
+    expect(queue.highWaterMark).to.equal(2);
+  });
+  describe('bounded', () => {
+    it('should drop oldest entry', async () => {
+      const processor = sinon.stub().returns(Promise.resolve());
+      const queue = new ProcessingQueue<number>(
+        processor,
+        undefined,
+        undefined,
+        {
+          maxSize: 2,
+          overflowPolicy: 'dropOldest',
+        }
+      );
+      const deferred = new Deferred<number>();
+
+      queue.add(deferred);
+      queue.add(Promise.resolve(2));
+      queue.add(Promise.resolve(3));
+      queue.add(Promise.resolve(4));
+      deferred.resolve(1);
+      await wait(1);
+
+      const processedValues = processor.getCalls().map((c) => c.firstArg);
+      expect(processedValues).to.deep.equal([1, 3, 4]);
+    });
+    it('should coalesce entries', async () => {
+      const processor = sinon.stub().returns(Promise.resolve());
+      const queue = new ProcessingQueue<number>(
+        processor,
+        undefined,
+        undefined,
+        {
+          maxSize: 1,
+          overflowPolicy: 'coalesce',
+          coalesce: (previous, next) => previous + next,
+        }
+      );
+      const deferred = new Deferred<number>();
+
+      queue.add(deferred);
+      queue.add(Promise.resolve(2));
+      queue.add(Promise.resolve(3));
+      queue.add(Promise.resolve(4));
+      deferred.resolve(1);
+      await wait(1);
+
+      const processedValues = processor.getCalls().map((c) => c.firstArg);
+      expect(processedValues).to.deep.equal([1, 9]);
+    });
+    it('should coalesce after rejected entry', async () => {
+      const processor = sinon.stub().returns(Promise.resolve());
+      const mycatch = sinon.spy();
+      const queue = new ProcessingQueue<number>(processor, mycatch, undefined, {
+        maxSize: 1,
+        overflowPolicy: 'coalesce',
+        coalesce: (previous, next) => previous + next,
+      });
+      const deferred = new Deferred<number>();
+      const rejected = new Deferred<number>();
+
+      queue.add(deferred);
+      queue.add(rejected);
+      queue.add(Promise.resolve(3));
+      queue.add(Promise.resolve(4));
+      rejected.reject(2);
+      deferred.resolve(1);
+      await wait(1);
+
+      const processedValues = processor.getCalls().map((c) => c.firstArg);
+      expect(processedValues).to.deep.equal([1, 7]);
+      sinon.assert.calledOnceWithExactly(mycatch, 2);
+    });
+    it('should reject when full', async () => {
+      const processor = sinon.stub().returns(Promise.resolve());
+      const queue = new ProcessingQueue<number>(
+        processor,
+        undefined,
+        undefined,
+        {
+          maxSize: 1,
+        }
+      );
+      const deferred = new Deferred<number>();
+
+      queue.add(deferred);
+      await queue.add(Promise.resolve(2));
+      await expect(queue.add(Promise.resolve(3))).to.be.rejectedWith(
+        'Queue is full'
+      );
+      expect(queue.depth).to.equal(1);
+
+      deferred.resolve(1);
+      await wait(1);
+
+      const processedValues = processor.getCalls().map((c) => c.firstArg);
+      expect(processedValues).to.deep.equal([1, 2]);
+    });
+    it('should queue not bounded entries when full', async () => {
+      const processor = sinon.stub().returns(Promise.resolve());
+      const queue = new ProcessingQueue<number>(
+        processor,
+        undefined,
+        undefined,
+        {
+          maxSize: 1,
+        }
+      );
+      const deferred = new Deferred<number>();
+
+      queue.add(deferred);
+      queue.add(Promise.resolve(2));
+      await queue.add(Promise.resolve(3), {bounded: false});
+      expect(queue.depth).to.equal(2);
+
+      deferred.resolve(1);
+      await wait(1);
+
+      const processedValues = processor.getCalls().map((c) => c.firstArg);
+      expect(processedValues).to.deep.equal([1, 2, 3]);
+    });
+  });
 });
 
 function wait(timeout: number): Promise<void> {
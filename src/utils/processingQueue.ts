@@ -16,12 +16,48 @@
  */
 
 import {LogType, LoggerFn} from './log.js';
+import {Deque} from './deque.js';
+
+/**
+ * What to do with a new entry when the queue is full:
+ * * `reject`: the entry is not queued, and the promise returned by `add` is
+ *   rejected, so that the caller can drop it or retry later;
+ * * `dropOldest`: the oldest not processed entry is dropped;
+ * * `coalesce`: the entry is merged into the newest queued entry with
+ *   `ProcessingQueueOptions.coalesce`.
+ */
+export type OverflowPolicy = 'reject' | 'dropOldest' | 'coalesce';
+
+export interface ProcessingQueueOptions<T> {
+  /** Maximum number of queued entries. Unbounded if not set. */
+  maxSize?: number;
+  /** Default is `reject`. */
+  overflowPolicy?: OverflowPolicy;
+  /** Merges two consecutive entries. Required by the `coalesce` policy. */
+  coalesce?: (previous: T, next: T) => T;
+}
+
+export interface AddOptions {
+  /**
+   * If false, the entry is queued even if the queue is full. It can still be
+   * dropped or merged by the `dropOldest` and `coalesce` policies. Default is
+   * true.
+   */
+  bounded?: boolean;
+}
+
+/** Depth from which reaching a new power of 2 is logged. */
+const LOGGED_DEPTH_MIN = 128;
 
 export class ProcessingQueue<T> {
   readonly #catch: (error: unknown) => Promise<void>;
   readonly #logger?: LoggerFn;
   readonly #processor: (arg: T) => Promise<void>;
-  readonly #queue: Promise<T>[] = [];
+  readonly #queue = new Deque<Promise<T>>();
+  readonly #maxSize: number;
+  readonly #overflowPolicy: OverflowPolicy;
+  readonly #coalesce?: (previous: T, next: T) => T;
+  #highWaterMark = 0;
 
   // Flag to keep only 1 active processor.
   #isProcessing = false;
@@ -29,18 +65,94 @@ export class ProcessingQueue<T> {
   constructor(
     processor: (arg: T) => Promise<void>,
     _catch: (error: unknown) => Promise<void> = () => Promise.resolve(),
-    logger?: LoggerFn
+    logger?: LoggerFn,
+    options: ProcessingQueueOptions<T> = {}
   ) {
     this.#catch = _catch;
     this.#processor = processor;
     this.#logger = logger;
+    this.#maxSize = options.maxSize ?? Infinity;
+    this.#overflowPolicy = options.overflowPolicy ?? 'reject';
+    this.#coalesce = options.coalesce;
+    if (this.#overflowPolicy === 'coalesce' && this.#coalesce === undefined) {
+      throw new Error('`coalesce` is required by the `coalesce` policy');
+    }
+  }
+
+  /** Number of entries waiting to be processed. */
+  get depth(): number {
+    return this.#queue.length;
+  }
+
+  /** Maximum depth reached so far. */
+  get highWaterMark(): number {
+    return this.#highWaterMark;
   }
 
-  add(entry: Promise<T>) {
-    this.#queue.push(entry);
+  /**
+   * Queues the entry. The returned promise is rejected if the queue is full
+   * and the overflow policy is `reject`. Otherwise, it is resolved.
+   */
+  add(entry: Promise<T>, {bounded = true}: AddOptions = {}): Promise<void> {
+    let accepted = Promise.resolve();
+    if (!bounded || this.#queue.length < this.#maxSize) {
+      this.#queue.push(entry);
+    } else {
+      accepted = this.#handleOverflow(entry);
+    }
+    this.#updateHighWaterMark();
     // No need in waiting. Just initialise processor if needed.
     // noinspection JSIgnoredPromiseFromCall
     this.#processIfNeeded();
+    return accepted;
+  }
+
+  #updateHighWaterMark() {
+    const depth = this.depth;
+    if (depth <= this.#highWaterMark) {
+      return;
+    }
+    this.#highWaterMark = depth;
+    // Log the growth at powers of 2, so that it does not flood the log.
+    if (depth >= LOGGED_DEPTH_MIN && (depth & (depth - 1)) === 0) {
+      this.#logger?.(LogType.system, `Queue depth reached ${depth}.`);
+    }
+  }
+
+  #handleOverflow(entry: Promise<T>): Promise<void> {
+    switch (this.#overflowPolicy) {
+      case 'reject':
+        // The rejected entry is not awaited.
+        entry.catch(() => {});
+        return Promise.reject(
+          new Error(`Queue is full: ${this.#queue.length} entries`)
+        );
+      case 'dropOldest': {
+        const dropped = this.#queue.shift();
+        // The dropped entry is not awaited anymore.
+        dropped?.catch(() => {});
+        this.#logger?.(LogType.system, 'Queue is full. Oldest entry dropped.');
+        this.#queue.push(entry);
+        return Promise.resolve();
+      }
+      case 'coalesce': {
+        const previous = this.#queue.pop();
+        this.#queue.push(
+          previous === undefined
+            ? entry
+            : previous.then(
+                (previousValue) =>
+                  entry.then((value) => this.#coalesce!(previousValue, value)),
+                (e) => {
+                  // The new entry does not depend on the failed one.
+                  this.#reportError(e);
+                  return entry;
+                }
+              )
+        );
+        return Promise.resolve();
+      }
+    }
   }
 
   async #processIfNeeded() {
@@ -53,14 +165,16 @@ export class ProcessingQueue<T> {
       if (entryPromise !== undefined) {
         await entryPromise
           .then((entry) => this.#processor(entry))
-          .catch((e) => {
-            this.#logger?.(LogType.system, 'Event was not processed:', e);
-            this.#catch(e);
-          })
+          .catch((e) => this.#reportError(e))
           .finally();
       }
     }
 
     this.#isProcessing = false;
   }
+
+  #reportError(error: unknown) {
+    this.#logger?.(LogType.system, 'Event was not processed:', error);
+    this.#catch(error);
+  }
 }
@@ -13,19 +13,14 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import asyncio
 import json
 import os
 
 import pytest_asyncio
 import websockets
 
-_command_counter = 1
-
-
-def get_next_command_id():
-    global _command_counter
-    _command_counter += 1
-    return _command_counter
+from bidi_client import BidiClient, get_next_command_id
 
 
 @pytest_asyncio.fixture
@@ -36,6 +31,15 @@ async def websocket():
         yield connection
 
 
+# Multiplexed client on top of the `websocket` fixture. Tests using it should
+# not read from the `websocket` directly, as the client owns the reader.
+@pytest_asyncio.fixture
+async def bidi_client(websocket):
+    client = BidiClient(websocket)
+    yield client
+    await client.close()
+
+
 @pytest_asyncio.fixture
 async def default_realm(context_id, websocket):
     result = await execute_command(
@@ -209,6 +213,8 @@ def any_value(_):
 
 
 async def send_JSON_command(websocket, command):
+    if isinstance(websocket, BidiClient):
+        return await websocket.send_command(command)
     if "id" not in command:
         command_id = get_next_command_id()
         command["id"] = command_id
@@ -235,6 +241,9 @@ async def goto_url(websocket, context_id, url):
 
 # noinspection PySameParameterValue
 async def execute_command(websocket, command):
+    if isinstance(websocket, BidiClient):
+        return await websocket.execute_command(command)
+
     command_id = get_next_command_id()
     command["id"] = command_id
 
@@ -252,8 +261,65 @@ async def execute_command(websocket, command):
             })
 
 
+# Results of `execute_commands`, in the order of the commands.
+class CommandBatchResults(list):
+
+    @property
+    def errors(self):
+        return [r for r in self if isinstance(r, Exception)]
+
+
+# Sends all the given commands back to back without waiting for responses, and
+# returns their results in the order of `commands`. A failed command does not
+# stop the batch: its place in the result list holds the exception
+# `execute_command` would have raised. Costs about 1 round trip instead of
+# `len(commands)`.
+#
+# On a raw websocket, the events received during the batch are discarded, like
+# in `execute_command`. Use a `BidiClient` to keep them.
+async def execute_commands(websocket, commands):
+    command_ids = []
+    for command in commands:
+        command["id"] = get_next_command_id()
+        command_ids.append(await send_JSON_command(websocket, command))
+
+    if isinstance(websocket, BidiClient):
+        responses = await asyncio.gather(
+            *[websocket.wait_for_response(i) for i in command_ids])
+        responses_by_id = dict(zip(command_ids, responses))
+    else:
+        responses_by_id = {}
+        while len(responses_by_id) < len(command_ids):
+            resp = await read_JSON_message(websocket)
+            if resp.get("id") in command_ids:
+                responses_by_id[resp["id"]] = resp
+            elif resp.get("id") is None and "error" in resp:
+                # Can't be matched to a command, e.g. a parse error. Waiting
+                # for the responses would never end.
+                raise Exception({
+                    "error": resp["error"],
+                    "message": resp["message"]
+                })
+
+    results = []
+    for command_id in command_ids:
+        resp = responses_by_id[command_id]
+        if "result" in resp:
+            results.append(resp["result"])
+        else:
+            results.append(
+                Exception({
+                    "error": resp["error"],
+                    "message": resp["message"]
+                }))
+    return CommandBatchResults(results)
+
+
 # Wait and return a specific event from Bidi server
 async def wait_for_event(websocket, event_method):
+    if isinstance(websocket, BidiClient):
+        return await websocket.wait_for_event(event_method)
+
     while True:
         event_response = await read_JSON_message(websocket)
         if "method" in event_response and event_response[
@@ -114,3 +114,87 @@ async def test_channel_empty(websocket):
             "message": "already connected"
         }
     }
+
+
+@pytest.mark.asyncio
+async def test_bidiClient_concurrentCommands_eachResponseRouted(bidi_client):
+    tree = await bidi_client.execute_command({
+        "method": "browsingContext.getTree",
+        "params": {}
+    })
+    context_id = tree["contexts"][0]["context"]
+
+    results = await asyncio.gather(*[
+        bidi_client.execute_command({
+            "method": "script.evaluate",
+            "params": {
+                "expression": f"{i}",
+                "target": {
+                    "context": context_id
+                },
+                "awaitPromise": False
+            }
+        }) for i in range(10)
+    ])
+
+    assert [r["result"] for r in results] == [{
+        "type": "number",
+        "value": i
+    } for i in range(10)]
+
+
+@pytest.mark.asyncio
+async def test_bidiClient_eventDuringCommand_eventKept(bidi_client):
+    tree = await bidi_client.execute_command({
+        "method": "browsingContext.getTree",
+        "params": {}
+    })
+    context_id = tree["contexts"][0]["context"]
+    await subscribe(bidi_client, "log.entryAdded")
+
+    # The event is emitted before the command response, and should not be
+    # discarded while waiting for the response.
+    await bidi_client.execute_command({
+        "method": "script.evaluate",
+        "params": {
+            "expression": "console.log('some log')",
+            "target": {
+                "context": context_id
+            },
+            "awaitPromise": False
+        }
+    })
+
+    event = await bidi_client.wait_for_event("log.entryAdded")
+    assert event["params"]["text"] == "some log"
+
+
+@pytest.mark.asyncio
+async def test_executeCommands_resultsInOrderWithErrors(websocket, context_id):
+    results = await execute_commands(websocket, [{
+        "method": "script.evaluate",
+        "params": {
+            "expression": "1",
+            "target": {
+                "context": context_id
+            },
+            "awaitPromise": False
+        }
+    }, {
+        "method": "unknown.command",
+        "params": {}
+    }, {
+        "method": "script.evaluate",
+        "params": {
+            "expression": "2",
+            "target": {
+                "context": context_id
+            },
+            "awaitPromise": False
+        }
+    }])
+
+    assert results[0]["result"] == {"type": "number", "value": 1}
+    assert results[1].args[0]["error"] == "unknown command"
+    assert results[2]["result"] == {"type": "number", "value": 2}
+    assert results.errors == [results[1]]